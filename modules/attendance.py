@@ -0,0 +1,71 @@
+from datetime import date, datetime
+
+from firebase_app import db
+from projections import get_fields
+
+# --- Attendance records ---
+# One document per employee per day, keyed "<employee_id>_<YYYY-MM-DD>".
+# Marking attendance is a single create(), which Firestore rejects if the day
+# is already marked, so there is no check-then-add race and no query; "is this
+# day marked?" is a point read.
+ATTENDANCE_COLLECTION = "attendance"
+
+
+def day_key(day=None):
+    """``day`` (date, datetime or "YYYY-MM-DD"; default today) as "YYYY-MM-DD"."""
+    if day is None:
+        day = date.today()
+    if isinstance(day, datetime):
+        day = day.date()
+    return day.isoformat() if isinstance(day, date) else str(day)
+
+
+def attendance_id(employee_id, day=None):
+    return f"{str(employee_id).strip()}_{day_key(day)}"
+
+
+def attendance_ref(employee_id, day=None):
+    return db.collection(ATTENDANCE_COLLECTION).document(attendance_id(employee_id, day))
+
+
+def attendance_record(employee_id, employee_name="", when=None, status="Present"):
+    when = when or datetime.now()
+    return {
+        "employee_id": str(employee_id).strip(),
+        "employee_name": employee_name,
+        "timestamp": when,
+        "date": day_key(when),
+        "status": status
+    }
+
+
+def mark_attendance(employee_id, employee_name="", when=None, status="Present"):
+    """Create today's record in one write; returns False if the day was already marked."""
+    from google.api_core.exceptions import AlreadyExists
+    record = attendance_record(employee_id, employee_name, when, status)
+    try:
+        attendance_ref(employee_id, record["date"]).create(record)
+    except AlreadyExists:
+        return False
+    return True
+
+
+def is_marked(employee_id, day=None):
+    return get_fields(attendance_ref(employee_id, day), ["status"]).exists
+
+
+def create_records(records):
+    """Create many records in one batch; returns how many were new.
+
+    If any day is already marked the batch is rejected as a whole, so the
+    records are then created one by one and the existing ones skipped.
+    """
+    from google.api_core.exceptions import AlreadyExists
+    batch = db.batch()
+    for record in records:
+        batch.create(attendance_ref(record["employee_id"], record["date"]), record)
+    try:
+        batch.commit()
+        return len(records)
+    except AlreadyExists:
+        return sum(1 for r in records if mark_attendance(r["employee_id"], r.get("employee_name", ""), r["timestamp"], r["status"]))
@@ -0,0 +1,184 @@
+import contextvars
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import messagebox
+
+# --- Background I/O ---
+# Firestore and HTTP calls made from the UI run on one bounded, shared thread
+# pool. Results come back on the Tk thread via ``after``, so callbacks may touch
+# widgets. While a call runs, its ``busy`` widgets are disabled and the window
+# shows a busy cursor. Overlapping calls share them: a widget is re-enabled
+# (and a status label gets its text back) only when the last call using it
+# finishes. Workers and their callbacks run in a copy of the caller's
+# contextvars, so work a callback chains on stays under the caller's
+# firestore_metrics action.
+MAX_WORKERS = 8
+
+_executor = None
+_lock = threading.Lock()
+_busy_cursors = {}
+_busy_widgets = {}  # widget -> [holders, state before the first]
+_status_labels = {}  # label -> [text before the first holder, [(holder, text), ...]]
+_in_flight = 0
+
+
+def executor():
+    """The shared, bounded I/O thread pool."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="bg-io")
+        return _executor
+
+
+def in_flight():
+    """Calls started and not yet reported back (callbacks included)."""
+    return _in_flight
+
+
+def _track(delta):
+    global _in_flight
+    with _lock:
+        _in_flight += delta
+
+
+class BackgroundTask:
+    """Handle for a background call; ``cancel()`` drops its callbacks."""
+
+    def __init__(self, future):
+        self.future = future
+        self.cancelled = False
+
+    def cancel(self):
+        """Cancel the call if it has not started; its callbacks will not run either way."""
+        self.cancelled = True
+        return self.future.cancel()
+
+    def done(self):
+        return self.future.done()
+
+
+def _alive(widget):
+    try:
+        return bool(widget.winfo_exists())
+    except tk.TclError:
+        return False
+
+
+def _disable(widgets):
+    held = []
+    for w in widgets:
+        entry = _busy_widgets.get(w)
+        if entry is not None:
+            entry[0] += 1
+            held.append(w)
+            continue
+        try:
+            state = str(w.cget("state"))
+            w.configure(state="disabled")
+        except tk.TclError:
+            continue
+        _busy_widgets[w] = [1, state]
+        held.append(w)
+    return held
+
+
+def _restore(held):
+    for w in held:
+        entry = _busy_widgets.get(w)
+        if entry is None:
+            continue
+        entry[0] -= 1
+        if entry[0] > 0:
+            continue
+        del _busy_widgets[w]
+        try:
+            if w.winfo_exists():
+                w.configure(state=entry[1])
+        except tk.TclError:
+            pass
+
+
+def _show_status(label, text, holder):
+    entry = _status_labels.get(label)
+    if entry is None:
+        try:
+            entry = _status_labels[label] = [label.cget("text"), []]
+        except tk.TclError:
+            return
+    entry[1].append((holder, text))
+    label.config(text=text)
+
+
+def _clear_status(label, holder):
+    # Show the newest remaining call's text, or the original once none is left
+    entry = _status_labels.get(label)
+    if entry is None:
+        return
+    entry[1] = [item for item in entry[1] if item[0] is not holder]
+    if not entry[1]:
+        del _status_labels[label]
+    if _alive(label):
+        label.config(text=entry[1][-1][1] if entry[1] else entry[0])
+
+
+def _set_cursor(widget, delta):
+    # Nested calls share one busy cursor per toplevel
+    try:
+        top = widget.winfo_toplevel()
+        key = str(top)
+        count = max(_busy_cursors.get(key, 0) + delta, 0)
+        _busy_cursors[key] = count
+        top.configure(cursor="watch" if count else "")
+    except tk.TclError:
+        pass
+
+
+def run_in_background(widget, fn, *args, on_success=None, on_error=None, busy=(), status=None, **kwargs):
+    """Run ``fn(*args, **kwargs)`` on the shared pool; report back on ``widget``'s Tk thread.
+
+    ``on_success(result)`` / ``on_error(exception)`` run on the Tk thread and are
+    skipped if ``widget`` was destroyed or the task was cancelled; without
+    ``on_error`` failures are shown in an error dialog. ``busy`` widgets are
+    disabled while the call runs; ``status`` is a ``(label, text)`` pair shown
+    meanwhile. Must be called on the Tk thread. Returns a BackgroundTask.
+    """
+    held = _disable([w for w in busy if w is not None])
+    _set_cursor(widget, +1)
+    _track(+1)
+    context = contextvars.copy_context()
+    future = executor().submit(context.run, fn, *args, **kwargs)
+    task = BackgroundTask(future)
+    if status:
+        _show_status(status[0], status[1], task)
+
+    def finish(f):
+        _restore(held)
+        _set_cursor(widget, -1)
+        if status:
+            _clear_status(status[0], task)
+        try:
+            if not (task.cancelled or f.cancelled() or not _alive(widget)):
+                context.run(report, f)
+        finally:
+            _track(-1)
+
+    def report(f):
+        error = f.exception()
+        if error is None:
+            if on_success is not None:
+                on_success(f.result())
+        elif on_error is not None:
+            on_error(error)
+        else:
+            messagebox.showerror("Error", str(error))
+
+    def done(f):
+        try:
+            widget.after(0, lambda: finish(f))
+        except (RuntimeError, tk.TclError):
+            _track(-1)  # Tk already destroyed
+
+    future.add_done_callback(done)
+    return task
@@ -0,0 +1,176 @@
+"""Load test for the employee API.
+
+Drives an already running API with concurrent keep-alive clients and reports
+sustained requests/sec and latency percentiles per endpoint:
+
+    python modules/bench_api.py --url http://127.0.0.1:5000 --clients 32 --duration 30
+
+To compare the Flask (WSGI) and async (ASGI) servers at high concurrency, use
+the asyncio driver, which can hold 1,000 clients open from one process:
+
+    python modules/bench_api.py --driver async --clients 100 250 500 1000 \
+        --url http://127.0.0.1:5000 --url http://127.0.0.1:5001
+
+``/add_employee`` creates real employee documents, so it only runs with
+``--include-writes`` (point it at a test project or the emulator).
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+
+import requests
+
+BENCH_EMPLOYEE = {
+    "Name": "Bench Employee",
+    "Role": "Benchmark",
+    "Contact": "0000000000",
+    "Gender": "Other",
+    "Age": "30",
+    "Date of Birth": "1995-01-01",
+    "Bank Name": "Bench Bank",
+    "Account Number": "000000000",
+    "IFSC Code": "BENCH000000",
+}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(name, latencies, errors, duration):
+    latencies.sort()
+    return {
+        "endpoint": name,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / duration,
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+    }
+
+
+def run_endpoint(name, make_request, clients, duration, warmup):
+    """Hammer one endpoint from ``clients`` threads for ``duration`` seconds."""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    start = time.perf_counter() + warmup
+    stop = start + duration
+
+    def worker():
+        session = requests.Session()
+        local, local_errors = [], 0
+        while True:
+            t0 = time.perf_counter()
+            if t0 >= stop:
+                break
+            try:
+                response = make_request(session)
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            t1 = time.perf_counter()
+            if t0 >= start:
+                if ok:
+                    local.append(t1 - t0)
+                else:
+                    local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return summarize(name, latencies, errors[0], duration)
+
+
+def run_endpoint_async(name, method, url, clients, duration, warmup, **kwargs):
+    """Async driver: ``clients`` concurrent httpx tasks for ``duration`` seconds."""
+    import httpx
+
+    async def bench():
+        latencies, errors = [], 0
+        limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+        async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+            loop = asyncio.get_running_loop()
+            start = loop.time() + warmup
+            stop = start + duration
+
+            async def worker():
+                nonlocal errors
+                while True:
+                    t0 = loop.time()
+                    if t0 >= stop:
+                        return
+                    try:
+                        response = await client.request(method, url, **kwargs)
+                        ok = response.status_code < 400
+                    except httpx.HTTPError:
+                        ok = False
+                    if t0 >= start:
+                        if ok:
+                            latencies.append(loop.time() - t0)
+                        else:
+                            errors += 1
+
+            await asyncio.gather(*(worker() for _ in range(clients)))
+        return latencies, errors
+
+    latencies, errors = asyncio.run(bench())
+    return summarize(name, latencies, errors, duration)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the employee API.")
+    parser.add_argument("--url", action="append", default=[],
+                        help="API base URL (repeat to compare servers; default http://127.0.0.1:5000)")
+    parser.add_argument("--clients", type=int, nargs="+", default=[16], help="Concurrent clients (several values = sweep)")
+    parser.add_argument("--driver", choices=["threads", "async"], default="threads",
+                        help="Load generator: requests+threads, or httpx+asyncio for high client counts")
+    parser.add_argument("--duration", type=float, default=20, help="Measured seconds per endpoint")
+    parser.add_argument("--warmup", type=float, default=3, help="Unmeasured seconds before each run")
+    parser.add_argument("--fields", default="id,Name,Role", help="?fields= for /get_employees (empty for full records)")
+    parser.add_argument("--include-writes", action="store_true", help="Also benchmark /add_employee")
+    args = parser.parse_args(argv)
+
+    params = {"fields": args.fields} if args.fields else {}
+    headers = {"Accept-Encoding": "gzip"}
+    print(f"{args.driver} driver, {args.duration:.0f}s per endpoint")
+    print(f"{'server':<28} {'clients':>7} {'endpoint':<20} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    failed = False
+    for url in args.url or ["http://127.0.0.1:5000"]:
+        base = url.rstrip("/")
+        for clients in args.clients:
+            if args.driver == "async":
+                runs = [lambda: run_endpoint_async("GET /get_employees", "GET", f"{base}/get_employees", clients,
+                                                   args.duration, args.warmup, params=params, headers=headers)]
+                if args.include_writes:
+                    runs.append(lambda: run_endpoint_async("POST /add_employee", "POST", f"{base}/add_employee", clients,
+                                                           args.duration, args.warmup, json=BENCH_EMPLOYEE))
+            else:
+                runs = [lambda: run_endpoint("GET /get_employees",
+                                             lambda s: s.get(f"{base}/get_employees", params=params, headers=headers, timeout=30),
+                                             clients, args.duration, args.warmup)]
+                if args.include_writes:
+                    runs.append(lambda: run_endpoint("POST /add_employee",
+                                                     lambda s: s.post(f"{base}/add_employee", json=BENCH_EMPLOYEE, timeout=30),
+                                                     clients, args.duration, args.warmup))
+            for run in runs:
+                result = run()
+                failed = failed or result["errors"] > 0
+                print(f"{base:<28} {clients:>7} {result['endpoint']:<20} {result['requests']:>9} {result['errors']:>7} "
+                      f"{result['rps']:>9.1f} {result['p50']:>9.1f} {result['p95']:>9.1f} {result['p99']:>9.1f}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+import itertools
+import threading
+import time
+import uuid
+from collections import deque
+from functools import partial
+
+from firebase_app import db
+import firestore_metrics
+
+# --- Change Feed ---
+# Firestore listeners feed a bounded in-memory ring of change events that any
+# number of subscribers read from. A listener is attached per collection and
+# equality-filter set only once somebody subscribes to it, with the filters in
+# the listener query (``where(assign_to == "17")``), so a portal following one
+# employee's tasks reads only those documents; it is detached once it has had
+# no subscribers for IDLE_WATCH_SECONDS. Event IDs are "<epoch>-<seq>": a
+# subscriber that reconnects with its last ID resumes where it left off, and
+# gets a "reset" event (reload everything) when the ID is from an earlier
+# server run, has already fallen out of the ring, or predates its listener;
+# the reset's ``collections`` lists the collections it applies to.
+# Listener reads are recorded in firestore_metrics under the "change_feed" action.
+FEED_COLLECTIONS = ("employees", "tasks", "attendance")
+RING_SIZE = 10000
+HEARTBEAT_SECONDS = 15
+IDLE_WATCH_SECONDS = 60
+
+
+def watch_key(collection, filters=None):
+    """The listener a subscription needs: its collection and sorted equality filters."""
+    return collection, tuple(sorted((str(k), str(v)) for k, v in (filters or {}).items()))
+
+
+class ChangeFeed:
+    def __init__(self, collections=FEED_COLLECTIONS, ring_size=RING_SIZE, idle_seconds=IDLE_WATCH_SECONDS):
+        self.collections = tuple(collections)
+        self.idle_seconds = idle_seconds
+        self.epoch = uuid.uuid4().hex[:8]
+        self._seq = itertools.count(1)
+        self._last_seq = 0
+        self._events = deque(maxlen=ring_size)
+        self._cond = threading.Condition()
+        self._watches = {}  # watch key -> Firestore watch
+        self._users = {}  # watch key -> subscribers
+        self._started = {}  # watch key -> last seq before its listener was attached
+        self._idle_timers = {}
+        self._primed = set()
+
+    def acquire(self, key):
+        """Attach the listener for ``key`` unless it is already running."""
+        with self._cond:
+            self._users[key] = self._users.get(key, 0) + 1
+            timer = self._idle_timers.pop(key, None)
+            if timer is not None:
+                timer.cancel()
+            if key in self._watches:
+                return
+            from firebase_admin.firestore import FieldFilter
+            collection, filters = key
+            query = db.collection(collection)
+            for field, value in filters:
+                query = query.where(filter=FieldFilter(field, "==", value))
+            # Takes a sequence number of its own, so cursors from before it resume with a reset
+            self._started[key] = self._last_seq = next(self._seq)
+            self._watches[key] = query.on_snapshot(partial(self._on_snapshot, key))
+
+    def release(self, key):
+        """Drop a subscriber; the listener is detached after it has been idle for a while."""
+        with self._cond:
+            self._users[key] = self._users.get(key, 1) - 1
+            if self._users[key] > 0 or key in self._idle_timers:
+                return
+            timer = self._idle_timers[key] = threading.Timer(self.idle_seconds, self._detach_if_idle, args=(key,))
+            timer.daemon = True
+            timer.start()
+
+    def _detach_if_idle(self, key):
+        with self._cond:
+            self._idle_timers.pop(key, None)
+            if self._users.get(key, 0) > 0:
+                return
+            self._users.pop(key, None)
+            watches = [self._detach(key)]
+        _unsubscribe(watches)
+
+    def _detach(self, key):
+        self._primed.discard(key)
+        self._started.pop(key, None)
+        return self._watches.pop(key, None)
+
+    def stop(self):
+        with self._cond:
+            for timer in self._idle_timers.values():
+                timer.cancel()
+            self._idle_timers.clear()
+            watches = [self._detach(key) for key in list(self._watches)]
+            self._users.clear()
+        _unsubscribe(watches)
+
+    def _on_snapshot(self, key, docs, changes, read_time):
+        # Each delivered document is a billed read
+        firestore_metrics.record("listen", key[0], "change_feed", 0.0, len(changes), actions=("change_feed",))
+        # The first snapshot lists every existing document as "added"; it is the
+        # baseline clients already have, not a change
+        with self._cond:
+            if key not in self._watches:
+                return  # detached while this snapshot was in flight
+            if key not in self._primed:
+                self._primed.add(key)
+                return
+            for change in changes:
+                kind = change.type.name.lower()
+                seq = next(self._seq)
+                self._events.append({
+                    "id": f"{self.epoch}-{seq}",
+                    "seq": seq,
+                    "type": kind,
+                    "collection": key[0],
+                    "doc_id": change.document.id,
+                    "data": None if kind == "removed" else change.document.to_dict(),
+                    "watch": key,
+                })
+                self._last_seq = seq
+            self._cond.notify_all()
+
+    def _cursor(self, last_event_id, keys):
+        """Return ``(seq, stale)`` for a client's Last-Event-ID; ``stale`` are the keys it may have missed changes for."""
+        if not last_event_id:
+            return self._last_seq, set()
+        epoch, _, seq = str(last_event_id).partition("-")
+        if epoch != self.epoch or not seq.isdecimal():
+            return self._last_seq, set(keys)
+        seq = int(seq)
+        # Events after ``seq`` were dropped from the ring, or changes were missed
+        # before a listener it needs was (re)attached
+        if self._events and seq + 1 < self._events[0]["seq"]:
+            return seq, set(keys)
+        return seq, {key for key in keys if self._started.get(key, seq) > seq}
+
+    def subscribe(self, last_event_id=None, collections=None, filters=None, stop=None, heartbeat=HEARTBEAT_SECONDS):
+        """Yield change events after ``last_event_id``; yields None as a keep-alive.
+
+        ``filters`` (``{field: value}``, string values) are equality filters on
+        the listener query; a document that stops matching arrives as
+        "removed". Ends when ``stop`` is set.
+        """
+        keys = {watch_key(c, filters) for c in (collections or self.collections) if c in self.collections}
+        for key in keys:
+            self.acquire(key)
+        try:
+            with self._cond:
+                seq, stale = self._cursor(last_event_id, keys)
+            if stale:
+                yield {"id": f"{self.epoch}-{seq}", "seq": seq, "type": "reset", "collection": None, "doc_id": None,
+                       "data": None, "collections": sorted({key[0] for key in stale})}
+            yield from self._follow(seq, keys, stop, heartbeat)
+        finally:
+            for key in keys:
+                self.release(key)
+
+    def _follow(self, seq, keys, stop, heartbeat):
+        last_beat = time.monotonic()
+        while stop is None or not stop.is_set():
+            with self._cond:
+                if self._last_seq <= seq:
+                    self._cond.wait(timeout=1.0)
+                # New events are at the tail of the ring
+                pending = []
+                for event in reversed(self._events):
+                    if event["seq"] <= seq:
+                        break
+                    pending.append(event)
+                latest = self._last_seq
+            pending.reverse()
+            for event in pending:
+                if event["watch"] in keys:
+                    yield {k: v for k, v in event.items() if k != "watch"}
+                    last_beat = time.monotonic()
+            seq = latest
+            if time.monotonic() - last_beat >= heartbeat:
+                last_beat = time.monotonic()
+                yield None
+
+
+def _unsubscribe(watches):
+    # Outside the feed lock: unsubscribe waits for a snapshot callback that may need it
+    for watch in watches:
+        if watch is not None:
+            try:
+                watch.unsubscribe()
+            except Exception:
+                pass
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_feed():
+    """Shared change feed for this process; listeners start on first subscribe."""
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            _feed = ChangeFeed()
+        return _feed
@@ -0,0 +1,59 @@
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+from tkinter import messagebox
+from datetime import datetime
+from firebase_app import db
+from task_summary import TASK_STATUSES, count_query, task_status_counts
+from background import run_in_background
+
+
+
+def fetch_dashboard_counts():
+    """Site-wide counts, each from a count() aggregation rather than a full stream."""
+    from firebase_admin.firestore import FieldFilter
+    today = datetime.now().strftime("%Y-%m-%d")
+    counts = {"Employees": count_query(db.collection("employees"))}
+    counts["Present Today"] = count_query(db.collection("attendance").where(filter=FieldFilter("date", "==", today)))
+    tasks = task_status_counts(db)
+    counts["Tasks"] = tasks.pop("Total")
+    counts.update(tasks)
+    return counts
+
+
+def show_dashboard_ui(container):
+    for widget in container.winfo_children():
+        widget.destroy()
+
+    ttk.Label(container, text="Dashboard", font=("Segoe UI", 14, "bold")).pack(anchor=W, pady=(0, 10))
+
+    cards_frame = ttk.Frame(container)
+    cards_frame.pack(fill=X)
+
+    value_labels = {}
+    styles = {"Employees": "primary", "Present Today": "success", "Tasks": "info",
+              "Pending": "warning", "In Progress": "info", "Completed": "success", "Incomplete": "danger"}
+    for idx, key in enumerate(["Employees", "Present Today", "Tasks"] + TASK_STATUSES):
+        r, c = divmod(idx, 4)
+        card = ttk.Labelframe(cards_frame, text=key, padding=12, bootstyle=styles.get(key, "secondary"))
+        card.grid(row=r, column=c, padx=8, pady=8, sticky=NSEW)
+        cards_frame.columnconfigure(c, weight=1)
+        value_labels[key] = ttk.Label(card, text="-", font=("Segoe UI", 20, "bold"))
+        value_labels[key].pack()
+
+    updated_label = ttk.Label(container, text="", font=("Segoe UI", 9))
+    updated_label.pack(anchor=W, pady=(6, 0))
+
+    def refresh():
+        def loaded(counts):
+            for key, label in value_labels.items():
+                label.config(text=str(counts.get(key, 0)))
+            updated_label.config(text=f"Updated {datetime.now().strftime('%H:%M:%S')}")
+
+        run_in_background(container, fetch_dashboard_counts, on_success=loaded, busy=[refresh_btn],
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to load dashboard: {e}"))
+
+    refresh_btn = ttk.Button(container, text="Refresh", command=refresh, bootstyle="info-outline", width=14)
+    refresh_btn.pack(anchor=W, pady=10)
+
+    refresh()
+    return refresh
@@ -0,0 +1,69 @@
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+from datetime import datetime
+import firestore_metrics
+
+# Screen loads shown as cards at the top, by firestore_metrics action name
+KEY_ACTIONS = {"fetch_tasks": "Task list", "fetch_attendance": "Attendance list", "generate_report": "Report"}
+
+
+def show_diagnostics_ui(container):
+    """Firestore calls made by this app session: reads per screen load and per-call counters."""
+    for widget in container.winfo_children():
+        widget.destroy()
+
+    ttk.Label(container, text="Diagnostics", font=("Segoe UI", 14, "bold")).pack(anchor=W, pady=(0, 10))
+    if not firestore_metrics.ENABLED:
+        ttk.Label(container, text="Firestore metrics are off (EMS_FIRESTORE_METRICS=0).").pack(anchor=W)
+
+    cards_frame = ttk.Frame(container)
+    cards_frame.pack(fill=X)
+    card_labels = {}
+    for column, (name, title) in enumerate(KEY_ACTIONS.items()):
+        card = ttk.Labelframe(cards_frame, text=f"{title} ({name})", padding=12, bootstyle="info")
+        card.grid(row=0, column=column, padx=8, pady=8, sticky=NSEW)
+        cards_frame.columnconfigure(column, weight=1)
+        card_labels[name] = (ttk.Label(card, text="-", font=("Segoe UI", 20, "bold")), ttk.Label(card, text="", font=("Segoe UI", 9)))
+        for label in card_labels[name]:
+            label.pack(anchor=W)
+
+    columns = ["Operation", "Collection", "Module", "Action", "Calls", "Documents", "Errors", "Avg ms"]
+    tree = ttk.Treeview(container, columns=columns, show="headings", height=16)
+    for col in columns:
+        tree.heading(col, text=col)
+        tree.column(col, anchor="center", width=110)
+    tree.pack(fill=BOTH, expand=True, pady=(10, 0))
+
+    updated_label = ttk.Label(container, text="", font=("Segoe UI", 9))
+    updated_label.pack(anchor=W, pady=(6, 0))
+
+    def refresh():
+        summary = firestore_metrics.action_summary()
+        for name, (value_label, detail_label) in card_labels.items():
+            entry = summary.get(name)
+            if not entry or not entry["runs"]:
+                value_label.config(text="-")
+                detail_label.config(text="Not opened yet")
+                continue
+            value_label.config(text=f"{entry['reads_per_run']:.0f} reads/open")
+            detail_label.config(text=f"{entry['runs']} open(s), {entry['reads']} reads, "
+                                     f"{entry['seconds'] / entry['runs']:.2f}s per open")
+
+        tree.delete(*tree.get_children())
+        for op, collection, module, action, calls, documents, errors, seconds in firestore_metrics.series():
+            tree.insert("", "end", values=(op, collection, module, action or "-", calls, documents, errors,
+                                           f"{seconds * 1000 / calls:.1f}"))
+        updated_label.config(text=f"Updated {datetime.now().strftime('%H:%M:%S')} (counters since start or last reset; "
+                                  f"the API serves its own at /metrics)")
+
+    def reset():
+        firestore_metrics.reset()
+        refresh()
+
+    btn_frame = ttk.Frame(container)
+    btn_frame.pack(anchor=W, pady=10)
+    ttk.Button(btn_frame, text="Refresh", command=refresh, bootstyle="info-outline", width=14).pack(side=LEFT, padx=(0, 7))
+    ttk.Button(btn_frame, text="Reset", command=reset, bootstyle="secondary-outline", width=14).pack(side=LEFT)
+
+    refresh()
+    return refresh
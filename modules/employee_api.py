@@ -0,0 +1,611 @@
+"""Employee REST API.
+
+Run standalone under a production WSGI server (several admin workstations can
+share one API host):
+
+    python modules/employee_api.py --host 0.0.0.0 --port 5000 --workers 4 --threads 8
+
+gunicorn (Linux/macOS) runs ``--workers`` processes with ``--threads`` threads
+each; waitress (Windows) runs one process with ``--threads`` threads. Any other
+WSGI server can load ``wsgi:app``.
+
+Each open /changes stream holds a thread for as long as it is open (one per
+GUI process, see employee_api_client). At most ``--max-streams`` streams per
+process are accepted (default: half of ``--threads``), so requests always
+find a free thread; further streams get 503 with Retry-After.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, Flask, current_app, request, jsonify
+from firebase_admin import firestore
+from firebase_admin.firestore import FieldFilter
+from firebase_app import db
+from projections import ids_only, project
+from snapshot_store import utc_now_iso
+from employee_validation import EMPLOYEE_INPUT_FIELDS, validate_employee_data
+from employee_api_common import (
+    EMPLOYEE_FIELDS, GZIP_MIN_SIZE, ID_COUNTER_DOC, ROSTER_CACHE_MAX_AGE, ROSTER_CACHE_SIZE,
+    ROSTER_META_COLLECTION, ROSTER_META_DOC, ROSTER_VERSION_TTL,
+)
+
+# Firestore allows 500 writes per batch; one slot is kept for the version bump
+BATCH_LIMIT = 500
+BULK_MAX_ROWS = 5000
+BULK_COMMIT_WORKERS = 4
+# Concurrent /changes streams per process (None: unlimited); the servers below set it from --threads
+MAX_CHANGE_STREAMS = int(os.environ.get("EMS_MAX_CHANGE_STREAMS", "0")) or None
+CHANGE_STREAM_RETRY_AFTER = 30
+
+# --- Roster version & response cache ---
+# See employee_api_common for how versions, ETags and cache ages work.
+
+
+class RosterCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        self.checked_at = 0.0
+        self.entries = {}  # query key -> (etag, body, rows, cached_at)
+
+    def meta_ref(self):
+        return db.collection(ROSTER_META_COLLECTION).document(ROSTER_META_DOC)
+
+    def current_version(self):
+        now = time.monotonic()
+        with self._lock:
+            if self.version is not None and now - self.checked_at < ROSTER_VERSION_TTL:
+                return self.version
+        snap = self.meta_ref().get(field_paths=["version"])
+        version = (snap.to_dict() or {}).get("version", 0) if snap.exists else 0
+        with self._lock:
+            if version != self.version:
+                self.entries.clear()
+            self.version, self.checked_at = version, now
+        return version
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and self.version == version and time.monotonic() - entry[3] < ROSTER_CACHE_MAX_AGE:
+                return entry
+        return None
+
+    def put(self, key, version, rows):
+        body = json.dumps(rows, default=str, separators=(",", ":")).encode("utf-8")
+        entry = (hashlib.sha1(body).hexdigest(), body, rows, time.monotonic())
+        with self._lock:
+            # A write may have landed while these rows were being read
+            if self.version == version:
+                if len(self.entries) >= ROSTER_CACHE_SIZE:
+                    self.entries.clear()
+                self.entries[key] = entry
+        return entry
+
+    def bump(self, batch):
+        """Add the roster version increment to a write batch."""
+        batch.set(self.meta_ref(), {"version": firestore.Increment(1)}, merge=True)
+
+    def invalidate(self):
+        with self._lock:
+            self.version = None
+            self.entries.clear()
+
+
+roster_cache = RosterCache()
+
+
+# --- Core operations ---
+# Plain functions behind the HTTP routes. employee_api_client calls them
+# directly when the API runs in the same process, skipping HTTP and JSON.
+class ApiError(Exception):
+    """A request the API rejects; ``status`` is the HTTP status code."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def create_employee(data):
+    """Store a new employee and return its ID."""
+    if not data:
+        raise ApiError("No data received")
+    data = dict(data)
+    new_id = get_next_employee_id()
+    data["id"] = new_id
+    data["last_updated"] = utc_now_iso()
+    batch = db.batch()
+    batch.set(db.collection("employees").document(new_id), data)
+    roster_cache.bump(batch)
+    batch.commit()
+    roster_cache.invalidate()
+    return new_id
+
+
+def roster_entry(fields=None, since=None):
+    """Return the cached ``(etag, body, rows, cached_at)`` for a roster query."""
+    fields = list(fields or [])
+    unknown = [f for f in fields if f not in EMPLOYEE_FIELDS]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}")
+    key = (tuple(fields), since or "")
+    version = roster_cache.current_version()
+    entry = roster_cache.get(key, version)
+    if entry is None:
+        entry = roster_cache.put(key, version, read_employees(fields, since))
+    return entry
+
+
+def list_employees(fields=None, since=None):
+    """Return ``(etag, employees)``; each employee is a fresh dict."""
+    etag, _, rows, _ = roster_entry(fields, since)
+    return etag, [dict(row) for row in rows]
+
+
+def read_employees(fields, since):
+    """Read employees from Firestore."""
+    query = db.collection("employees")
+    if since:
+        query = query.where(filter=FieldFilter("last_updated", ">=", since))
+    if fields:
+        query = project(query, fields)
+    employees = []
+    for doc in query.stream():
+        data = doc.to_dict()
+        if fields and "id" in fields:
+            data.setdefault("id", doc.id)
+        employees.append(data)
+    return employees
+
+
+def remove_employee(emp_id):
+    batch = db.batch()
+    batch.delete(db.collection("employees").document(emp_id))
+    roster_cache.bump(batch)
+    batch.commit()
+    roster_cache.invalidate()
+
+
+def get_next_employee_id():
+    return allocate_employee_ids(1)[0]
+
+
+def _scan_next_employee_id():
+    employees_ref = ids_only(db.collection("employees")).stream()
+    employee_ids = [int(doc.id) for doc in employees_ref if doc.id.isdecimal()]
+    return max(employee_ids) + 1 if employee_ids else 1
+
+
+@firestore.transactional
+def _reserve_ids(transaction, counter_ref, count):
+    snap = counter_ref.get(transaction=transaction)
+    start = (snap.to_dict() or {}).get("next") if snap.exists else None
+    if start is None:
+        # First use: seed the counter from the existing employee IDs
+        start = _scan_next_employee_id()
+    transaction.set(counter_ref, {"next": start + count}, merge=True)
+    return start
+
+
+def allocate_employee_ids(count):
+    """Reserve ``count`` consecutive employee IDs with one transaction on ``meta/employee_ids``."""
+    counter_ref = db.collection(ROSTER_META_COLLECTION).document(ID_COUNTER_DOC)
+    start = _reserve_ids(db.transaction(), counter_ref, count)
+    return [str(start + i) for i in range(count)]
+
+
+# --- Bulk mutations ---
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def commit_in_chunks(ops, results):
+    """Commit ``(index, apply)`` pairs in batches of at most BATCH_LIMIT writes.
+
+    ``apply(batch)`` adds one row's write. Chunks commit concurrently; a failed
+    chunk marks its rows as errors in ``results`` without affecting the others.
+    """
+    if not ops:
+        return
+
+    def commit(chunk):
+        batch = db.batch()
+        for _, apply in chunk:
+            apply(batch)
+        roster_cache.bump(batch)
+        batch.commit()
+
+    chunks = list(_chunks(ops, BATCH_LIMIT - 1))
+    with ThreadPoolExecutor(max_workers=min(BULK_COMMIT_WORKERS, len(chunks))) as pool:
+        futures = [(chunk, pool.submit(commit, chunk)) for chunk in chunks]
+        for chunk, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                for index, _ in chunk:
+                    results[index] = dict(results[index], status="error", errors=[str(e)])
+    roster_cache.invalidate()
+
+
+def check_bulk(rows, key):
+    if not isinstance(rows, list) or not rows:
+        raise ApiError(f"Expected a non-empty '{key}' list")
+    if len(rows) > BULK_MAX_ROWS:
+        raise ApiError(f"At most {BULK_MAX_ROWS} rows per request", 413)
+
+
+def clean_employee(row):
+    return {field: str(row[field]).strip() for field in EMPLOYEE_INPUT_FIELDS if field in row}
+
+
+def create_employees(rows):
+    """Validate and create many employees; returns one result per row, in order.
+
+    Valid rows get IDs from one block allocation.
+    """
+    check_bulk(rows, "employees")
+    results, valid = [], []
+    for index, row in enumerate(rows):
+        errors = validate_employee_data(row) if isinstance(row, dict) else ["• Row must be an object"]
+        results.append({"index": index, "status": "error" if errors else "created", "errors": errors})
+        if not errors:
+            valid.append(index)
+
+    ids = allocate_employee_ids(len(valid)) if valid else []
+    now = utc_now_iso()
+    ops = []
+    for index, new_id in zip(valid, ids):
+        data = clean_employee(rows[index])
+        data.update(id=new_id, last_updated=now)
+        results[index]["id"] = new_id
+        ref = db.collection("employees").document(new_id)
+        ops.append((index, lambda batch, ref=ref, data=data: batch.set(ref, data)))
+    commit_in_chunks(ops, results)
+    return results
+
+
+def update_employees(rows):
+    """Update the given fields of many employees (rows carry ``id``)."""
+    check_bulk(rows, "employees")
+    results, candidates = [], []
+    for index, row in enumerate(rows):
+        emp_id = str(row.get("id", "")).strip() if isinstance(row, dict) else ""
+        if not emp_id:
+            errors = ["• id is required"]
+        else:
+            errors = validate_employee_data(row, partial=True)
+            if not errors and not clean_employee(row):
+                errors = ["• No fields to update"]
+        results.append({"index": index, "id": emp_id, "status": "error" if errors else "updated", "errors": errors})
+        if not errors:
+            candidates.append(index)
+
+    # update() fails the whole batch on a missing document, so check existence first
+    existing = set()
+    for chunk in _chunks(candidates, BATCH_LIMIT):
+        refs = [db.collection("employees").document(results[i]["id"]) for i in chunk]
+        existing.update(snap.id for snap in db.get_all(refs, field_paths=["id"]) if snap.exists)
+
+    now = utc_now_iso()
+    ops = []
+    for index in candidates:
+        emp_id = results[index]["id"]
+        if emp_id not in existing:
+            results[index].update(status="error", errors=["• Employee not found"])
+            continue
+        changes = dict(clean_employee(rows[index]), last_updated=now)
+        ref = db.collection("employees").document(emp_id)
+        ops.append((index, lambda batch, ref=ref, changes=changes: batch.update(ref, changes)))
+    commit_in_chunks(ops, results)
+    return results
+
+
+def delete_employees(ids):
+    check_bulk(ids, "ids")
+    results, ops = [], []
+    for index, emp_id in enumerate(ids):
+        emp_id = str(emp_id).strip()
+        if not emp_id:
+            results.append({"index": index, "id": emp_id, "status": "error", "errors": ["• id is required"]})
+            continue
+        results.append({"index": index, "id": emp_id, "status": "deleted", "errors": []})
+        ref = db.collection("employees").document(emp_id)
+        ops.append((index, lambda batch, ref=ref: batch.delete(ref)))
+    commit_in_chunks(ops, results)
+    return results
+
+
+# --- Routes ---
+api = Blueprint("employee_api", __name__)
+
+
+@api.errorhandler(ApiError)
+def api_error(e):
+    return jsonify({"error": str(e)}), e.status
+
+
+@api.route('/add_employee', methods=['POST'])
+def add_employee():
+    new_id = create_employee(request.get_json(silent=True))
+    return jsonify({"message": "Employee added successfully!", "id": new_id})
+
+@api.route('/get_employees', methods=['GET'])
+def get_employees():
+    """Return employees.
+
+    ``?fields=id,Name`` limits each record to those fields; ``?since=<iso time>``
+    returns only employees whose ``last_updated`` is at or after that time.
+    Responses carry a strong ETag; send it back in If-None-Match to get a 304.
+    """
+    fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()]
+    etag, body, _, _ = roster_entry(fields, request.args.get("since", ""))
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@api.route('/delete_employee/<emp_id>', methods=['DELETE'])
+def delete_employee(emp_id):
+    try:
+        remove_employee(emp_id)
+        return jsonify({"message": f"Employee {emp_id} deleted"}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+class StreamSlots:
+    """Counts open /changes streams so they cannot take every worker thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+
+    def acquire(self, limit):
+        with self._lock:
+            if limit is not None and self.open >= limit:
+                return False
+            self.open += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.open -= 1
+
+
+change_streams = StreamSlots()
+
+
+@api.route('/changes', methods=['GET'])
+def changes():
+    """Server-Sent Events stream of employee, task and attendance changes.
+
+    ``?collections=tasks,attendance`` narrows the stream; any other query
+    parameter filters on a document field (e.g. ``?assign_to=17``). Reconnects
+    resume after the ``Last-Event-ID`` header (or ``?last_event_id=``); a
+    ``reset`` event means the client should reload everything.
+    """
+    from change_feed import FEED_COLLECTIONS, get_feed
+    args = request.args.to_dict()
+    collections = [c for c in args.pop("collections", "").split(",") if c] or list(FEED_COLLECTIONS)
+    unknown = [c for c in collections if c not in FEED_COLLECTIONS]
+    if unknown:
+        raise ApiError(f"Unknown collections: {', '.join(unknown)}")
+    last_event_id = request.headers.get("Last-Event-ID") or args.pop("last_event_id", None)
+    args.pop("last_event_id", None)
+    if not change_streams.acquire(current_app.config.get("MAX_CHANGE_STREAMS")):
+        response = jsonify({"error": "Too many open change streams"})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(CHANGE_STREAM_RETRY_AFTER)
+        return response
+    events = get_feed().subscribe(last_event_id, collections, filters=args)
+
+    def stream():
+        yield "retry: 3000\n\n"
+        for event in events:
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    response = current_app.response_class(stream(), mimetype="text/event-stream",
+                                          headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    response.call_on_close(change_streams.release)
+    return response
+
+
+
+@api.route('/metrics', methods=['GET'])
+def metrics():
+    """Firestore call counters and latency histograms in Prometheus text format.
+
+    Counters are per process; under gunicorn each worker reports its own.
+    """
+    import firestore_metrics
+    return current_app.response_class(firestore_metrics.prometheus_text(), mimetype="text/plain; version=0.0.4")
+
+
+@api.route('/shutdown', methods=['POST'])
+def shutdown():
+    """Stop the embedded server (used for clean exit on logout).
+
+    Only available for the loopback server the GUI runs in its own process
+    (EmbeddedServer with ``allow_shutdown``); standalone servers return 404.
+    """
+    server = current_app.config.get("EMBEDDED_SERVER")
+    if server is None:
+        return jsonify({"error": "Shutdown is only available for the embedded server"}), 404
+    threading.Thread(target=server.shutdown, daemon=True).start()
+    return jsonify({"message": "Server shutting down..."})
+
+
+def bulk_response(results):
+    failed = sum(1 for r in results if r["status"] == "error")
+    payload = {"succeeded": len(results) - failed, "failed": failed, "results": results}
+    return jsonify(payload), (207 if failed else 200)
+
+
+def json_field(key):
+    body = request.get_json(silent=True)
+    return body.get(key) if isinstance(body, dict) else None
+
+
+@api.route('/employees:batchCreate', methods=['POST'])
+def batch_create_employees():
+    """Create many employees: ``{"employees": [{...}, ...]}``.
+
+    Rows are validated like the admin form. Returns one result per row.
+    """
+    return bulk_response(create_employees(json_field("employees")))
+
+
+@api.route('/employees:batchUpdate', methods=['POST'])
+def batch_update_employees():
+    """Update many employees: ``{"employees": [{"id": "7", "Role": "Supervisor"}, ...]}``.
+
+    Only the fields given are validated and written; unknown IDs are reported
+    per row.
+    """
+    return bulk_response(update_employees(json_field("employees")))
+
+
+@api.route('/employees:batchDelete', methods=['POST'])
+def batch_delete_employees():
+    """Delete many employees: ``{"ids": ["7", "8", ...]}``."""
+    return bulk_response(delete_employees(json_field("ids")))
+
+
+def gzip_response(response):
+    """Compress large responses for clients that accept gzip."""
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200 or response.status_code >= 300
+            or "Content-Encoding" in response.headers
+            or "gzip" not in request.headers.get("Accept-Encoding", "").lower()):
+        return response
+    body = response.get_data()
+    if len(body) < GZIP_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=5))
+    response.headers["Content-Encoding"] = "gzip"
+    response.headers["Content-Length"] = str(len(response.get_data()))
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def create_app(config=None):
+    """Application factory for the employee API."""
+    app = Flask(__name__)
+    app.config.update(JSON_SORT_KEYS=False, EMBEDDED_SERVER=None, MAX_CHANGE_STREAMS=MAX_CHANGE_STREAMS)
+    if config:
+        app.config.update(config)
+    app.register_blueprint(api)
+    app.after_request(gzip_response)
+    return app
+
+
+# --- Embedded server (inside the GUI process) ---
+class EmbeddedServer:
+    """Threaded HTTP/1.1 (keep-alive) server for running the API inside the GUI process."""
+
+    def __init__(self, host="127.0.0.1", port=5000, allow_shutdown=False):
+        """``allow_shutdown`` enables ``POST /shutdown``; only for the GUI's own loopback server."""
+        self.app = create_app()
+        self.server = make_threaded_server(host, port, self.app)
+        if allow_shutdown:
+            self.app.config["EMBEDDED_SERVER"] = self
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="employee-api", daemon=True)
+        self.thread.start()
+        return self
+
+    def shutdown(self):
+        self.server.shutdown()
+
+
+def make_threaded_server(host, port, app):
+    """Werkzeug's threaded server speaking HTTP/1.1 (keep-alive)."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+    return make_server(host, port, app, threaded=True)
+
+
+def run_flask():
+    """Serve the API inside the current process (blocks until shutdown)."""
+    server = EmbeddedServer(allow_shutdown=True)
+    server.server.serve_forever()
+
+
+# --- Production serving ---
+def stream_limit(threads, max_streams=None):
+    """Streams a process may hold: ``max_streams`` if given, else half its threads."""
+    return max_streams or MAX_CHANGE_STREAMS or max(1, threads // 2)
+
+
+def serve_gunicorn(host, port, workers, threads, timeout, max_streams=None):
+    from gunicorn.app.base import BaseApplication
+
+    class StandaloneApplication(BaseApplication):
+        def load_config(self):
+            options = {
+                "bind": f"{host}:{port}",
+                "workers": workers,
+                "threads": threads,
+                "worker_class": "gthread",
+                "keepalive": 5,
+                "timeout": timeout,
+                "graceful_timeout": 30,
+                # Each worker creates its own Firestore client after fork
+                "preload_app": False,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return create_app({"MAX_CHANGE_STREAMS": stream_limit(threads, max_streams)})
+
+    StandaloneApplication().run()
+
+
+def serve_waitress(host, port, threads, max_streams=None):
+    from waitress import serve
+    serve(create_app({"MAX_CHANGE_STREAMS": stream_limit(threads, max_streams)}), host=host, port=port, threads=threads, channel_timeout=120)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the employee API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes (gunicorn)")
+    parser.add_argument("--threads", type=int, default=8, help="Threads per worker")
+    parser.add_argument("--timeout", type=int, default=60, help="Worker timeout in seconds (gunicorn)")
+    parser.add_argument("--max-streams", type=int, help="Open /changes streams per process (default: half of --threads)")
+    parser.add_argument("--server", choices=["auto", "gunicorn", "waitress", "werkzeug"], default="auto")
+    args = parser.parse_args(argv)
+
+    server = args.server
+    if server == "auto":
+        try:
+            import gunicorn  # noqa: F401
+            server = "gunicorn"
+        except ImportError:
+            server = "waitress"
+    if server == "gunicorn":
+        serve_gunicorn(args.host, args.port, args.workers, args.threads, args.timeout, args.max_streams)
+    elif server == "waitress":
+        serve_waitress(args.host, args.port, args.threads, args.max_streams)
+    else:
+        # No /shutdown here: this server may listen on other hosts than loopback
+        make_threaded_server(args.host, args.port, create_app()).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Async (ASGI) variant of the employee API.
+
+Serves ``/add_employee``, ``/get_employees`` and ``/delete_employee/<id>`` with
+the same request/response format as employee_api.py, on Starlette with the
+async Firestore client, so a worker is not tied up while Firestore answers:
+
+    python modules/employee_api_async.py --host 0.0.0.0 --port 5001 --workers 4
+
+or ``uvicorn employee_api_async:app --app-dir modules``. Both variants share
+the roster version doc and ID counter, so they can run side by side.
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import time
+
+from google.cloud.firestore import FieldFilter, Increment, async_transactional
+from starlette.applications import Starlette
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import firebase_app
+from employee_api_common import (
+    EMPLOYEE_FIELDS, GZIP_MIN_SIZE, ID_COUNTER_DOC, ROSTER_CACHE_MAX_AGE, ROSTER_CACHE_SIZE,
+    ROSTER_META_COLLECTION, ROSTER_META_DOC, ROSTER_VERSION_TTL,
+)
+from projections import ids_only, project
+from snapshot_store import utc_now_iso
+
+# --- Backpressure ---
+# At most FIRESTORE_CONCURRENCY Firestore calls are in flight per worker; up to
+# MAX_WAITING more requests queue for a slot and the rest get 503 + Retry-After
+# instead of piling up unbounded.
+FIRESTORE_CONCURRENCY = int(os.environ.get("EMS_FIRESTORE_CONCURRENCY", "64"))
+MAX_WAITING = int(os.environ.get("EMS_MAX_WAITING", "1000"))
+
+
+class Overloaded(Exception):
+    pass
+
+
+class Limiter:
+    def __init__(self, limit=FIRESTORE_CONCURRENCY, max_waiting=MAX_WAITING):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.max_waiting = max_waiting
+        self.waiting = 0
+
+    async def __aenter__(self):
+        if self.semaphore.locked() and self.waiting >= self.max_waiting:
+            raise Overloaded()
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+
+class AsyncRosterCache:
+    """Async counterpart of employee_api.RosterCache.
+
+    Concurrent requests that need the same lookup (a version check, or a cold
+    query for the same fields) share one in-flight Firestore call.
+    """
+
+    def __init__(self, client, limiter):
+        self.client = client
+        self.limiter = limiter
+        self.version = None
+        self.checked_at = 0.0
+        self.entries = {}
+        self.inflight = {}
+
+    def meta_ref(self):
+        return self.client.collection(ROSTER_META_COLLECTION).document(ROSTER_META_DOC)
+
+    async def shared(self, key, make_coro):
+        """Run ``make_coro()`` once for all concurrent callers with the same key."""
+        future = self.inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(make_coro())
+            self.inflight[key] = future
+            future.add_done_callback(lambda _: self.inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def current_version(self):
+        if self.version is not None and time.monotonic() - self.checked_at < ROSTER_VERSION_TTL:
+            return self.version
+        return await self.shared(("version",), self._read_version)
+
+    async def _read_version(self):
+        async with self.limiter:
+            snap = await self.meta_ref().get(field_paths=["version"])
+        version = (snap.to_dict() or {}).get("version", 0) if snap.exists else 0
+        if version != self.version:
+            self.entries.clear()
+        self.version, self.checked_at = version, time.monotonic()
+        return version
+
+    async def body(self, fields, since):
+        """Return ``(etag, body)`` for a /get_employees query."""
+        key = (tuple(fields), since)
+        version = await self.current_version()
+        entry = self.entries.get(key)
+        if entry and time.monotonic() - entry[2] < ROSTER_CACHE_MAX_AGE:
+            return entry[0], entry[1]
+        body = await self.shared(("query", version) + key, lambda: self._read_employees(fields, since))
+        etag = hashlib.sha1(body).hexdigest()
+        if self.version == version:
+            if len(self.entries) >= ROSTER_CACHE_SIZE:
+                self.entries.clear()
+            self.entries[key] = (etag, body, time.monotonic())
+        return etag, body
+
+    async def _read_employees(self, fields, since):
+        query = self.client.collection("employees")
+        if since:
+            query = query.where(filter=FieldFilter("last_updated", ">=", since))
+        if fields:
+            query = project(query, fields)
+        employees = []
+        async with self.limiter:
+            async for doc in query.stream():
+                data = doc.to_dict()
+                if fields and "id" in fields:
+                    data.setdefault("id", doc.id)
+                employees.append(data)
+        return json.dumps(employees, default=str, separators=(",", ":")).encode("utf-8")
+
+    def bump(self, batch):
+        batch.set(self.meta_ref(), {"version": Increment(1)}, merge=True)
+
+    def invalidate(self):
+        self.version = None
+        self.entries.clear()
+
+
+# --- ID allocation (same counter doc as employee_api.allocate_employee_ids) ---
+async def _scan_next_employee_id(client):
+    employee_ids = [int(doc.id) async for doc in ids_only(client.collection("employees")).stream() if doc.id.isdecimal()]
+    return max(employee_ids) + 1 if employee_ids else 1
+
+
+@async_transactional
+async def _reserve_ids(transaction, client, counter_ref, count):
+    snap = await counter_ref.get(transaction=transaction)
+    start = (snap.to_dict() or {}).get("next") if snap.exists else None
+    if start is None:
+        start = await _scan_next_employee_id(client)
+    transaction.set(counter_ref, {"next": start + count}, merge=True)
+    return start
+
+
+async def allocate_employee_ids(client, limiter, count):
+    counter_ref = client.collection(ROSTER_META_COLLECTION).document(ID_COUNTER_DOC)
+    async with limiter:
+        start = await _reserve_ids(client.transaction(), client, counter_ref, count)
+    return [str(start + i) for i in range(count)]
+
+
+# --- Routes ---
+async def add_employee(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not data:
+        return JSONResponse({"error": "No data received"}, status_code=400)
+    state = request.app.state
+    new_id = (await allocate_employee_ids(state.db, state.limiter, 1))[0]
+    data["id"] = new_id
+    data["last_updated"] = utc_now_iso()
+    batch = state.db.batch()
+    batch.set(state.db.collection("employees").document(new_id), data)
+    state.roster.bump(batch)
+    async with state.limiter:
+        await batch.commit()
+    state.roster.invalidate()
+    return JSONResponse({"message": "Employee added successfully!", "id": new_id})
+
+
+async def get_employees(request):
+    since = request.query_params.get("since", "")
+    fields = [f.strip() for f in request.query_params.get("fields", "").split(",") if f.strip()]
+    unknown = [f for f in fields if f not in EMPLOYEE_FIELDS]
+    if unknown:
+        return JSONResponse({"error": f"Unknown fields: {', '.join(unknown)}"}, status_code=400)
+
+    etag, body = await request.app.state.roster.body(fields, since)
+    quoted = f'"{etag}"'
+    headers = {"ETag": quoted, "Cache-Control": "no-cache"}
+    if quoted in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+async def delete_employee(request):
+    emp_id = request.path_params["emp_id"]
+    state = request.app.state
+    try:
+        batch = state.db.batch()
+        batch.delete(state.db.collection("employees").document(emp_id))
+        state.roster.bump(batch)
+        async with state.limiter:
+            await batch.commit()
+        state.roster.invalidate()
+        return JSONResponse({"message": f"Employee {emp_id} deleted"}, status_code=200)
+    except Overloaded:
+        raise
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+async def overloaded(request, exc):
+    return JSONResponse({"error": "Server busy, retry shortly"}, status_code=503, headers={"Retry-After": "1"})
+
+
+def create_app(concurrency=FIRESTORE_CONCURRENCY, max_waiting=MAX_WAITING):
+    """Application factory for the async employee API."""
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        app.state.db = firebase_app.get_async_db()
+        app.state.limiter = Limiter(concurrency, max_waiting)
+        app.state.roster = AsyncRosterCache(app.state.db, app.state.limiter)
+        yield
+
+    app = Starlette(
+        routes=[
+            Route("/add_employee", add_employee, methods=["POST"]),
+            Route("/get_employees", get_employees, methods=["GET"]),
+            Route("/delete_employee/{emp_id}", delete_employee, methods=["DELETE"]),
+        ],
+        exception_handlers={Overloaded: overloaded},
+        lifespan=lifespan,
+    )
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE)
+    return app
+
+
+app = create_app()
+
+
+def main(argv=None):
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Serve the async employee API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--concurrency", type=int, default=FIRESTORE_CONCURRENCY, help="In-flight Firestore calls per worker")
+    args = parser.parse_args(argv)
+    if args.workers > 1:
+        # uvicorn needs an import string to spawn workers; they read the limit from the environment
+        os.environ["EMS_FIRESTORE_CONCURRENCY"] = str(args.concurrency)
+        uvicorn.run("employee_api_async:app", host=args.host, port=args.port, workers=args.workers,
+                    timeout_keep_alive=5, timeout_graceful_shutdown=30)
+    else:
+        uvicorn.run(create_app(args.concurrency), host=args.host, port=args.port,
+                    timeout_keep_alive=5, timeout_graceful_shutdown=30)
+
+
+if __name__ == "__main__":
+    main()
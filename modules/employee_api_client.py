@@ -0,0 +1,398 @@
+"""Client for the employee API.
+
+Two transports share one interface:
+
+* ``LocalTransport`` calls employee_api's core operations directly when the API
+  lives in the same process (the admin GUI): no HTTP, no JSON round trip.
+* ``HttpTransport`` talks to a remote API host over a pooled keep-alive
+  session with timeouts and retries for idempotent requests.
+
+``get_client()`` picks HTTP when ``EMS_API_URL`` is set, in-process otherwise.
+Every method blocks; use ``submit`` (Tk-friendly callbacks) or ``run_async``
+(asyncio) from UI code. ``subscribe_changes`` follows the server's change feed;
+all subscriptions with the same filters share one connection (ChangeStream),
+so a GUI holds one /changes stream on the API host however many panels follow
+changes.
+"""
+import asyncio
+import functools
+import json
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+API_URL = os.environ.get("EMS_API_URL", "")
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 30
+RETRIES = 3
+POOL_SIZE = 8
+# The server sends a keep-alive at least every 15 s
+CHANGES_READ_TIMEOUT = 45
+
+# ``employees`` is None when ``not_modified`` (the caller's ETag still matches)
+RosterResult = namedtuple("RosterResult", ["employees", "etag", "not_modified"])
+BulkResult = namedtuple("BulkResult", ["succeeded", "failed", "results"])
+
+
+class ApiClientError(Exception):
+    """The API rejected a request or could not be reached."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+# --- Transports ---
+class LocalTransport:
+    """Calls the API's core operations in-process."""
+
+    @property
+    def api(self):
+        # Imported on first call; change-feed-only users never load Flask
+        import employee_api
+        return employee_api
+
+    def _call(self, fn, *args):
+        try:
+            return fn(*args)
+        except self.api.ApiError as e:
+            raise ApiClientError(str(e), e.status) from e
+
+    def add_employee(self, data):
+        return self._call(self.api.create_employee, data)
+
+    def get_employees(self, fields=None, since=None, etag=None):
+        new_etag, rows = self._call(self.api.list_employees, fields, since)
+        new_etag = f'"{new_etag}"'
+        if etag == new_etag:
+            return RosterResult(None, etag, True)
+        return RosterResult(rows, new_etag, False)
+
+    def delete_employee(self, emp_id):
+        self._call(self.api.remove_employee, str(emp_id))
+
+    def bulk(self, operation, rows):
+        fn = {"batchCreate": self.api.create_employees,
+              "batchUpdate": self.api.update_employees,
+              "batchDelete": self.api.delete_employees}[operation]
+        return self._call(fn, rows)
+
+    def changes(self, collections, filters, last_event_id, stop):
+        from change_feed import get_feed
+        yield None  # connected
+        yield from get_feed().subscribe(last_event_id, collections, filters, stop=stop)
+
+    def close(self):
+        pass
+
+
+class HttpTransport:
+    """Talks to a remote API over a pooled keep-alive session."""
+
+    def __init__(self, base_url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), retries=RETRIES, pool_size=POOL_SIZE):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        self.requests = requests
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        # POSTs are not retried: a retried add could create a duplicate employee
+        retry = Retry(total=retries, backoff_factor=0.3, status_forcelist=(502, 503, 504),
+                      allowed_methods=frozenset(["GET", "DELETE"]), respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(self, method, path, **kwargs):
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except self.requests.RequestException as e:
+            raise ApiClientError(f"API unreachable: {e}") from e
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("error", response.reason)
+            except ValueError:
+                message = response.reason
+            raise ApiClientError(message, response.status_code)
+        return response
+
+    def add_employee(self, data):
+        return self._request("POST", "/add_employee", json=data).json()["id"]
+
+    def get_employees(self, fields=None, since=None, etag=None):
+        params = {}
+        if fields:
+            params["fields"] = ",".join(fields)
+        if since:
+            params["since"] = since
+        headers = {"If-None-Match": etag} if etag else {}
+        response = self._request("GET", "/get_employees", params=params, headers=headers)
+        if response.status_code == 304:
+            return RosterResult(None, etag, True)
+        return RosterResult(response.json(), response.headers.get("ETag"), False)
+
+    def delete_employee(self, emp_id):
+        self._request("DELETE", f"/delete_employee/{emp_id}")
+
+    def bulk(self, operation, rows):
+        key = "ids" if operation == "batchDelete" else "employees"
+        return self._request("POST", f"/employees:{operation}", json={key: rows}).json()["results"]
+
+    def changes(self, collections, filters, last_event_id, stop):
+        """Read the /changes SSE stream; yields None on connect and on keep-alives.
+
+        The connection is closed as soon as ``stop`` is set; the caller sets it
+        once it is done with the stream.
+        """
+        params = dict(filters or {}, collections=",".join(collections))
+        headers = {"Accept": "text/event-stream"}
+        if last_event_id:
+            headers["Last-Event-ID"] = last_event_id
+        with self.session.get(self.base_url + "/changes", params=params, headers=headers, stream=True,
+                              timeout=(self.timeout[0], CHANGES_READ_TIMEOUT)) as response:
+            if response.status_code >= 400:
+                raise ApiClientError(f"Change feed refused: {response.reason}", response.status_code)
+            # Without this a hang-up waits for the next keep-alive (up to 15 s)
+            threading.Thread(target=lambda: (stop.wait(), response.close()), name="employee-api-changes-close",
+                             daemon=True).start()
+            yield None
+            data = []
+            for line in response.iter_lines(decode_unicode=True):
+                if stop.is_set():
+                    return
+                if not line:
+                    if data:
+                        yield json.loads("\n".join(data))
+                        data = []
+                elif line.startswith(":"):
+                    yield None
+                else:
+                    field, _, value = line.partition(":")
+                    if field == "data":
+                        data.append(value[1:] if value.startswith(" ") else value)
+
+    def close(self):
+        self.session.close()
+
+
+# --- Client ---
+class EmployeeApiClient:
+    def __init__(self, transport, max_workers=4):
+        self.transport = transport
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="employee-api-client")
+        self._streams = {}  # sorted filter items -> ChangeStream
+        self._streams_lock = threading.Lock()
+
+    def add_employee(self, data):
+        """Create an employee and return its new ID."""
+        return self.transport.add_employee(data)
+
+    def get_employees(self, fields=None, since=None, etag=None):
+        """Return a RosterResult; pass the last ETag to get ``not_modified`` instead of rows."""
+        return self.transport.get_employees(fields, since, etag)
+
+    def delete_employee(self, emp_id):
+        self.transport.delete_employee(emp_id)
+
+    def batch_create(self, rows):
+        return self._bulk("batchCreate", rows)
+
+    def batch_update(self, rows):
+        return self._bulk("batchUpdate", rows)
+
+    def batch_delete(self, ids):
+        return self._bulk("batchDelete", ids)
+
+    def _bulk(self, operation, rows):
+        results = self.transport.bulk(operation, rows)
+        failed = sum(1 for r in results if r["status"] == "error")
+        return BulkResult(len(results) - failed, failed, results)
+
+    # ------------------- Non-blocking variants -------------------
+    def submit(self, method, *args, widget=None, on_success=None, on_error=None, **kwargs):
+        """Run ``method(*args, **kwargs)`` (e.g. ``client.get_employees``) off the calling thread.
+
+        With ``widget`` the callbacks run on the Tk thread via ``widget.after``.
+        Returns the Future.
+        """
+        future = self._executor.submit(method, *args, **kwargs)
+
+        def done(f):
+            if f.cancelled():
+                return
+            error = f.exception()
+            if error is not None:
+                callback, value = on_error, error
+            else:
+                callback, value = on_success, f.result()
+            if callback is None:
+                if error is not None:
+                    print(f"Employee API call failed: {error}")
+                return
+            if widget is not None:
+                try:
+                    widget.after(0, lambda: callback(value))
+                except RuntimeError:
+                    pass  # Tk already destroyed
+            else:
+                callback(value)
+
+        future.add_done_callback(done)
+        return future
+
+    def subscribe_changes(self, collections, on_event, widget=None, filters=None):
+        """Deliver change events for ``collections`` to ``on_event`` until stopped.
+
+        ``filters`` (``{field: value}``) is applied on the server. With ``widget``
+        events are delivered on the Tk thread. Returns a ChangeSubscription.
+        """
+        filters = {str(k): str(v) for k, v in (filters or {}).items()}
+        key = tuple(sorted(filters.items()))
+        with self._streams_lock:
+            stream = self._streams.get(key)
+            if stream is None or stream.ended:
+                stream = self._streams[key] = ChangeStream(self.transport, filters, self._streams_lock)
+            subscription = ChangeSubscription(stream, collections, on_event, widget)
+            stream.add(subscription)
+        return subscription
+
+    async def run_async(self, method, *args, **kwargs):
+        """Await ``method(*args, **kwargs)`` on the client's thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.transport.close()
+
+
+class ChangeStream:
+    """One change-feed connection shared by the subscriptions with the same filters.
+
+    It follows the union of the collections they want and hands each event to
+    the ones that want its collection. A subscription that needs a collection
+    not followed yet makes it reconnect, resuming after the last event; it ends
+    when its last subscription stops. Runs on a daemon thread, reconnecting
+    with backoff after drops.
+    """
+
+    def __init__(self, transport, filters, lock):
+        self.transport = transport
+        self.filters = filters
+        self.collections = []
+        self.subscriptions = []
+        self.connected = False
+        self.last_event_id = None
+        self.ended = False
+        self._lock = lock  # the client's; it also guards the client's stream registry
+        self._hangup = threading.Event()  # ends the current connection
+        self._wake = threading.Event()  # ends a reconnect backoff
+        self._added = set()  # collections the next connection adds
+        self._thread = None
+
+    def add(self, subscription):
+        """Called with the lock held."""
+        self.subscriptions.append(subscription)
+        added = [c for c in subscription.collections if c not in self.collections]
+        self.collections += added
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="employee-api-changes", daemon=True)
+            self._thread.start()
+        elif added:
+            self._added.update(added)
+            self._hangup.set()
+            self._wake.set()
+
+    def remove(self, subscription):
+        with self._lock:
+            if subscription in self.subscriptions:
+                self.subscriptions.remove(subscription)
+            if self.subscriptions or self.ended:
+                return
+            self.ended = True
+            self._hangup.set()
+            self._wake.set()
+
+    def _run(self):
+        delay = 1
+        while not self.ended:
+            with self._lock:
+                collections, added = list(self.collections), self._added
+                self._hangup, self._added = threading.Event(), set()
+                hangup = self._hangup
+            try:
+                for event in self.transport.changes(collections, self.filters, self.last_event_id, hangup):
+                    self.connected, delay = True, 1
+                    if event is None:
+                        continue
+                    self.last_event_id = event["id"]
+                    self._dispatch(event, added)
+                    added = set()
+            except Exception as e:
+                if not hangup.is_set():
+                    print(f"Change feed disconnected: {e}")
+            finished = hangup.is_set()
+            hangup.set()  # lets the transport release the connection
+            self.connected = False
+            if not finished:
+                self._wake.wait(delay)
+                delay = min(delay * 2, 30)
+            self._wake.clear()
+
+    def _dispatch(self, event, added):
+        if event["type"] == "reset":
+            # A collection this connection just added is new to its subscribers,
+            # like a first subscribe; only the others may have missed changes
+            wanted = set(event.get("collections") or self.collections) - added
+        else:
+            wanted = {event["collection"]}
+        with self._lock:
+            subscriptions = [s for s in self.subscriptions if wanted.intersection(s.collections)]
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+
+class ChangeSubscription:
+    """One follower of a ChangeStream; ``stop()`` ends it."""
+
+    def __init__(self, stream, collections, on_event, widget=None):
+        self.stream = stream
+        self.collections = list(collections)
+        self.on_event = on_event
+        self.widget = widget
+        self._stopped = False
+
+    @property
+    def connected(self):
+        return self.stream.connected
+
+    def deliver(self, event):
+        if self._stopped:
+            return
+        if self.widget is None:
+            self.on_event(event)
+            return
+        try:
+            self.widget.after(0, lambda: self._stopped or self.on_event(event))
+        except RuntimeError:
+            self.stop()  # Tk is gone
+
+    def stop(self):
+        self._stopped = True
+        self.stream.remove(self)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client(base_url=None):
+    """Shared client: HTTP if ``base_url`` or ``EMS_API_URL`` is set, else in-process."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            url = base_url or API_URL
+            _client = EmployeeApiClient(HttpTransport(url) if url else LocalTransport())
+        return _client
@@ -0,0 +1,22 @@
+"""Settings shared by the Flask (employee_api) and ASGI (employee_api_async) servers.
+
+Kept free of Flask and the Firestore client so either server imports only
+what it runs on.
+"""
+EMPLOYEE_FIELDS = ["id", "Name", "Role", "Contact", "Gender", "Age", "Date of Birth", "Bank Name", "Account Number", "IFSC Code", "last_updated"]
+GZIP_MIN_SIZE = 1024
+ID_COUNTER_DOC = "employee_ids"
+
+# --- Roster version & response cache ---
+# Every write through the API bumps ``meta/employees.version`` in the same batch
+# as the employee write. Serialized /get_employees bodies are cached per query
+# under the version they were read at; a worker re-reads the version doc at most
+# every ROSTER_VERSION_TTL seconds, so repeat GETs cost no Firestore reads and a
+# matching If-None-Match gets a 304. ETags are hashes of the body, so they stay
+# strong across workers. Entries also expire after ROSTER_CACHE_MAX_AGE to pick
+# up edits made outside the API (e.g. in the Firebase console).
+ROSTER_META_COLLECTION = "meta"
+ROSTER_META_DOC = "employees"
+ROSTER_VERSION_TTL = 2.0
+ROSTER_CACHE_MAX_AGE = 300.0
+ROSTER_CACHE_SIZE = 64
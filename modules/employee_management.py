@@ -2,96 +2,83 @@ import sys
 import threading
 import subprocess
 import os
-import requests
-from flask import Flask, request, jsonify
-import firebase_admin
-from firebase_admin import credentials, firestore
-import ttkbootstrap as ttk
-from ttkbootstrap.constants import *
+from startup_timing import mark, stage, timed_import
+with stage("import ttkbootstrap"):
+    import ttkbootstrap as ttk
+    from ttkbootstrap.constants import *
 import tkinter as tk
 from tkinter import messagebox
-from tkcalendar import DateEntry
 import csv
-from reportlab.pdfgen import canvas
+import multiprocessing
 import datetime
-from manager_portal import show_attendance_ui
-from task import show_task_ui
-from salary import show_salary_ui
-from reports import show_reports_ui
-
-# --- Firebase Setup ---
-cred = credentials.Certificate("modules/serviceAccountKey.json")
-if not firebase_admin._apps:
-    firebase_admin.initialize_app(cred)
-db = firestore.client()
-
-# --- Flask App Setup ---
-app = Flask(__name__)
-
-@app.route('/add_employee', methods=['POST'])
-def add_employee():
-    data = request.json
-    if not data:
-        return jsonify({"error": "No data received"}), 400
-    new_id = get_next_employee_id()
-    data["id"] = new_id
-    db.collection("employees").document(new_id).set(data)
-    return jsonify({"message": "Employee added successfully!", "id": new_id})
-
-@app.route('/get_employees', methods=['GET'])
-def get_employees():
-    employees_ref = db.collection("employees").stream()
-    employees = [doc.to_dict() for doc in employees_ref]
-    return jsonify(employees)
-
-@app.route('/delete_employee/<emp_id>', methods=['DELETE'])
-def delete_employee(emp_id):
-    try:
-        db.collection("employees").document(emp_id).delete()
-        return jsonify({"message": f"Employee {emp_id} deleted"}), 200
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
-
-@app.route('/shutdown', methods=['POST'])
-def shutdown():
-    """Shutdown the Werkzeug development server (used for clean exit on logout)."""
-    func = request.environ.get('werkzeug.server.shutdown')
-    if func is None:
-        return jsonify({"error": "Not running with the Werkzeug Server"}), 500
-    func()
-    return jsonify({"message": "Server shutting down..."})
-
-def get_next_employee_id():
-    employees_ref = db.collection("employees").stream()
-    employee_ids = [int(doc.id) for doc in employees_ref if doc.id.isdigit()]
-    return str(max(employee_ids) + 1) if employee_ids else "1"
+import firebase_app
+from snapshot_store import get_store
+from employee_validation import validate_employee_data
+from panels import PanelManager
+from background import run_in_background
+from models import Employee
+import ui_profiler
+import employee_api_client
+
+# --- Lazily loaded modules ---
+# Panel modules, the PDF engine, the HTTP client and the Flask API are imported
+# on first use so the admin window can appear before any of them load.
+PANELS = {
+    "Dashboard": ("dashboard", "show_dashboard_ui"),
+    "Task": ("task", "show_task_ui"),
+    "Salary": ("salary", "show_salary_ui"),
+    "Attendance": ("manager_portal", "show_attendance_ui"),
+    "Reports": ("reports", "show_reports_ui"),
+    "Diagnostics": ("diagnostics", "show_diagnostics_ui"),
+}
+
+
+# Bank details are shown in the roster table but never written to the local
+# warm-start snapshot, which sits unencrypted on shared admin/kiosk machines.
+SNAPSHOT_EXCLUDED_FIELDS = {"Bank Name", "Account Number", "IFSC Code"}
+
+
+def snapshot_row(employee):
+    return {key: value for key, value in employee.to_dict(with_id=True).items() if key not in SNAPSHOT_EXCLUDED_FIELDS}
+
 
 def run_flask():
-    app.run(debug=False, port=5000, use_reloader=False)
+    timed_import("employee_api").run_flask()
 
 
 # --- Tkinter GUI with ttkbootstrap ---
 class EmployeeApp:
-    def __init__(self, root):
+    def __init__(self, root, on_logout=None):
+        """Build the admin UI inside ``root``.
+
+        When ``on_logout`` is given (single-process shell in main.py), logout only
+        tears down this view and calls it; otherwise logout exits the process.
+        """
         self.root = root
+        ui_profiler.install(root)
+        self.on_logout = on_logout
         self.root.title("Employee Management System")
         self.root.geometry("1200x700")
         self.fields = ["Name", "Role", "Contact", "Gender", "Age", "Date of Birth", "Bank Name", "Account Number", "IFSC Code"]
         self.entries = {}
+        self.all_employees = []
+        # Last full /get_employees body and its ETag, for conditional refreshes
+        self.roster_etag = None
+        self.roster_rows = []
+        self.changes = None
+
+        # Everything lives in one frame so the view can be removed in place
+        self.frame = ttk.Frame(root)
+        self.frame.pack(fill=BOTH, expand=True)
 
         # Sidebar with navigation
-        sidebar = ttk.Frame(root, padding=15)
+        sidebar = ttk.Frame(self.frame, padding=15)
         sidebar.pack(side=LEFT, fill=Y)
         ttk.Label(sidebar, text="Modules", font=("Segoe UI", 13, "bold")).pack(pady=(0, 15))
 
-        self.module_buttons = {
-            "Employee Management": self.show_employee_module,
-            "Task": lambda: self.load_module(show_task_ui),
-            "Salary": lambda: self.load_module(show_salary_ui),
-            "Attendance": lambda: self.load_module(show_attendance_ui),
-            "Reports": lambda: self.load_module(show_reports_ui),
-            }
+        self.module_buttons = {"Employee Management": self.show_employee_module}
+        for name, (module_name, function_name) in PANELS.items():
+            self.module_buttons[name] = lambda n=name, m=module_name, f=function_name: self.load_module(n, m, f)
 
 
         for name, command in self.module_buttons.items():
@@ -101,25 +88,30 @@ class EmployeeApp:
         ttk.Button(sidebar, text="Logout", width=22, bootstyle="danger-outline", command=self.logout).pack(side=BOTTOM, pady=10)
 
         # Container for dynamic modules
-        self.container = ttk.Frame(root, padding=(10, 15))
+        self.container = ttk.Frame(self.frame, padding=(10, 15))
         self.container.pack(side=RIGHT, fill=BOTH, expand=True)
+        # Panels are built once and kept while switching between modules
+        self.panels = PanelManager(self.container)
+        self.root.bind("<F5>", lambda e: self.panels.refresh())
 
         self.show_employee_module()
 
     # ------------------- Module Switchers -------------------
     def clear_container(self):
+        self.panels.clear()
         for widget in self.container.winfo_children():
             widget.destroy()
     
-    def load_module(self, module_function):
-        self.clear_container()  # clears old widgets from the right pane
-        module_function(self.container)  # loads the new module into the container
+    def load_module(self, name, module_name, function_name):
+        # Panel modules are imported on first use; ``show_*_ui`` returns the panel's refresh hook (or a (refresh, teardown) pair)
+        self.panels.show(name, lambda frame: getattr(timed_import(module_name), function_name)(frame))
 
 
     def show_employee_module(self):
-        self.clear_container()
+        self.panels.show("Employee Management", self.build_employee_panel)
 
-        form_frame = ttk.Labelframe(self.container, text="Employee Details", padding=(15, 10))
+    def build_employee_panel(self, parent):
+        form_frame = ttk.Labelframe(parent, text="Employee Details", padding=(15, 10))
         form_frame.pack(fill=X, pady=(0, 10))
 
         # Predefined roles
@@ -179,8 +171,9 @@ class EmployeeApp:
             form_frame.columnconfigure(c*2 + 1, weight=1)
             self.entries[field] = widget
 
-        btn_frame = ttk.Frame(self.container)
+        btn_frame = ttk.Frame(parent)
         btn_frame.pack(pady=(0, 15))
+        self.buttons = {}
         for text, cmd, style in [
             ("Add", self.add_employee, "success-outline"),
             ("Refresh", self.fetch_employees, "info-outline"),
@@ -188,23 +181,26 @@ class EmployeeApp:
             ("Export CSV", self.export_csv, "secondary-outline"),
             ("Export PDF", self.export_pdf, "warning-outline")
         ]:
-            ttk.Button(btn_frame, text=text, command=cmd, bootstyle=style, width=14).pack(side=LEFT, padx=7)
+            self.buttons[text] = ttk.Button(btn_frame, text=text, command=cmd, bootstyle=style, width=14)
+            self.buttons[text].pack(side=LEFT, padx=7)
 
-        search_frame = ttk.Frame(self.container)
+        search_frame = ttk.Frame(parent)
         search_frame.pack(fill=X, pady=(5, 10))
         ttk.Label(search_frame, text="Search:").pack(side=LEFT, padx=5)
         self.search_var = ttk.StringVar()
         self.search_var.trace_add("write", self.search_employees)
         ttk.Entry(search_frame, textvariable=self.search_var, width=30).pack(side=LEFT, padx=5)
 
-        self.tree = ttk.Treeview(self.container, columns=["ID"] + self.fields, show="headings", height=15)
+        self.tree = ttk.Treeview(parent, columns=["ID"] + self.fields, show="headings", height=15)
         for col in ["ID"] + self.fields:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=120, anchor=W)
         self.tree.pack(fill=BOTH, expand=True)
 
-        # Fetch employees after tree is created
-        self.fetch_employees()
+        # Show the last-known roster immediately, then reconcile in the background
+        self.warm_start()
+        # The change feed keeps the table current; a refresh is a conditional (ETag) reload
+        return self.fetch_employees
 
     def get_field_constraint_text(self, field):
         """Return constraint description for each field."""
@@ -327,12 +323,12 @@ class EmployeeApp:
         month = current_date.month
 
         # Floating overlay frame
-        overlay = ttk.Frame(self.root, relief="raised", borderwidth=1)
+        overlay = ttk.Frame(self.frame, relief="raised", borderwidth=1)
 
         # Position overlay just below the date_entry
         self.root.update_idletasks()
-        ex = date_entry.winfo_rootx() - self.root.winfo_rootx()
-        ey = date_entry.winfo_rooty() - self.root.winfo_rooty() + date_entry.winfo_height()
+        ex = date_entry.winfo_rootx() - self.frame.winfo_rootx()
+        ey = date_entry.winfo_rooty() - self.frame.winfo_rooty() + date_entry.winfo_height()
         overlay.place(x=ex, y=ey)
 
         # Close button
@@ -461,10 +457,9 @@ class EmployeeApp:
             messagebox.showerror("Validation Error", "Please fix the following:\n\n" + "\n".join(validation_errors))
             return
         
-        response = requests.post("http://127.0.0.1:5000/add_employee", json=data)
-        if response.status_code == 200:
+        def added(_new_id):
             messagebox.showinfo("Success", "Employee added successfully!")
-            self.fetch_employees()
+            self.refresh_after_write()
             # Clear form
             for field in self.fields:
                 if field == "Date of Birth":
@@ -472,100 +467,101 @@ class EmployeeApp:
                     self.entries[field].insert(0, datetime.date.today().strftime('%Y-%m-%d'))
                 else:
                     self.entries[field].delete(0, 'end') if hasattr(self.entries[field], 'delete') else None
-        else:
-            messagebox.showerror("Error", "Failed to add employee")
+
+        # Add stays disabled until the write is in, so a double-click cannot create two employees
+        run_in_background(self.root, self.api.add_employee, data, on_success=added, busy=[self.buttons["Add"]],
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to add employee\n{e}"))
 
     def validate_employee_data(self, data):
         """Validate all employee data fields. Returns list of error messages."""
-        errors = []
-        
-        # Name validation: 2-50 letters only
-        name = data.get("Name", "").strip()
-        if not name:
-            errors.append("• Name is required")
-        elif len(name) < 2 or len(name) > 50:
-            errors.append("• Name must be 2-50 characters")
-        elif not all(c.isalpha() or c.isspace() for c in name):
-            errors.append("• Name must contain only letters and spaces")
-        
-        # Contact validation: exactly 10 digits
-        contact = data.get("Contact", "").strip()
-        if not contact:
-            errors.append("• Contact is required")
-        elif len(contact) != 10 or not contact.isdigit():
-            errors.append("• Contact must be exactly 10 digits")
-        
-        # Gender validation
-        gender = data.get("Gender", "").strip()
-        if not gender:
-            errors.append("• Gender must be selected")
-        elif gender not in ["Male", "Female"]:
-            errors.append("• Gender must be Male or Female")
-        
-        # Age validation: 18-70
-        age = data.get("Age", "").strip()
-        if not age:
-            errors.append("• Age is required")
-        elif not age.isdigit():
-            errors.append("• Age must be a number")
-        else:
-            try:
-                age_int = int(age)
-                if age_int < 18 or age_int > 70:
-                    errors.append("• Age must be between 18 and 70")
-            except:
-                errors.append("• Age must be a valid number")
-        
-        # Date of Birth validation
-        dob = data.get("Date of Birth", "").strip()
-        if not dob:
-            errors.append("• Date of Birth is required")
-        else:
-            try:
-                dob_date = datetime.datetime.strptime(dob, "%Y-%m-%d").date()
-                today = datetime.date.today()
-                if dob_date >= today:
-                    errors.append("• Date of Birth must be in the past")
-            except:
-                errors.append("• Date of Birth must be in YYYY-MM-DD format")
-        
-        # Role validation
-        role = data.get("Role", "").strip()
-        if not role:
-            errors.append("• Role must be selected")
-        
-        # Bank Name validation
-        bank = data.get("Bank Name", "").strip()
-        if not bank:
-            errors.append("• Bank Name is required")
-        elif len(bank) > 100:
-            errors.append("• Bank Name must be 100 characters or less")
-        
-        # Account Number validation: digits only
-        account = data.get("Account Number", "").strip()
-        if not account:
-            errors.append("• Account Number is required")
-        elif not account.isdigit():
-            errors.append("• Account Number must contain only digits")
-        elif len(account) < 9 or len(account) > 20:
-            errors.append("• Account Number must be 9-20 digits")
-        
-        # IFSC Code validation: 11 characters, uppercase alphanumeric
-        ifsc = data.get("IFSC Code", "").strip().upper()
-        if not ifsc:
-            errors.append("• IFSC Code is required")
-        elif len(ifsc) != 11:
-            errors.append("• IFSC Code must be exactly 11 characters")
-        elif not all(c.isupper() or c.isdigit() for c in ifsc):
-            errors.append("• IFSC Code must contain only letters and digits")
-        
-        return errors
+        return validate_employee_data(data)
+
+    @property
+    def api(self):
+        # In-process unless EMS_API_URL points at a shared API host; created on
+        # first use so Flask is not imported before the window paints
+        return employee_api_client.get_client()
+
+    def roster_fields(self):
+        # Exactly the columns shown in the table, plus the delta-sync timestamp
+        return ["id"] + self.fields + ["last_updated"]
 
     def fetch_employees(self):
-        response = requests.get("http://127.0.0.1:5000/get_employees")
-        if response.status_code == 200:
-            self.all_employees = response.json()
+        """Reload the full roster and refresh the warm-start snapshot.
+
+        Sends the ETag of the last full body; a 304 means nothing changed and the
+        kept body is reused without re-downloading or re-parsing it.
+        """
+        def loaded(result):
+            if result.not_modified:
+                self.apply_roster(self.roster_rows, delta=False, persist=False)
+            else:
+                self.roster_etag, self.roster_rows = result.etag, result.employees
+                self.apply_roster(result.employees, delta=False)
+
+        self.api.submit(self.api.get_employees, self.roster_fields(), etag=self.roster_etag, widget=self.root,
+                        on_success=loaded, on_error=lambda e: print(f"Error fetching employees: {e}"))
+
+    def warm_start(self):
+        """Render the roster from the local snapshot, then load it in full in the background.
+
+        The snapshot leaves out the bank columns, so it only serves the first
+        paint; a delta on top of it would leave unchanged employees without
+        their bank details.
+        """
+        store = get_store()
+        cached = store.load("employees") if store else {}
+        if cached:
+            self.all_employees = sorted((Employee.from_dict(data, emp_id) for emp_id, data in cached.items()),
+                                        key=lambda e: str(e.id))
             self.display_employees(self.all_employees)
+            if any(SNAPSHOT_EXCLUDED_FIELDS & data.keys() for data in cached.values()):
+                # Written by an older version; drop the bank details right away
+                store.replace("employees", {str(emp.id): snapshot_row(emp) for emp in self.all_employees})
+        self.fetch_employees()
+        self.follow_changes()
+
+    # ------------------- Change feed -------------------
+    def follow_changes(self):
+        """Apply other users' roster changes as they happen via the API change feed."""
+        if self.changes is None:
+            self.changes = self.api.subscribe_changes(["employees"], self.on_employee_change, widget=self.root)
+
+    def refresh_after_write(self):
+        # The change feed delivers our own writes too; reload only without it
+        if self.changes is None or not self.changes.connected:
+            self.fetch_employees()
+
+    def on_employee_change(self, event):
+        if not self.frame.winfo_exists():
+            return
+        if event["type"] == "reset":
+            self.fetch_employees()
+        elif event["type"] == "removed":
+            emp_id = event["doc_id"]
+            self.all_employees = [e for e in self.all_employees if str(e.id) != emp_id]
+            store = get_store()
+            if store:
+                store.delete("employees", [emp_id])
+            self.search_employees()
+        else:
+            row = {field: event["data"].get(field, "") for field in self.roster_fields()}
+            row["id"] = row["id"] or event["doc_id"]
+            self.apply_roster([row], delta=True)
+
+    def apply_roster(self, rows, delta, persist=True):
+        """Merge (delta) or replace (full) the roster, persist it and redraw the table."""
+        changed = {str(row.get("id", "")): Employee.from_dict(row) for row in rows}
+        if delta:
+            merged = {str(emp.id): emp for emp in self.all_employees}
+            merged.update(changed)
+        else:
+            merged = changed
+        self.all_employees = sorted(merged.values(), key=lambda e: str(e.id))
+        store = get_store() if persist else None
+        if store:
+            (store.upsert if delta else store.replace)("employees", {emp_id: snapshot_row(emp) for emp_id, emp in changed.items()})
+        self.search_employees()
 
     def display_employees(self, data):
         self.tree.delete(*self.tree.get_children())
@@ -578,64 +574,80 @@ class EmployeeApp:
             messagebox.showwarning("Warning", "No employee selected")
             return
         emp_id = self.tree.item(selected[0])['values'][0]
-        response = requests.delete(f"http://127.0.0.1:5000/delete_employee/{emp_id}")
-        if response.status_code == 200:
+        def deleted(_):
             messagebox.showinfo("Deleted", f"Employee {emp_id} deleted")
-            self.fetch_employees()
-        else:
-            messagebox.showerror("Error", "Failed to delete employee")
+            self.refresh_after_write()
+
+        run_in_background(self.root, self.api.delete_employee, emp_id, on_success=deleted, busy=[self.buttons["Delete"]],
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to delete employee\n{e}"))
 
     def export_csv(self):
         with open("employees.csv", "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=["id"] + self.fields)
+            writer = csv.DictWriter(f, fieldnames=["id"] + self.fields, extrasaction="ignore")
             writer.writeheader()
-            writer.writerows(self.all_employees)
+            writer.writerows(emp.to_dict(with_id=True) for emp in self.all_employees)
         messagebox.showinfo("Exported", "Employee data exported to employees.csv")
 
     def export_pdf(self):
-        c = canvas.Canvas("employees.pdf")
-        c.setFont("Helvetica", 10)
-        c.drawString(30, 820, f"Employee Report - {datetime.date.today().strftime('%Y-%m-%d')}")
-        y = 800
-        for emp in self.all_employees:
-            line = f"ID: {emp.get('id')} | " + " | ".join(f"{f}: {emp.get(f, '')}" for f in self.fields)
-            c.drawString(30, y, line)
-            y -= 15
-            if y < 40:
-                c.showPage()
-                c.setFont("Helvetica", 10)
-                y = 800
-        c.save()
-        messagebox.showinfo("Exported", "Employee data exported to employees.pdf")
+        """Export the roster as a paginated table PDF on a background thread."""
+        records = list(self.all_employees)
+        title = f"Employee Report - {datetime.date.today().strftime('%Y-%m-%d')}"
+        columns = ["id"] + self.fields
+
+        def worker():
+            try:
+                from pdf_export import export_table
+                pages = export_table("employees.pdf", title, columns, records)
+                self.root.after(0, lambda: messagebox.showinfo("Exported", f"Employee data exported to employees.pdf ({pages} pages)"))
+            except Exception as e:
+                self.root.after(0, lambda err=e: messagebox.showerror("Error", f"Failed to export PDF: {err}"))
+
+        threading.Thread(target=worker, daemon=True).start()
 
     def search_employees(self, *_):
+        if getattr(self, "tree", None) is None or not self.tree.winfo_exists():
+            return  # panel evicted; the roster is redrawn when it is rebuilt
         query = self.search_var.get().lower()
         filtered = [emp for emp in self.all_employees if any(query in str(val).lower() for val in emp.values())]
         self.display_employees(filtered)
 
+    def close(self):
+        """Remove this view from the window, keeping the process and caches alive."""
+        if self.changes is not None:
+            self.changes.stop()
+            self.changes = None
+        self.root.unbind("<F5>")
+        # Runs the panels' teardown hooks (subscriptions, timers, in-flight loads)
+        self.panels.clear()
+        try:
+            self.frame.destroy()
+        except Exception:
+            pass
+
     def logout(self):
         """Logout: disconnect Firebase and close the app window.
 
-        Behavior:
+        In the single-process shell the view is closed in place and the shell
+        shows the login screen again; the Firestore client stays connected.
+
+        Standalone behavior:
         - Deletes any initialized firebase apps to disconnect from Firestore.
         - Closes the tkinter window (triggers clean exit via daemon threads).
         - Parent process (main.py) will handle relaunching the login window.
         """
+        if self.on_logout:
+            self.close()
+            self.on_logout()
+            return
+
         # 1) Disconnect Firebase apps
-        try:
-            if hasattr(firebase_admin, '_apps') and firebase_admin._apps:
-                for name, app_obj in list(firebase_admin._apps.items()):
-                    try:
-                        firebase_admin.delete_app(app_obj)
-                    except Exception:
-                        pass
-        except Exception:
-            pass
+        firebase_app.disconnect()
 
         # 2) Relaunch the main login window so user can sign in again
         # attempt to shut down local Flask server (if running) so port is freed
         try:
             try:
+                import requests
                 requests.post('http://127.0.0.1:5000/shutdown', timeout=2)
             except Exception:
                 pass
@@ -677,14 +689,20 @@ class EmployeeApp:
 
 # --- Run App ---
 def open_employee_app():
-    root = ttk.Window(themename="flatly")
-    app = EmployeeApp(root)
+    with stage("create window"):
+        root = ttk.Window(themename="flatly")
+    # Firebase/gRPC setup runs while the window builds and paints
+    firebase_app.init_in_background()
+    with stage("build EmployeeApp"):
+        app = EmployeeApp(root)
+    root.after_idle(lambda: mark("first paint"))
     try:
         root.protocol("WM_DELETE_WINDOW", app.logout)
     except Exception:
         pass
     root.mainloop()
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     # Start Flask API server only when running this module directly.
     flask_thread = threading.Thread(target=run_flask, daemon=True)
     flask_thread.start()
@@ -1,32 +1,320 @@
 import customtkinter as ctk
 from tkinter import messagebox
-import firebase_admin
-from firebase_admin import credentials, firestore
 import datetime
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from firebase_app import db
+from projections import get_fields, project
+from background import run_in_background
+import ui_profiler
+import attendance
+from models import Employee
+from snapshot_store import get_store
 
-# --- Initialize Firebase ---
-if not firebase_admin._apps:
-    cred = credentials.Certificate("modules/serviceAccountKey.json")
-    firebase_admin.initialize_app(cred)
-
-db = firestore.client()
+# --- Kiosk mode ---
+# For gates where badges are scanned back to back (keyboard-wedge readers type
+# the ID and Enter). The roster and today's check-ins are loaded once, so a scan
+# is answered from memory; accepted check-ins are queued and written to
+# Firestore in batches by a background thread.
+KIOSK_ROSTER_FIELDS = ["Name", "Role"]
+KIOSK_BATCH_SIZE = 100
+KIOSK_FLUSH_SECONDS = 1.0
+KIOSK_ROSTER_REFRESH_MS = 10 * 60 * 1000
+KIOSK_MESSAGE_MS = 2500
+KIOSK_OUTBOX = "kiosk_checkin"
 
 # --- Fetch Employee Details ---
 def get_employee_details_by_id(emp_id):
     try:
         emp_id_str = str(emp_id).strip()
         doc_ref = db.collection("employees").document(emp_id_str)
-        doc = doc_ref.get()
+        doc = get_fields(doc_ref, ["Name", "Role"])
         return doc.to_dict() if doc.exists else None
     except Exception as e:
         print(f"Error fetching employee details: {e}")
         return None
 
+def load_kiosk_roster():
+    """Return ``{employee_id: Employee}`` (name and role only) for every employee."""
+    docs = project(db.collection("employees"), KIOSK_ROSTER_FIELDS).stream()
+    return {doc.id: Employee.from_snapshot(doc) for doc in docs}
+
+def load_checked_in(day):
+    """Return the IDs of employees with attendance on ``day`` (YYYY-MM-DD)."""
+    from firebase_admin.firestore import FieldFilter
+    query = db.collection("attendance").where(filter=FieldFilter("date", "==", day))
+    return {doc.to_dict().get("employee_id") for doc in project(query, ["employee_id"]).stream()}
+
+class CheckinWriter:
+    """Writes queued attendance records in batches on a daemon thread.
+
+    Failed batches are kept and retried with backoff, so a network drop at the
+    gate loses no check-ins while the kiosk is running. With a snapshot
+    ``store`` each record is also kept in its outbox until Firestore has it,
+    and records left there by an earlier run (``replayed``) are sent first.
+    """
+
+    def __init__(self, batch_size=KIOSK_BATCH_SIZE, flush_seconds=KIOSK_FLUSH_SECONDS, store=None):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.store = store
+        self.queue = queue.Queue()
+        self.written = 0
+        self.failing = False
+        self.replayed = []
+        self._retry = []
+        self._sending = []
+        if store is not None:
+            for outbox_id, data in store.outbox_load(KIOSK_OUTBOX):
+                record = dict(data, timestamp=datetime.datetime.fromisoformat(data["timestamp"]))
+                self.replayed.append(record)
+                self.queue.put((outbox_id, record))
+        self._stop = threading.Event()
+        self._flushing = threading.Event()
+        self._wake = threading.Event()  # ends a retry backoff early
+        self._thread = threading.Thread(target=self._run, name="kiosk-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        return self.queue.qsize() + len(self._retry) + len(self._sending)
+
+    @property
+    def unsaved(self):
+        """Pending records that are not in the outbox either (lost if the process ends)."""
+        items = list(self.queue.queue) + list(self._retry) + list(self._sending)
+        return sum(1 for outbox_id, _ in items if outbox_id is None)
+
+    def put(self, record):
+        outbox_id = None
+        if self.store is not None:
+            try:
+                outbox_id = self.store.outbox_add(KIOSK_OUTBOX, dict(record, timestamp=record["timestamp"].isoformat()))
+            except sqlite3.Error as e:
+                print(f"Could not keep check-in locally: {e}")
+        self.queue.put((outbox_id, record))
+
+    def _take(self):
+        # Taken records stay counted in ``pending`` until they are written
+        records = self._sending = self._retry
+        self._retry = []
+        deadline = time.monotonic() + self.flush_seconds
+        while len(records) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                records.append(self.queue.get(timeout=max(timeout, 0)) if timeout > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def _write(self, items):
+        # Days already marked elsewhere (another kiosk, the portal, an earlier
+        # replay of the outbox) are skipped
+        attendance.create_records([record for _, record in items])
+        outbox_ids = [outbox_id for outbox_id, _ in items if outbox_id is not None]
+        if outbox_ids:
+            try:
+                self.store.outbox_remove(outbox_ids)
+            except sqlite3.Error as e:
+                print(f"Could not clear sent check-ins from the outbox: {e}")
+
+    def _run(self):
+        delay = 1
+        while not (self._stop.is_set() and self.pending == 0):
+            records = self._take()
+            if not records:
+                continue
+            try:
+                self._write(records)
+                self.written += len(records)
+                self.failing, delay = False, 1
+                self._sending = []
+            except Exception as e:
+                print(f"Error writing check-ins (will retry): {e}")
+                self._retry, self._sending = records, []
+                self.failing = True
+                if self._stop.is_set() or self._flushing.is_set():
+                    time.sleep(1)  # flushing or closing: keep retrying until the caller gives up
+                else:
+                    self._wake.wait(delay)
+                    self._wake.clear()
+                    delay = min(delay * 2, 30)
+
+    def flush(self, timeout=10):
+        """Send what is queued now, waiting up to ``timeout`` seconds; returns how many are still pending.
+
+        The writer keeps running either way.
+        """
+        deadline = time.monotonic() + timeout
+        self._flushing.set()
+        self._wake.set()
+        try:
+            while self.pending and time.monotonic() < deadline and self._thread.is_alive():
+                time.sleep(0.05)
+        finally:
+            self._flushing.clear()
+        return self.pending
+
+    def close(self, timeout=10):
+        """Flush what is queued (up to ``timeout`` seconds) and stop; returns how many are still pending.
+
+        If some are, the thread keeps retrying until the process ends.
+        """
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        return self.pending
+
+def kiosk_portal():
+    today = {"date": datetime.date.today().isoformat()}
+    roster = {}
+    checked_in = set()
+    writer = CheckinWriter(store=get_store())
+    # Check-ins from an earlier run still in the outbox count for today
+    checked_in.update(r["employee_id"] for r in writer.replayed if r["date"] == today["date"])
+    message_timer = {"id": None}
+
+    def show_message(text, color):
+        status_label.configure(text=text, text_color=color)
+        if message_timer["id"] is not None:
+            kiosk_root.after_cancel(message_timer["id"])
+        message_timer["id"] = kiosk_root.after(KIOSK_MESSAGE_MS, lambda: status_label.configure(text=""))
+
+    def roll_over_day():
+        # The kiosk may run past midnight: start a fresh check-in set
+        day = datetime.date.today().isoformat()
+        if day != today["date"]:
+            today["date"] = day
+            checked_in.clear()
+            load_data()
+
+    def on_scan(event=None):
+        emp_id = badge_entry.get().strip()
+        badge_entry.delete(0, "end")
+        badge_entry.focus_set()
+        if not emp_id or not roster:
+            return
+        roll_over_day()
+        if emp_id in checked_in:
+            name = roster.get(emp_id, {}).get("Name", emp_id)
+            show_message(f"{name} is already checked in today", "#e67e22")
+            return
+        employee = roster.get(emp_id)
+        if employee is None:
+            # Maybe hired after the roster was loaded
+            run_in_background(kiosk_root, get_employee_details_by_id, emp_id,
+                              on_success=lambda found: late_lookup(emp_id, found))
+            return
+        check_in(emp_id, employee)
+
+    def late_lookup(emp_id, employee):
+        if not employee:
+            show_message(f"Unknown badge '{emp_id}'", "#c0392b")
+            return
+        roster[emp_id] = employee
+        if emp_id not in checked_in:
+            check_in(emp_id, employee)
+
+    def check_in(emp_id, employee):
+        now = datetime.datetime.now()
+        checked_in.add(emp_id)
+        writer.put(attendance.attendance_record(emp_id, employee.get("Name", ""), now))
+        show_message(f"Welcome, {employee.get('Name', emp_id)}  ✓  {now.strftime('%H:%M')}", "#27ae60")
+
+    def load_data():
+        day = today["date"]
+
+        def loaded(result):
+            fresh_roster, fresh_checked_in = result
+            roster.clear()
+            roster.update(fresh_roster)
+            if day == today["date"]:
+                checked_in.update(fresh_checked_in)
+            badge_entry.configure(state="normal")
+            badge_entry.focus_set()
+            show_message(f"Ready — {len(roster)} employees", "#34495e")
+
+        def failed(e):
+            show_message(f"Could not load roster: {e}", "#c0392b")
+            kiosk_root.after(5000, load_data)
+
+        run_in_background(kiosk_root, lambda: (load_kiosk_roster(), load_checked_in(day)),
+                          on_success=loaded, on_error=failed)
+
+    def refresh_roster():
+        load_data()
+        kiosk_root.after(KIOSK_ROSTER_REFRESH_MS, refresh_roster)
+
+    def update_counters():
+        if writer.failing:
+            queue_label.configure(text=f"Offline — {writer.pending} check-in(s) waiting to sync", text_color="#c0392b")
+        else:
+            queue_label.configure(text=f"Today: {len(checked_in)}   Saved: {writer.written}   Pending: {writer.pending}",
+                                  text_color="#7f8c8d")
+        kiosk_root.after(500, update_counters)
+
+    def close():
+        queue_label.configure(text=f"Saving {writer.pending} check-in(s)...")
+        kiosk_root.update_idletasks()
+        # Only a flush: the kiosk may stay open, and its writer must keep sending
+        left = writer.flush()
+        if writer.unsaved:
+            if not messagebox.askyesno("Check-ins not saved",
+                                       f"{writer.unsaved} check-in(s) could not be sent to the server or saved on this "
+                                       f"machine and will be lost.\n\nClose the kiosk anyway?", icon="warning"):
+                return  # the writer keeps retrying
+        elif left:
+            messagebox.showwarning("Check-ins not sent yet",
+                                   f"{left} check-in(s) could not reach the server. They are saved on this machine "
+                                   f"and will be sent the next time the kiosk starts.")
+        writer.close(timeout=1)
+        kiosk_root.destroy()
+
+    ctk.set_appearance_mode("light")
+    ctk.set_default_color_theme("blue")
+
+    kiosk_root = ctk.CTk()
+    ui_profiler.install(kiosk_root)
+    kiosk_root.title("Attendance Kiosk")
+    kiosk_root.geometry(f"{kiosk_root.winfo_screenwidth()}x{kiosk_root.winfo_screenheight()}+0+0")
+    kiosk_root.configure(fg_color="#eef2f3")
+
+    container = ctk.CTkFrame(kiosk_root, corner_radius=15, fg_color="white", width=640, height=360)
+    container.place(relx=0.5, rely=0.5, anchor="center")
+
+    ctk.CTkLabel(container, text="Scan your badge", font=ctk.CTkFont(size=30, weight="bold"),
+                 text_color="#2c3e50").pack(padx=40, pady=(30, 15))
+    badge_entry = ctk.CTkEntry(container, placeholder_text="Employee ID", width=360, height=48,
+                               corner_radius=8, font=ctk.CTkFont(size=20))
+    badge_entry.pack(pady=10)
+    badge_entry.configure(state="disabled")
+    status_label = ctk.CTkLabel(container, text="Loading roster...", font=ctk.CTkFont(size=22, weight="bold"),
+                                text_color="#34495e")
+    status_label.pack(pady=15)
+    queue_label = ctk.CTkLabel(container, text="", font=ctk.CTkFont(size=13), text_color="#7f8c8d")
+    queue_label.pack(pady=(0, 25))
+
+    badge_entry.bind("<Return>", on_scan)
+    kiosk_root.bind("<Escape>", lambda e: close())
+    kiosk_root.protocol("WM_DELETE_WINDOW", close)
+
+    refresh_roster()
+    update_counters()
+    kiosk_root.mainloop()
+
 # --- Employee Portal ---
 def employee_portal():
     def mark_attendance(event=None):
+        if mark_btn.cget("state") == "disabled":
+            return  # Enter pressed while a lookup is still running
         emp_id = emp_id_entry.get().strip()
-        employee = get_employee_details_by_id(emp_id)
+        run_in_background(emp_root, get_employee_details_by_id, emp_id,
+                          on_success=lambda employee: confirm_attendance(emp_id, employee), busy=[mark_btn])
+
+    def confirm_attendance(emp_id, employee):
         if not employee:
             messagebox.showerror("Error", f"Employee ID '{emp_id}' not found.")
             return
@@ -38,21 +326,24 @@ def employee_portal():
 
         confirm = messagebox.askyesno("Confirm Attendance", f"Mark attendance for {employee.get('Name', 'N/A')}?")
         if confirm:
-            now = datetime.datetime.now()
-            db.collection("attendance").add({
-                "employee_id": emp_id,
-                "timestamp": now,
-                "status": "Present"
-            })
-            messagebox.showinfo("Success", "Attendance marked!")
-            emp_id_entry.delete(0, "end")
-            profile_label.configure(text="")
+            def marked(created):
+                if created:
+                    messagebox.showinfo("Success", "Attendance marked!")
+                else:
+                    messagebox.showinfo("Attendance", "Attendance already marked for today.")
+                emp_id_entry.delete(0, "end")
+                profile_label.configure(text="")
+
+            run_in_background(emp_root, attendance.mark_attendance, emp_id, employee.get("Name", ""),
+                              on_success=marked, busy=[mark_btn],
+                              on_error=lambda e: messagebox.showerror("Error", f"Failed to mark attendance: {e}"))
 
     # --- UI Setup ---
     ctk.set_appearance_mode("light")
     ctk.set_default_color_theme("blue")
 
     emp_root = ctk.CTk()
+    ui_profiler.install(emp_root)
     emp_root.title("Employee Attendance")
 
     # Fullscreen with title bar
@@ -90,13 +381,14 @@ def employee_portal():
     profile_label.pack(pady=5)
 
     # Mark Attendance Button
-    ctk.CTkButton(
+    mark_btn = ctk.CTkButton(
         container, text="Mark Attendance",
         width=200, height=40,
         corner_radius=8,
         font=ctk.CTkFont(size=16, weight="bold"),
         command=mark_attendance
-    ).pack(pady=20)
+    )
+    mark_btn.pack(pady=20)
 
     # Keyboard shortcuts
     emp_root.bind("<Return>", mark_attendance)
@@ -105,4 +397,7 @@ def employee_portal():
     emp_root.mainloop()
 
 if __name__ == '__main__':
-    employee_portal()
+    if "--kiosk" in sys.argv:
+        kiosk_portal()
+    else:
+        employee_portal()
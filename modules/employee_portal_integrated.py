@@ -2,40 +2,66 @@ import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 import tkinter as tk
 from tkinter import messagebox
-import threading
-import requests
-import firebase_admin
-from firebase_admin import credentials, firestore
-from firebase_admin.firestore import FieldFilter
+import firebase_app
+from firebase_app import db
 from datetime import datetime
 import os
 import subprocess
 import sys
-
-# --- Initialize Firebase ---
-cred = credentials.Certificate("modules/serviceAccountKey.json")
-if not firebase_admin._apps:
-    firebase_admin.initialize_app(cred)
-
-db = firestore.client()
+from projections import get_fields, project
+from task_summary import format_summary
+from task_store import TaskStore, TASK_FILTERS
+from snapshot_store import get_store, utc_now_iso
+import employee_api_client
+from background import run_in_background
+import ui_profiler
+import attendance
+import firestore_metrics
+from models import Task
 
 TASKS_COLLECTION = "tasks"
 EMPLOYEES_COLLECTION = "employees"
 
+# Fields read by the portal screens
+PROFILE_FIELDS = ["Name"]
+TASK_FIELDS = ["task", "priority", "deadline", "status", "last_updated"]
+
+
+def load_employee_tasks(employee_id, since=None):
+    """``{task_id: Task}`` for the employee's tasks, only those updated at or after ``since`` if given.
+
+    The ``since`` query filters on assign_to + last_updated and needs a composite index.
+    """
+    from firebase_admin.firestore import FieldFilter
+    query = db.collection(TASKS_COLLECTION).where(filter=FieldFilter("assign_to", "==", employee_id))
+    if since:
+        query = query.where(filter=FieldFilter("last_updated", ">=", since))
+    return {task.id: Task.from_snapshot(task) for task in project(query, TASK_FIELDS).stream()}
+
 
 class EmployeePortalIntegrated:
-    def __init__(self, root=None):
+    def __init__(self, root=None, on_logout=None):
         # Use ttkbootstrap window for uniform UI
         self.root = root or ttk.Window(themename="flatly")
+        ui_profiler.install(self.root)
+        self.on_logout = on_logout
         self.root.title("Employee Portal - Attendance & Tasks")
         self.root.geometry("1200x700")
 
         self.employee_id = None
         self.employee_name = None
         self.tasks = []
+        self.task_cache = TaskStore()
+        self._sync_running = False
+        self._full_sync_pending = False  # a full sync asked for while another was running
+        self.task_changes = None
+
+        # Everything lives in one frame so the view can be removed in place
+        self.frame = ttk.Frame(self.root)
+        self.frame.pack(fill=BOTH, expand=True)
 
         # Sidebar + container layout to match employee_management.py
-        self.sidebar = ttk.Frame(self.root, padding=12)
+        self.sidebar = ttk.Frame(self.frame, padding=12)
         self.sidebar.pack(side=LEFT, fill=Y)
 
         ttk.Label(self.sidebar, text="Employee Portal", font=("Segoe UI", 13, "bold")).pack(pady=(0, 12))
@@ -46,7 +72,7 @@ class EmployeePortalIntegrated:
         ttk.Button(self.sidebar, text="Logout", width=20, bootstyle="danger-outline", command=self.logout).pack(side=BOTTOM, pady=10)
 
         # Main container where panels will be loaded
-        self.container = ttk.Frame(self.root, padding=(10, 10))
+        self.container = ttk.Frame(self.frame, padding=(10, 10))
         self.container.pack(side=RIGHT, fill=BOTH, expand=True)
 
         # Prepare frames for animation-based switching
@@ -84,23 +110,18 @@ class EmployeePortalIntegrated:
         if not emp_id:
             messagebox.showerror("Error", "Please enter your Employee ID")
             return
-        # run Firestore lookup in background thread to avoid blocking UI
+        if self.login_btn.instate(['disabled']):
+            return  # Enter pressed while a lookup is still running
+        # run Firestore lookup in the background to avoid blocking UI
         self.login_status_label.config(text="Checking employee ID...")
-        self.login_btn.state(['disabled'])
-        threading.Thread(target=self._login_worker, args=(emp_id,), daemon=True).start()
+        run_in_background(self.root, self._lookup_employee, emp_id, busy=[self.login_btn],
+                          on_success=lambda doc: self._finish_login(emp_id, doc, None),
+                          on_error=lambda e: self._finish_login(emp_id, None, str(e)))
 
-    def _login_worker(self, emp_id):
-        error = None
-        doc = None
-        try:
-            doc = db.collection(EMPLOYEES_COLLECTION).document(emp_id).get()
-        except Exception as e:
-            error = str(e)
-        # schedule finish on main thread
-        self.root.after(0, lambda: self._finish_login(emp_id, doc, error))
+    def _lookup_employee(self, emp_id):
+        return get_fields(db.collection(EMPLOYEES_COLLECTION).document(emp_id), PROFILE_FIELDS)
 
     def _finish_login(self, emp_id, doc, error):
-        self.login_btn.state(['!disabled'])
         if error:
             self.login_status_label.config(text=f"Error: {error}")
             messagebox.showerror("Error", f"Failed to check employee ID:\n{error}")
@@ -121,8 +142,15 @@ class EmployeePortalIntegrated:
             self.tasks_frame = ttk.Frame(self.container)
         if not getattr(self.tasks_frame, 'winfo_ismapped', lambda: False)():
             self.create_tasks_tab(self.tasks_frame)
-        # load tasks synchronously so they're ready instantly
-        self.load_tasks()
+        # render last-known tasks from the warm-start snapshot, then sync in the background
+        store = get_store()
+        cached = store.load(self.task_scope()) if store else {}
+        self.task_cache = TaskStore(Task.from_dict(data, task_id) for task_id, data in cached.items())
+        self.render_tasks()
+        self.sync_tasks()
+        # other users' task changes arrive over the change feed
+        self.task_changes = employee_api_client.get_client().subscribe_changes(
+            ["tasks"], self.on_task_change, widget=self.root, filters={"assign_to": emp_id})
         # show attendance module by default (tasks are pre-cached)
         self.show_attendance_module()
         # start auto-refresh timer for tasks
@@ -196,7 +224,8 @@ class EmployeePortalIntegrated:
         left_ctrl.pack(side=LEFT, fill=Y, padx=(0, 8))
 
         ttk.Label(left_ctrl, text="Attendance", font=("Segoe UI", 12, "bold")).pack(pady=(10, 6))
-        ttk.Button(left_ctrl, text="Mark Attendance", bootstyle="success-outline", command=self.mark_attendance).pack(fill=X, pady=6, padx=6)
+        self.mark_attendance_btn = ttk.Button(left_ctrl, text="Mark Attendance", bootstyle="success-outline", command=self.mark_attendance)
+        self.mark_attendance_btn.pack(fill=X, pady=6, padx=6)
         ttk.Label(left_ctrl, text="", font=("Segoe UI", 10)).pack(pady=10)
         ttk.Button(left_ctrl, text="Refresh", bootstyle="info-outline", command=lambda: None).pack(fill=X, pady=6, padx=6)
 
@@ -215,42 +244,28 @@ class EmployeePortalIntegrated:
         self.attendance_status_label.pack(pady=8)
 
     def mark_attendance(self):
-        try:
-            # Check if attendance already marked for today
-            today_date = datetime.now().strftime("%Y-%m-%d")
-            
-            existing = db.collection("attendance").where(
-                filter=FieldFilter("employee_id", "==", self.employee_id)
-            ).where(
-                filter=FieldFilter("date", "==", today_date)
-            ).stream()
-            
-            existing_list = list(existing)
-            if existing_list:
+        label = self.attendance_status_label
+
+        def marked(created):
+            if not created:
                 messagebox.showinfo(
                     "Attendance",
                     "Attendance already marked"
                 )
-                self.attendance_status_label.configure(text="⚠ Attendance already marked for today!")
+                label.configure(text="⚠ Attendance already marked for today!")
                 return
-            
-            confirm = messagebox.askyesno(
-                "Confirm Attendance",
-                f"Mark attendance for {self.employee_name}?"
-            )
-            if confirm:
-                now = datetime.now()
-                db.collection("attendance").add({
-                    "employee_id": self.employee_id,
-                    "employee_name": self.employee_name,
-                    "timestamp": now,
-                    "date": now.strftime("%Y-%m-%d"),
-                    "status": "Present"
-                })
-                self.attendance_status_label.configure(text="✓ Attendance marked successfully!")
-                messagebox.showinfo("Success", "Attendance marked successfully!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to mark attendance: {str(e)}")
+            label.configure(text="✓ Attendance marked successfully!")
+            messagebox.showinfo("Success", "Attendance marked successfully!")
+
+        confirm = messagebox.askyesno(
+            "Confirm Attendance",
+            f"Mark attendance for {self.employee_name}?"
+        )
+        if confirm:
+            # One create() keyed by employee and day; it fails if the day is already marked
+            run_in_background(label, attendance.mark_attendance, self.employee_id, self.employee_name,
+                              on_success=marked, busy=[self.mark_attendance_btn], status=(label, "Saving..."),
+                              on_error=lambda e: messagebox.showerror("Error", f"Failed to mark attendance: {str(e)}"))
 
     def create_tasks_tab(self, parent):
         for w in parent.winfo_children():
@@ -266,13 +281,14 @@ class EmployeePortalIntegrated:
         left_ctrl.pack(side=LEFT, fill=Y, padx=(0, 8))
 
         ttk.Label(left_ctrl, text="Tasks", font=("Segoe UI", 12, "bold")).pack(pady=(10, 6))
-        self.filter_status = ttk.Combobox(left_ctrl, values=["All", "Pending", "In Progress", "Completed", "Incomplete"], state="readonly")
+        self.filter_status = ttk.Combobox(left_ctrl, values=TASK_FILTERS, state="readonly")
         self.filter_status.set("All")
         self.filter_status.pack(fill=X, padx=6, pady=6)
-        ttk.Button(left_ctrl, text="Apply Filter", bootstyle="info", command=self.load_tasks).pack(fill=X, padx=6, pady=6)
+        ttk.Button(left_ctrl, text="Apply Filter", bootstyle="info", command=self.render_tasks).pack(fill=X, padx=6, pady=6)
 
         ttk.Button(left_ctrl, text="Update Task", bootstyle="primary", command=self.update_selected_task).pack(fill=X, padx=6, pady=(20,6))
-        ttk.Button(left_ctrl, text="Refresh", bootstyle="secondary", command=self.load_tasks).pack(fill=X, padx=6, pady=6)
+        self.refresh_btn = ttk.Button(left_ctrl, text="Refresh", bootstyle="secondary", command=self.load_tasks)
+        self.refresh_btn.pack(fill=X, padx=6, pady=6)
 
         # Right: table + summary
         right = ttk.Frame(body)
@@ -289,41 +305,87 @@ class EmployeePortalIntegrated:
         self.tree.pack(fill=BOTH, expand=True, padx=6, pady=6)
         self.tree.bind('<Double-1>', lambda e: self.open_update_window_from_tree())
 
+    def task_scope(self):
+        return f"tasks:{self.employee_id}"
+
     def load_tasks(self):
-        # populate ttk.Treeview
+        """Reload all of this employee's tasks from Firestore (in the background)."""
+        self.sync_tasks(full=True)
+
+    def sync_tasks(self, full=False):
+        """Fetch task changes in the background and merge them into the task cache.
+
+        Unless ``full`` is set and once a snapshot exists, only tasks whose
+        ``last_updated`` is past the snapshot's high-water mark are read. A full
+        sync asked for while another sync runs starts when that one finishes.
+        """
+        if self._sync_running:
+            self._full_sync_pending = self._full_sync_pending or full
+            return
+        store = get_store()
+        since = None if full or store is None or not self.task_cache else store.delta_since(self.task_scope())
+        employee_id, delta = self.employee_id, since is not None
+        self._sync_running = True
+        run_in_background(self.root, load_employee_tasks, employee_id, since, busy=[self.refresh_btn],
+                          on_success=lambda changed: self._finish_sync(employee_id, changed, delta, None, full),
+                          on_error=lambda e: self._finish_sync(employee_id, {}, delta, str(e), full))
+
+    def _finish_sync(self, employee_id, changed, delta, error, full):
+        self._sync_running = False
+        pending, self._full_sync_pending = self._full_sync_pending, False
+        if employee_id != self.employee_id or not self.frame.winfo_exists():
+            return
+        if error:
+            self.summary_label.config(text=f"Failed to load tasks: {error}")
+            if full:
+                messagebox.showerror("Error", f"Failed to load tasks: {error}")
+        else:
+            self.apply_task_changes(changed, delta)
+        if pending:
+            self.sync_tasks(full=True)
+
+    def apply_task_changes(self, changed, delta=True):
+        """Merge (delta) or replace (full) cached tasks, persist them and redraw."""
+        if delta and all(self.task_cache.get(tid) == data for tid, data in changed.items()):
+            return
+        if delta:
+            self.task_cache.update(changed)
+        else:
+            self.task_cache.replace(changed)
+        store = get_store()
+        if store:
+            (store.upsert if delta else store.replace)(self.task_scope(), changed)
+        self.render_tasks()
+
+    def on_task_change(self, event):
+        if self.employee_id is None or not self.frame.winfo_exists():
+            return
+        if event["type"] == "reset":
+            self.sync_tasks(full=True)
+        elif event["type"] == "removed":
+            task_id = event["doc_id"]
+            if self.task_cache.pop(task_id, None) is not None:
+                store = get_store()
+                if store:
+                    store.delete(self.task_scope(), [task_id])
+                self.render_tasks()
+        else:
+            data = {field: event["data"].get(field) for field in TASK_FIELDS if field in event["data"]}
+            self.apply_task_changes({event["doc_id"]: Task.from_dict(data, event["doc_id"])})
+
+    def render_tasks(self):
+        """Populate the tree from the task cache, applying the filter locally."""
         for i in self.tree.get_children():
             self.tree.delete(i)
 
-        selected_status = self.filter_status.get()
-        self.tasks = []
+        self.tasks = sorted(self.task_cache.rows(self.task_cache.filter_mask(self.filter_status.get())), key=lambda row: row[0])
+        for task_id, task_data in self.tasks:
+            self.tree.insert("", "end", iid=task_id, values=(task_data.get("task", ""), task_data.get("priority", ""), task_data.get("deadline", ""), task_data.get("status", "")))
 
-        try:
-            tasks_ref = db.collection(TASKS_COLLECTION).where("assign_to", "==", self.employee_id).stream()
-            completed = pending = in_progress = incomplete = 0
-            task_count = 0
-            for task in tasks_ref:
-                task_data = task.to_dict()
-                task_id = task.id
-                status = task_data.get("status", "")
-                if selected_status != "All" and status != selected_status:
-                    continue
-                if status == "Completed":
-                    completed += 1
-                elif status == "Pending":
-                    pending += 1
-                elif status == "In Progress":
-                    in_progress += 1
-                elif status == "Incomplete":
-                    incomplete += 1
-
-                self.tasks.append((task_id, task_data))
-                self.tree.insert("", "end", iid=task_id, values=(task_data.get("task", ""), task_data.get("priority", ""), task_data.get("deadline", ""), status))
-                task_count += 1
-
-            summary_text = f"Total: {task_count} | Pending: {pending} | In Progress: {in_progress} | Completed: {completed} | Incomplete: {incomplete}"
-            self.summary_label.config(text=summary_text)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load tasks: {str(e)}")
+        # The cache holds every task of this employee, so the summary is exact under any filter
+        counts = self.task_cache.status_counts()
+        overdue = int(self.task_cache.mask(overdue=True).sum())
+        self.summary_label.config(text=f"{format_summary(counts)} | Overdue: {overdue}")
 
     def open_update_window(self, task_id, task_data):
         update_window = tk.Toplevel(self.root)
@@ -357,23 +419,29 @@ class EmployeePortalIntegrated:
         def update_task():
             new_status = status_cb.get()
             remark = remarks.get("1.0", "end").strip()
-            try:
-                db.collection(TASKS_COLLECTION).document(task_id).update({
-                    "status": new_status,
-                    "last_updated": datetime.utcnow().isoformat(),
-                    "last_remark": remark
-                })
+            changes = {
+                "status": new_status,
+                "last_updated": utc_now_iso(),
+                "last_remark": remark
+            }
+
+            def updated(_):
                 status_msg.config(text="✓ Updated successfully")
                 # Update tree immediately
                 if task_id in [iid for iid, _ in self.tasks]:
                     self.tree.item(task_id, values=(task_data.get("task", ""), task_data.get("priority", ""), task_data.get("deadline", ""), new_status))
                 messagebox.showinfo("Success", "Task updated successfully!")
                 update_window.destroy()
-                self.load_tasks()
-            except Exception as e:
+                self.apply_task_changes({task_id: task_data.replace(**{k: v for k, v in changes.items() if k in TASK_FIELDS})})
+
+            def failed(e):
                 status_msg.config(text="✗ Failed")
                 messagebox.showerror("Error", f"Failed to update task: {str(e)}")
 
+            run_in_background(update_window, db.collection(TASKS_COLLECTION).document(task_id).update, changes,
+                              on_success=updated, on_error=failed, busy=[confirm_btn, cancel_btn],
+                              status=(status_msg, "Saving..."))
+
         # Confirm Update button at bottom right
         confirm_btn = ttk.Button(action_frame, text="Confirm Update", bootstyle="success", command=update_task)
         confirm_btn.pack(side=RIGHT)
@@ -420,14 +488,42 @@ class EmployeePortalIntegrated:
         self.animate_switch(getattr(self, 'current_frame', None), self.tasks_frame)
         self.current_frame = self.tasks_frame
 
+    def close(self):
+        """Remove this view from the window: stop timers, drop key bindings and widgets."""
+        if self.task_changes is not None:
+            self.task_changes.stop()
+            self.task_changes = None
+        try:
+            if hasattr(self, 'refresh_timer'):
+                self.root.after_cancel(self.refresh_timer)
+        except Exception:
+            pass
+        for sequence in ('<Return>', '<Escape>'):
+            try:
+                self.root.unbind(sequence)
+            except Exception:
+                pass
+        try:
+            self.frame.destroy()
+        except Exception:
+            pass
+
     def logout(self):
         """Logout: disconnect Firebase and close the app window.
 
-        Behavior:
+        In the single-process shell the view is closed in place and the shell
+        shows the login screen again; the Firestore client stays connected.
+
+        Standalone behavior:
         - Cancels auto-refresh timer
         - Deletes any initialized firebase apps to disconnect from Firestore.
         - Closes the tkinter window (triggers clean exit via daemon threads).
         """
+        if self.on_logout:
+            self.close()
+            self.on_logout()
+            return
+
         # Cancel auto-refresh timer
         try:
             if hasattr(self, 'refresh_timer'):
@@ -439,20 +535,13 @@ class EmployeePortalIntegrated:
             pass
 
         # Disconnect Firebase apps
-        try:
-            if hasattr(firebase_admin, '_apps') and firebase_admin._apps:
-                for name, app_obj in list(firebase_admin._apps.items()):
-                    try:
-                        firebase_admin.delete_app(app_obj)
-                    except Exception:
-                        pass
-        except Exception:
-            pass
+        firebase_app.disconnect()
 
         # Close the GUI window
         # Attempt to shut down Flask server (if running) to free port
         try:
             try:
+                import requests
                 requests.post('http://127.0.0.1:5000/shutdown', timeout=2)
             except Exception:
                 pass
@@ -493,15 +582,18 @@ class EmployeePortalIntegrated:
             sys.exit(0)
 
     def _schedule_auto_refresh(self):
-        """Schedule periodic task refresh every 15 seconds."""
+        """Poll for task changes every 15 seconds while the change feed is down."""
+        if not self.frame.winfo_exists():
+            return
         try:
             # only refresh if on tasks tab and tree exists
-            if hasattr(self, 'tree') and getattr(self, 'current_frame', None) == self.tasks_frame:
-                self.load_tasks()
+            feed_live = self.task_changes is not None and self.task_changes.connected
+            if not feed_live and hasattr(self, 'tree') and getattr(self, 'current_frame', None) == self.tasks_frame:
+                with firestore_metrics.action("auto_refresh"):
+                    self.sync_tasks()
         except Exception:
             pass
-        # reschedule in 15 seconds (1000 ms)
-        self.refresh_timer = self.root.after(1000, self._schedule_auto_refresh)
+        self.refresh_timer = self.root.after(15000, self._schedule_auto_refresh)
 
     def _load_tasks_on_login(self):
         """Load employee tasks immediately after login (called from main thread)."""
@@ -518,6 +610,7 @@ class EmployeePortalIntegrated:
 
 
 if __name__ == "__main__":
+    firebase_app.init_in_background()
     app = EmployeePortalIntegrated()
     try:
         app.root.protocol("WM_DELETE_WINDOW", app.logout)
@@ -1,30 +1,36 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_app import db
 from datetime import datetime
-
-# Firebase initialization
-try:
-    firebase_admin.get_app()
-except ValueError:
-    cred = credentials.Certificate("modules/serviceAccountKey.json")
-    firebase_admin.initialize_app(cred)
-db = firestore.client()
+from projections import get_fields, project
+from task_summary import format_summary
+from task_store import TaskStore, TASK_FILTERS
+import employee_api_client
+from background import run_in_background
+import ui_profiler
+from models import Task
 
 TASKS_COLLECTION = "tasks"
 EMPLOYEES_COLLECTION = "employees"
 
+# Fields read by the portal screens
+TASK_FIELDS = ["task", "priority", "deadline", "status"]
+
 
 class EmployeeTaskPortal:
     def __init__(self, root):
         self.root = root
+        ui_profiler.install(root)
         self.root.title("Employee Task Portal")
         self.root.state("zoomed")  # Fullscreen with title bar
         self.root.configure(bg="#f4f6f8")
 
         self.employee_id = None
         self.tasks = []
+        self.task_store = TaskStore()
+        self.task_changes = None
+        self._render_pending = None
+        self._loading = None
 
         self.create_login_ui()
 
@@ -54,7 +60,7 @@ class EmployeeTaskPortal:
         )
         self.employee_id_entry.grid(row=0, column=1, padx=10, pady=10)
 
-        login_btn = tk.Button(
+        self.login_btn = tk.Button(
             self.login_frame,
             text="Login",
             font=("Arial", 14, "bold"),
@@ -64,7 +70,7 @@ class EmployeeTaskPortal:
             pady=5,
             command=self.login,
         )
-        login_btn.pack(pady=10)
+        self.login_btn.pack(pady=10)
 
     def login(self):
         emp_id = self.employee_id_entry.get().strip()
@@ -72,14 +78,18 @@ class EmployeeTaskPortal:
             messagebox.showerror("Error", "Please enter your Employee ID")
             return
 
-        doc = db.collection(EMPLOYEES_COLLECTION).document(emp_id).get()
-        if not doc.exists:
-            messagebox.showerror("Error", "Employee ID not found")
-            return
+        def found(exists):
+            if not exists:
+                messagebox.showerror("Error", "Employee ID not found")
+                return
 
-        self.employee_id = emp_id
-        self.login_frame.destroy()
-        self.create_dashboard_ui()
+            self.employee_id = emp_id
+            self.login_frame.destroy()
+            self.create_dashboard_ui()
+
+        run_in_background(
+            self.login_frame, lambda: get_fields(db.collection(EMPLOYEES_COLLECTION).document(emp_id), ["Name"]).exists,
+            on_success=found, busy=[self.login_btn])
 
     # ---------------- DASHBOARD ----------------
     def create_dashboard_ui(self):
@@ -105,7 +115,7 @@ class EmployeeTaskPortal:
 
         self.filter_status = ttk.Combobox(
             sidebar,
-            values=["All", "Pending", "In Progress", "Completed", "Incomplete"],
+            values=TASK_FILTERS,
             state="readonly",
         )
         self.filter_status.set("All")
@@ -114,7 +124,7 @@ class EmployeeTaskPortal:
         tk.Button(
             sidebar,
             text="Apply Filter",
-            command=self.load_tasks,
+            command=self.render_tasks,
             bg="#1abc9c",
             fg="white",
             font=("Arial", 12, "bold"),
@@ -152,34 +162,44 @@ class EmployeeTaskPortal:
         self.tree.bind("<Double-1>", self.open_update_window)
 
         self.load_tasks()
+        # Reload when this employee's tasks change elsewhere
+        self.task_changes = employee_api_client.get_client().subscribe_changes(
+            ["tasks"], self.on_task_change, widget=self.root, filters={"assign_to": self.employee_id})
 
-    def load_tasks(self):
-        selected_status = self.filter_status.get()
-        self.tree.delete(*self.tree.get_children())
-        self.tasks = []
-
-        tasks_ref = db.collection(TASKS_COLLECTION).where(
-            "assign_to", "==", self.employee_id
-        ).stream()
-        completed, pending, in_progress, incomplete = 0, 0, 0, 0
-
-        for task in tasks_ref:
-            task_data = task.to_dict()
-            task_id = task.id
-            status = task_data.get("status", "")
-
-            if selected_status != "All" and status != selected_status:
-                continue
+    def on_task_change(self, event):
+        if not self.task_store.apply_event(event, TASK_FIELDS):
+            self.load_tasks()
+        # Coalesce bursts of changes into one redraw
+        elif self._render_pending is None:
+            self._render_pending = self.root.after(300, self.render_tasks)
 
-            if status == "Completed":
-                completed += 1
-            elif status == "Pending":
-                pending += 1
-            elif status == "In Progress":
-                in_progress += 1
-            elif status == "Incomplete":
-                incomplete += 1
+    def load_tasks(self):
+        """Load all of this employee's tasks; filtering and counts are done locally."""
+        employee_id = self.employee_id
 
+        def fetch():
+            from firebase_admin.firestore import FieldFilter
+            query = db.collection(TASKS_COLLECTION).where(
+                filter=FieldFilter("assign_to", "==", employee_id)
+            )
+            return TaskStore(Task.from_snapshot(task) for task in project(query, TASK_FIELDS).stream())
+
+        def loaded(store):
+            self.task_store = store
+            self.render_tasks()
+
+        # A newer load supersedes one still running
+        if self._loading is not None:
+            self._loading.cancel()
+        self._loading = run_in_background(self.tree, fetch, on_success=loaded,
+                                          status=(self.summary_label, "Loading tasks..."))
+
+    def render_tasks(self):
+        self._render_pending = None
+        store = self.task_store
+        self.tasks = store.rows(store.filter_mask(self.filter_status.get()))
+        self.tree.delete(*self.tree.get_children())
+        for task_id, task_data in self.tasks:
             self.tree.insert(
                 "",
                 "end",
@@ -188,13 +208,12 @@ class EmployeeTaskPortal:
                     task_data.get("task", ""),
                     task_data.get("priority", ""),
                     task_data.get("deadline", ""),
-                    status,
+                    task_data.get("status", ""),
                 ),
             )
-            self.tasks.append((task_id, task_data))
-
-        summary_text = f"Total: {len(self.tasks)} | Pending: {pending} | In Progress: {in_progress} | Completed: {completed} | Incomplete: {incomplete}"
-        self.summary_label.config(text=summary_text)
+        # Summary covers all of the employee's tasks regardless of the filter
+        overdue = int(store.mask(overdue=True).sum())
+        self.summary_label.config(text=f"{format_summary(store.status_counts())} | Overdue: {overdue}")
 
     def open_update_window(self, event):
         selected = self.tree.selection()
@@ -202,7 +221,7 @@ class EmployeeTaskPortal:
             return
 
         task_id = selected[0]
-        task_data = next((td for tid, td in self.tasks if tid == task_id), None)
+        task_data = self.task_store.get(task_id)
         if not task_data:
             return
 
@@ -238,18 +257,26 @@ class EmployeeTaskPortal:
         def update_task():
             new_status = status_cb.get()
             remark = remarks_entry.get()
-            db.collection(TASKS_COLLECTION).document(task_id).update(
+
+            def updated(_):
+                messagebox.showinfo("Success", "Task updated successfully!")
+                update_window.destroy()
+                self.task_store.upsert(task_data.replace(status=new_status, last_remark=remark))
+                self.render_tasks()
+
+            run_in_background(
+                update_window,
+                db.collection(TASKS_COLLECTION).document(task_id).update,
                 {
                     "status": new_status,
                     "last_updated": datetime.utcnow().isoformat(),
                     "last_remark": remark,
-                }
+                },
+                on_success=updated,
+                busy=[update_btn],
             )
-            messagebox.showinfo("Success", "Task updated successfully!")
-            update_window.destroy()
-            self.load_tasks()
 
-        tk.Button(
+        update_btn = tk.Button(
             update_window,
             text="Update",
             command=update_task,
@@ -258,7 +285,8 @@ class EmployeeTaskPortal:
             font=("Arial", 12, "bold"),
             padx=10,
             pady=5,
-        ).grid(row=3, columnspan=2, pady=10)
+        )
+        update_btn.grid(row=3, columnspan=2, pady=10)
 
 
 if __name__ == "__main__":
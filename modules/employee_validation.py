@@ -0,0 +1,107 @@
+import datetime
+
+# --- Employee Validation ---
+# Shared by the admin form and the API's bulk endpoints so both apply the same
+# rules. No UI imports here.
+EMPLOYEE_INPUT_FIELDS = ["Name", "Role", "Contact", "Gender", "Age", "Date of Birth", "Bank Name", "Account Number", "IFSC Code"]
+GENDERS = ["Male", "Female"]
+
+
+def _text(data, field):
+    value = data.get(field, "")
+    return "" if value is None else str(value).strip()
+
+
+def validate_employee_data(data, partial=False):
+    """Validate employee fields. Returns a list of error messages.
+
+    With ``partial=True`` (updates) only the fields present in ``data`` are checked.
+    """
+    errors = []
+
+    def check(field):
+        return not partial or field in data
+
+    # Name validation: 2-50 letters only
+    if check("Name"):
+        name = _text(data, "Name")
+        if not name:
+            errors.append("• Name is required")
+        elif len(name) < 2 or len(name) > 50:
+            errors.append("• Name must be 2-50 characters")
+        elif not all(c.isalpha() or c.isspace() for c in name):
+            errors.append("• Name must contain only letters and spaces")
+
+    # Contact validation: exactly 10 digits
+    if check("Contact"):
+        contact = _text(data, "Contact")
+        if not contact:
+            errors.append("• Contact is required")
+        elif len(contact) != 10 or not contact.isdecimal():
+            errors.append("• Contact must be exactly 10 digits")
+
+    # Gender validation
+    if check("Gender"):
+        gender = _text(data, "Gender")
+        if not gender:
+            errors.append("• Gender must be selected")
+        elif gender not in GENDERS:
+            errors.append("• Gender must be Male or Female")
+
+    # Age validation: 18-70
+    if check("Age"):
+        age = _text(data, "Age")
+        if not age:
+            errors.append("• Age is required")
+        elif not age.isdecimal():
+            errors.append("• Age must be a number")
+        elif int(age) < 18 or int(age) > 70:
+            errors.append("• Age must be between 18 and 70")
+
+    # Date of Birth validation
+    if check("Date of Birth"):
+        dob = _text(data, "Date of Birth")
+        if not dob:
+            errors.append("• Date of Birth is required")
+        else:
+            try:
+                dob_date = datetime.datetime.strptime(dob, "%Y-%m-%d").date()
+                if dob_date >= datetime.date.today():
+                    errors.append("• Date of Birth must be in the past")
+            except ValueError:
+                errors.append("• Date of Birth must be in YYYY-MM-DD format")
+
+    # Role validation
+    if check("Role"):
+        if not _text(data, "Role"):
+            errors.append("• Role must be selected")
+
+    # Bank Name validation
+    if check("Bank Name"):
+        bank = _text(data, "Bank Name")
+        if not bank:
+            errors.append("• Bank Name is required")
+        elif len(bank) > 100:
+            errors.append("• Bank Name must be 100 characters or less")
+
+    # Account Number validation: digits only
+    if check("Account Number"):
+        account = _text(data, "Account Number")
+        if not account:
+            errors.append("• Account Number is required")
+        elif not account.isdecimal():
+            errors.append("• Account Number must contain only digits")
+        elif len(account) < 9 or len(account) > 20:
+            errors.append("• Account Number must be 9-20 digits")
+
+    # IFSC Code validation: 11 characters, uppercase alphanumeric
+    if check("IFSC Code"):
+        ifsc = _text(data, "IFSC Code").upper()
+        if not ifsc:
+            errors.append("• IFSC Code is required")
+        elif len(ifsc) != 11:
+            errors.append("• IFSC Code must be exactly 11 characters")
+        elif not all(c.isupper() or c.isdigit() for c in ifsc):
+            errors.append("• IFSC Code must contain only letters and digits")
+
+    return errors
@@ -0,0 +1,110 @@
+import os
+import threading
+from startup_timing import mark, stage
+
+# --- Firebase Setup ---
+# The Firestore client is created on first use (or ahead of time on a
+# background thread via init_in_background) instead of at import time, so
+# importing a panel module no longer pays for the gRPC/credentials handshake.
+# The default key sits next to this file, so it is found whatever the working
+# directory (e.g. gunicorn --chdir modules).
+CREDENTIALS_PATH = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS",
+                                  os.path.join(os.path.dirname(os.path.abspath(__file__)), "serviceAccountKey.json"))
+# With FIRESTORE_EMULATOR_HOST set (e.g. "localhost:8080") the client talks to
+# the local Firestore emulator under this project ID, without credentials.
+EMULATOR_HOST = os.environ.get("FIRESTORE_EMULATOR_HOST")
+EMULATOR_PROJECT = os.environ.get("GCLOUD_PROJECT", "demo-ems")
+
+_lock = threading.Lock()
+_client = None
+
+
+def configure(credentials_path):
+    """Use a different service account key (must be called before first use); None keeps the default."""
+    global CREDENTIALS_PATH
+    if credentials_path:
+        CREDENTIALS_PATH = credentials_path
+
+
+def _initialize_app():
+    with stage("import firebase_admin"):
+        import firebase_admin
+        from firebase_admin import credentials
+    with stage("firebase initialize_app"):
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(credentials.Certificate(CREDENTIALS_PATH))
+
+
+def get_db():
+    """Return the shared Firestore client, initializing Firebase if needed."""
+    global _client
+    if _client is not None:
+        return _client
+    with _lock:
+        if _client is None:
+            import firestore_metrics
+            import read_budget
+            if EMULATOR_HOST:
+                _client = _emulator_client()
+            else:
+                _initialize_app()
+                from firebase_admin import firestore
+                with stage("firestore client"):
+                    _client = firestore.client()
+            firestore_metrics.install()
+            read_budget.install()
+            mark("firebase ready")
+    return _client
+
+
+def _emulator_client():
+    from google.auth.credentials import AnonymousCredentials
+    from google.cloud import firestore
+    return firestore.Client(project=EMULATOR_PROJECT, credentials=AnonymousCredentials())
+
+
+def get_async_db():
+    """Return a new async Firestore client bound to the running event loop.
+
+    Create one per event loop (e.g. in an ASGI lifespan handler) and reuse it.
+    """
+    with _lock:
+        _initialize_app()
+    from firebase_admin import firestore_async
+    return firestore_async.client()
+
+
+def init_in_background():
+    """Start Firebase/gRPC setup on a daemon thread while the window paints."""
+    def worker():
+        try:
+            get_db()
+        except Exception as e:
+            print(f"Firebase initialization failed: {e}")
+    threading.Thread(target=worker, name="firebase-init", daemon=True).start()
+
+
+def disconnect():
+    """Delete initialized Firebase apps so the Firestore connection is closed."""
+    global _client
+    with _lock:
+        _client = None
+        try:
+            import firebase_admin
+            for app_obj in list(firebase_admin._apps.values()):
+                try:
+                    firebase_admin.delete_app(app_obj)
+                except Exception:
+                    pass
+        except Exception:
+            pass
+
+
+class _LazyClient:
+    """Stands in for the Firestore client and initializes it on first attribute access."""
+
+    def __getattr__(self, name):
+        return getattr(get_db(), name)
+
+
+db = _LazyClient()
@@ -0,0 +1,280 @@
+import contextvars
+import functools
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# --- Firestore call metrics ---
+# Every synchronous Firestore call (query/collection stream and get, document
+# get/set/update/delete/create, batched get_all, collection add, batch commit,
+# count aggregations) is timed and counted by operation, collection, calling module
+# and UI action. ``install`` patches the client classes once; firebase_app calls
+# it when the client is created. A call made inside another (e.g. Query.get
+# streaming) is counted once, by the outer call. Actions are set with
+# ``with action("fetch_tasks"):`` and follow the work into run_in_background
+# workers and their callbacks, so each screen's reads per open can be read off
+# ``action_summary``. A count() is billed (and counted) as one read per 1000
+# index entries it counts.
+# Actions nest: a call is labelled with the innermost one, and listeners (such
+# as the read_budget ledger) get the whole stack.
+# Counters are per process: ``prometheus_text`` feeds the API's /metrics route
+# and the Diagnostics panel shows the same numbers in the app.
+ENABLED = os.environ.get("EMS_FIRESTORE_METRICS", "1") != "0"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+READ_OPS = {"get", "stream", "count", "listen"}  # "listen": documents delivered to change-feed listeners
+SKIP_MODULES = ("google.", "grpc", "firebase_admin", "firestore_metrics", "projections", "concurrent.",
+                "threading", "contextlib", "background")
+
+_actions = contextvars.ContextVar("firestore_actions", default=())
+_local = threading.local()
+_lock = threading.Lock()
+_series = {}  # (op, collection, module, action) -> [calls, documents, errors, seconds, bucket counts...]
+_runs = {}  # action -> times started
+_listeners = []
+_installed = False
+
+
+@contextmanager
+def action(name):
+    """Attribute the Firestore calls made in this block (and work it starts in the background) to ``name``."""
+    with _lock:
+        _runs[name] = _runs.get(name, 0) + 1
+    token = _actions.set(_actions.get() + (name,))
+    try:
+        yield
+    finally:
+        _actions.reset(token)
+
+
+def current_actions():
+    """The enclosing actions, outermost first."""
+    return _actions.get()
+
+
+def add_listener(callback):
+    """Call ``callback(op, collection, module, actions, documents, seconds, failed)`` after every recorded call."""
+    _listeners.append(callback)
+
+
+def runs():
+    with _lock:
+        return dict(_runs)
+
+
+def record(op, collection, module, seconds, documents, failed=False, actions=None):
+    actions = _actions.get() if actions is None else actions
+    key = (op, collection or "?", module, actions[-1] if actions else "")
+    with _lock:
+        series = _series.get(key)
+        if series is None:
+            series = _series[key] = [0, 0, 0, 0.0] + [0] * len(LATENCY_BUCKETS)
+        series[0] += 1
+        series[1] += documents
+        series[2] += 1 if failed else 0
+        series[3] += seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                series[4 + i] += 1
+                break
+    for callback in _listeners:
+        callback(op, key[1], module, actions, documents, seconds, failed)
+
+
+def reset():
+    with _lock:
+        _series.clear()
+        _runs.clear()
+
+
+def _caller():
+    """The application module that made the call."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        name = frame.f_globals.get("__name__", "")
+        if not name.startswith(SKIP_MODULES):
+            if name == "__main__":
+                return os.path.splitext(os.path.basename(frame.f_code.co_filename))[0]
+            return name
+        frame = frame.f_back
+    return "?"
+
+
+# --- Instrumentation ---
+def _document_collection(ref):
+    path = getattr(ref, "_path", ())
+    return path[-2] if len(path) > 1 else "?"
+
+
+def _query_collection(query):
+    parent = getattr(query, "_parent", None) or getattr(getattr(query, "_nested_query", None), "_parent", None)
+    return getattr(parent, "id", "?")
+
+
+def _batch_collections(batch):
+    names = set()
+    for write in getattr(batch, "_write_pbs", ()):
+        try:
+            path = write.delete or write.update.name or write.transform.document
+        except AttributeError:
+            continue
+        parts = path.split("/documents/", 1)[-1].split("/")
+        if len(parts) > 1:
+            names.add(parts[-2])
+    return "+".join(sorted(names)) or "?"
+
+
+def _timed(op, method, collection_of, documents_of=lambda self, result: 1, before=None):
+    """Wrap ``method`` to record one call; ``before(self)`` captures state needed after it (batch size)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if getattr(_local, "active", False):
+            return method(self, *args, **kwargs)
+        module = _caller()
+        collection = collection_of(self)
+        saved = before(self) if before else None
+        _local.active = True
+        started = time.perf_counter()
+        failed, documents = True, 0
+        try:
+            result = method(self, *args, **kwargs)
+            failed = False
+            documents = documents_of(self, saved if before else result)
+            return result
+        finally:
+            _local.active = False
+            record(op, collection, module, time.perf_counter() - started, documents, failed)
+    return wrapper
+
+
+def _streamed(method, collection_of):
+    """Wrap a ``stream`` method; the call is recorded when the stream ends."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if getattr(_local, "active", False):
+            return method(self, *args, **kwargs)
+        return _measure_stream(method(self, *args, **kwargs), collection_of(self), _caller(), _actions.get())
+    return wrapper
+
+
+def _get_all(method):
+    """Wrap ``Client.get_all``; each returned snapshot is a read."""
+    @functools.wraps(method)
+    def wrapper(self, references, *args, **kwargs):
+        if getattr(_local, "active", False):
+            return method(self, references, *args, **kwargs)
+        references = list(references)
+        collection = _document_collection(references[0]) if references else "?"
+        return _measure_stream(method(self, references, *args, **kwargs), collection, _caller(), _actions.get(), "get")
+    return wrapper
+
+
+def _aggregation_reads(self, result):
+    # One read per 1000 index entries counted, at least one
+    try:
+        entries = sum(int(item.value) for results in result for item in results)
+    except (AttributeError, TypeError, ValueError):
+        return 1
+    return max(1, -(-entries // 1000))
+
+
+def _measure_stream(docs, collection, module, actions, op="stream"):
+    started = time.perf_counter()
+    count, failed = 0, False
+    try:
+        for doc in docs:
+            count += 1
+            yield doc
+    except Exception:
+        failed = True
+        raise
+    finally:
+        record(op, collection, module, time.perf_counter() - started, count, failed, actions)
+
+
+def install():
+    """Instrument the Firestore client classes (once per process)."""
+    global _installed
+    if _installed or not ENABLED:
+        return
+    _installed = True
+    from google.cloud.firestore_v1 import batch, client, collection, document, query
+
+    query.Query.stream = _streamed(query.Query.stream, _query_collection)
+    query.Query.get = _timed("get", query.Query.get, _query_collection, lambda self, result: len(result))
+    client.Client.get_all = _get_all(client.Client.get_all)
+    collection.CollectionReference.add = _timed("add", collection.CollectionReference.add, lambda self: self.id)
+    document.DocumentReference.get = _timed("get", document.DocumentReference.get, _document_collection)
+    for op in ("set", "update", "delete", "create"):
+        setattr(document.DocumentReference, op, _timed(op, getattr(document.DocumentReference, op), _document_collection))
+    batch.WriteBatch.commit = _timed("commit", batch.WriteBatch.commit, _batch_collections,
+                                     lambda self, size: size, before=lambda self: len(self._write_pbs))
+    try:
+        from google.cloud.firestore_v1 import aggregation
+    except ImportError:
+        return  # Older client without count() aggregations
+    aggregation.AggregationQuery.get = _timed("count", aggregation.AggregationQuery.get, _query_collection,
+                                              _aggregation_reads)
+
+
+# --- Reporting ---
+def series():
+    """``[(op, collection, module, action, calls, documents, errors, seconds)]``, busiest first."""
+    with _lock:
+        rows = [key + tuple(values[:4]) for key, values in _series.items()]
+    return sorted(rows, key=lambda row: (-row[5], -row[4]))
+
+
+def action_summary():
+    """``{action: {"runs", "reads", "writes", "seconds", "reads_per_run"}}`` for every tagged action."""
+    with _lock:
+        summary = {name: {"runs": runs, "reads": 0, "writes": 0, "seconds": 0.0} for name, runs in _runs.items()}
+        for (op, _, _, name), values in _series.items():
+            if not name:
+                continue
+            entry = summary.setdefault(name, {"runs": 0, "reads": 0, "writes": 0, "seconds": 0.0})
+            entry["reads" if op in READ_OPS else "writes"] += values[1]
+            entry["seconds"] += values[3]
+    for entry in summary.values():
+        entry["reads_per_run"] = entry["reads"] / entry["runs"] if entry["runs"] else 0.0
+    return summary
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def prometheus_text():
+    """All counters and latency histograms in the Prometheus text exposition format."""
+    with _lock:
+        items = sorted((key, list(values)) for key, values in _series.items())
+        runs = sorted(_runs.items())
+    lines = []
+    for name, index, kind, help_text in (
+            ("ems_firestore_calls_total", 0, "counter", "Firestore calls."),
+            ("ems_firestore_documents_total", 1, "counter", "Documents read or written by Firestore calls."),
+            ("ems_firestore_errors_total", 2, "counter", "Firestore calls that raised.")):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for (op, collection, module, action_name), values in items:
+            lines.append(f"{name}{_labels(op=op, collection=collection, module=module, action=action_name)} {values[index]}")
+
+    name = "ems_firestore_latency_seconds"
+    lines += [f"# HELP {name} Firestore call latency (streams: until fully read).", f"# TYPE {name} histogram"]
+    for (op, collection, module, action_name), values in items:
+        labels = dict(op=op, collection=collection, module=module, action=action_name)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, values[4:]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {values[0]}")
+        lines.append(f"{name}_sum{_labels(**labels)} {values[3]:.6f}")
+        lines.append(f"{name}_count{_labels(**labels)} {values[0]}")
+
+    lines += ["# HELP ems_action_runs_total Times each tagged UI action ran.", "# TYPE ems_action_runs_total counter"]
+    lines += [f"ems_action_runs_total{_labels(action=name)} {count}" for name, count in runs]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,319 @@
+"""Import attendance from biometric / CSV punch logs.
+
+Each punch file is read row by row. Badge IDs are mapped to employees through
+a roster index loaded once. All punches of an employee on one day collapse
+into one attendance record (first in, last out, punch count), marked "Late"
+when the first punch is after --late-after. Records are upserted under the
+"<employee_id>_<date>" IDs used everywhere else, in chunked batch writes.
+Each file's punches are kept per file name in the record's ``punch_sources``
+and first in / last out / punches / status are recomputed over all of them,
+so a day spread over several files (one per terminal) merges, and re-running
+a file replaces its own share instead of adding it twice.
+
+Logs are expected in roughly chronological order: a day's records are
+written once the reader is more than --window days past it (with the default
+of 1, day D is written at the first punch of day D+2). Punches for an
+already-written day are counted as stragglers and skipped. This keeps memory
+bounded by the open days, not the file size. After every flush a checkpoint
+next to the input records how far the file is safely imported. A re-run
+resumes from there; an interrupted import never writes a day twice with
+partial punches.
+
+    python modules/import_punches.py punches-2025-11.csv --late-after 09:15
+    python modules/import_punches.py logs/*.csv --badge-column CardNo \\
+        --time-column PunchTime --time-format "%d/%m/%Y %H:%M:%S"
+
+Exit codes: 0 = imported, 1 = some writes failed (re-run to resume), 2 = usage error.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+BATCH_LIMIT = 500
+COMMIT_WORKERS = 4
+BADGE_COLUMNS = ("badge_id", "badge", "card_no", "employee_id", "emp_id", "id")
+ROSTER_FIELDS = ["Name", "badge_id"]
+
+
+def init_db(credentials_path):
+    import firebase_app
+    firebase_app.configure(credentials_path)
+    return firebase_app.get_db()
+
+
+def load_roster_index(db):
+    """Map every badge ID (the ``badge_id`` field, and the employee ID itself) to ``(employee_id, name)``."""
+    from projections import project
+    index = {}
+    for doc in project(db.collection("employees"), ROSTER_FIELDS).stream():
+        data = doc.to_dict()
+        entry = (doc.id, data.get("Name", ""))
+        index[doc.id] = entry
+        if data.get("badge_id"):
+            index[str(data["badge_id"]).strip()] = entry
+    return index
+
+
+def parse_time(value, time_format=None):
+    value = value.strip()
+    if time_format:
+        return datetime.strptime(value, time_format)
+    return datetime.fromisoformat(value.replace("T", " ").rstrip("Z"))
+
+
+def source_key(path):
+    """The punch_sources key for a file: its name, as a plain field name."""
+    return re.sub(r"[^A-Za-z0-9_-]", "_", os.path.basename(path))
+
+
+def _naive(value):
+    # Firestore returns the naive punch times it was given as UTC-aware datetimes
+    return value.replace(tzinfo=None) if getattr(value, "tzinfo", None) else value
+
+
+class Checkpoint:
+    """Resume state for one input file, stored next to it as JSON."""
+
+    def __init__(self, path):
+        self.path = path + ".import-checkpoint"
+        self.line = 0
+        self.flushed_through = None
+        self.size = os.path.getsize(path)
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        # A shorter file was replaced, not appended to: start over
+        if saved.get("size", 0) <= self.size:
+            self.line = saved.get("line", 0)
+            self.flushed_through = saved.get("flushed_through")
+
+    def save(self, line, flushed_through):
+        self.line, self.flushed_through = line, flushed_through
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"line": line, "flushed_through": flushed_through, "size": self.size}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class PunchImporter:
+    def __init__(self, db, roster, late_after, window=1, dry_run=False):
+        from attendance import attendance_id
+        self.db = db
+        self.attendance_id = attendance_id
+        self.roster = roster
+        self.late_after = late_after
+        self.window = window
+        self.dry_run = dry_run
+        self.pool = ThreadPoolExecutor(max_workers=COMMIT_WORKERS)
+        self.source = None  # punch_sources key of the file being imported
+        self.stats = {"rows": 0, "punches": 0, "records": 0, "late": 0, "unknown": 0,
+                      "invalid": 0, "stragglers": 0, "skipped_rows": 0}
+        self.unknown_badges = set()
+
+    # --- Writing ---
+    def record(self, employee_id, day, punches, stored_sources=None):
+        """The attendance record for this file's ``punches`` merged with other files' (``stored_sources``)."""
+        first, last, count = punches
+        sources = {key: value for key, value in (stored_sources or {}).items() if key != self.source}
+        sources[self.source] = {"first_in": first, "last_out": last, "punches": count}
+        for share in sources.values():
+            first = min(first, _naive(share["first_in"]))
+            last = max(last, _naive(share["last_out"]))
+        name = self.roster.get(employee_id, (employee_id, ""))[1]
+        late = first.time() > self.late_after
+        return {
+            "employee_id": employee_id,
+            "employee_name": name,
+            "timestamp": first,
+            "date": day,
+            "status": "Late" if late else "Present",
+            "first_in": first,
+            "last_out": last,
+            "punches": sum(share["punches"] for share in sources.values()),
+            "punch_sources": sources,
+            "source": "punch_import"
+        }
+
+    def write(self, entries):
+        """Upsert ``{(employee_id, day): punches}`` in concurrent batches; raises if any batch fails."""
+        records = [self.record(emp, day, punches) for (emp, day), punches in entries.items()]
+        self.stats["records"] += len(records)
+        self.stats["late"] += sum(1 for r in records if r["status"] == "Late")
+        if self.dry_run or not records:
+            return
+        collection = self.db.collection("attendance")
+        items = list(entries.items())
+
+        def commit(chunk):
+            # Other files' punches for the same days (one read per record)
+            refs = [collection.document(self.attendance_id(emp, day)) for (emp, day), _ in chunk]
+            stored = {snap.id: (snap.to_dict() or {}).get("punch_sources") or {}
+                      for snap in self.db.get_all(refs, field_paths=["punch_sources"]) if snap.exists}
+            batch = self.db.batch()
+            for ref, ((emp, day), punches) in zip(refs, chunk):
+                # merge=True keeps fields written by others (e.g. a kiosk check-in)
+                batch.set(ref, self.record(emp, day, punches, stored.get(ref.id)), merge=True)
+            batch.commit()
+
+        futures = [self.pool.submit(commit, items[i:i + BATCH_LIMIT]) for i in range(0, len(items), BATCH_LIMIT)]
+        errors = [f.exception() for f in futures if f.exception() is not None]
+        if errors:
+            raise errors[0]
+
+    # --- Reading ---
+    def import_file(self, path, badge_column=None, time_column="timestamp", date_column=None,
+                    time_format=None, delimiter=","):
+        checkpoint = Checkpoint(path)
+        self.source = source_key(path)
+        flushed_through = checkpoint.flushed_through
+        open_days = {}  # (employee_id, day) -> [first, last, count]
+        first_line = {}  # (employee_id, day) -> input line of its first punch
+        newest = None
+
+        def flush(through, line):
+            nonlocal flushed_through
+            done = {key: value for key, value in open_days.items() if key[1] <= through}
+            if not done:
+                return
+            self.write(done)
+            for key in done:
+                del open_days[key]
+                del first_line[key]
+            flushed_through = max(flushed_through or through, through)
+            # Rows before the oldest punch still in memory are all written
+            resume = min(first_line.values(), default=line)
+            if not self.dry_run:
+                checkpoint.save(resume, flushed_through)
+
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f, delimiter=delimiter)
+            column = badge_column or next((c for c in BADGE_COLUMNS if c in (reader.fieldnames or [])), None)
+            if column is None or column not in (reader.fieldnames or []):
+                raise ValueError(f"no badge column (looked for {badge_column or ', '.join(BADGE_COLUMNS)})")
+
+            for line, row in enumerate(reader, start=1):
+                if line < checkpoint.line:
+                    self.stats["skipped_rows"] += 1
+                    continue
+                self.stats["rows"] += 1
+                badge = (row.get(column) or "").strip()
+                try:
+                    raw = f"{row[date_column]} {row[time_column]}" if date_column else row[time_column]
+                    when = parse_time(raw, time_format)
+                except (KeyError, TypeError, ValueError):
+                    self.stats["invalid"] += 1
+                    continue
+                employee = self.roster.get(badge)
+                if employee is None:
+                    self.stats["unknown"] += 1
+                    self.unknown_badges.add(badge)
+                    continue
+
+                day = when.date().isoformat()
+                if flushed_through and day <= flushed_through:
+                    self.stats["stragglers"] += 1
+                    continue
+                self.stats["punches"] += 1
+                key = (employee[0], day)
+                punches = open_days.get(key)
+                if punches is None:
+                    open_days[key] = [when, when, 1]
+                    first_line[key] = line
+                else:
+                    punches[0] = min(punches[0], when)
+                    punches[1] = max(punches[1], when)
+                    punches[2] += 1
+
+                if newest is None or day > newest:
+                    newest = day
+                    # Days more than ``window`` days before the newest one are closed
+                    cutoff = (date.fromisoformat(day) - timedelta(days=self.window + 1)).isoformat()
+                    flush(cutoff, line)
+
+        flush("9999-12-31", line=0)
+        if not self.dry_run:
+            checkpoint.clear()
+
+    def close(self):
+        self.pool.shutdown()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Import attendance from punch log CSV files.")
+    parser.add_argument("files", nargs="+", help="Punch log CSV file(s)")
+    parser.add_argument("--badge-column", help=f"Badge/employee ID column (default: first of {', '.join(BADGE_COLUMNS)})")
+    parser.add_argument("--time-column", default="timestamp", help="Punch time column (or time of day with --date-column)")
+    parser.add_argument("--date-column", help="Separate punch date column")
+    parser.add_argument("--time-format", help="strptime format of the punch time (default ISO 8601)")
+    parser.add_argument("--delimiter", default=",")
+    parser.add_argument("--late-after", default="09:30", help="First punch after this time (HH:MM) is Late")
+    parser.add_argument("--window", type=int, default=1, help="Days a day stays open for out-of-order punches")
+    parser.add_argument("--dry-run", action="store_true", help="Parse and aggregate without writing")
+    parser.add_argument("--credentials", help="service account key (default: $GOOGLE_APPLICATION_CREDENTIALS or modules/serviceAccountKey.json)")
+    args = parser.parse_args(argv)
+    try:
+        args.late_after = datetime.strptime(args.late_after, "%H:%M").time()
+    except ValueError:
+        parser.error("--late-after must be HH:MM")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    started = time.perf_counter()
+    try:
+        db = init_db(args.credentials)
+        roster = load_roster_index(db)
+    except Exception as e:
+        print(f"Failed to load the roster: {e}", file=sys.stderr)
+        return 1
+    print(f"Roster index: {len(roster)} badge(s)")
+
+    importer = PunchImporter(db, roster, args.late_after, args.window, args.dry_run)
+    failed = False
+    try:
+        for path in args.files:
+            t0 = time.perf_counter()
+            try:
+                importer.import_file(path, args.badge_column, args.time_column, args.date_column,
+                                     args.time_format, args.delimiter)
+            except (OSError, ValueError) as e:
+                print(f"{path}: {e}", file=sys.stderr)
+                return 2
+            except Exception as e:
+                failed = True
+                print(f"{path}: write failed, re-run to resume: {e}", file=sys.stderr)
+                continue
+            print(f"{path}: done in {time.perf_counter() - t0:.1f}s")
+    finally:
+        importer.close()
+
+    s = importer.stats
+    print(f"{s['rows']} row(s), {s['punches']} punch(es) -> {s['records']} record(s) ({s['late']} late) "
+          f"in {time.perf_counter() - started:.1f}s{' [dry run]' if args.dry_run else ''}")
+    if s["skipped_rows"]:
+        print(f"Resumed: skipped {s['skipped_rows']} row(s) imported earlier")
+    if s["invalid"] or s["stragglers"]:
+        print(f"Ignored {s['invalid']} unparseable row(s) and {s['stragglers']} punch(es) for days already written")
+    if s["unknown"]:
+        sample = ", ".join(sorted(importer.unknown_badges)[:20])
+        print(f"{s['unknown']} punch(es) from {len(importer.unknown_badges)} unknown badge(s): {sample}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,105 +2,170 @@ import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 import tkinter as tk
 from tkinter import messagebox
-import subprocess
-import os
 import sys
+import multiprocessing
+import firebase_app
+from startup_timing import timed_import
+import ui_profiler
 
 # --- User Setup ---
 USERS = {
-    "admin": {"password": "admin123", "script": "modules/employee_management.py"},
-    "employee": {"password": "emp123", "script": "modules/employee_portal_integrated.py"}
+    "admin": {"password": "admin123", "view": "admin"},
+    "employee": {"password": "emp123", "view": "employee"}
 }
 
 
-def open_login_window():
-    # Use ttkbootstrap Window for consistency with other modules
-    root = ttk.Window(themename="flatly")
-    root.title("Employee Management System - Login")
-    root.geometry("700x420")
-    root.resizable(False, False)
+class AppShell:
+    """Single long-lived window that switches between login, admin and employee views.
+
+    Views are swapped in place instead of relaunching a new interpreter, so the
+    Firestore client, imported modules and the local API server stay warm across
+    sessions; only the per-user view object is rebuilt on each login.
+    """
+
+    def __init__(self):
+        # Use ttkbootstrap Window for consistency with other modules
+        self.root = ttk.Window(themename="flatly")
+        ui_profiler.install(self.root)
+        self.view = None
+        self.api_server = None
+        # Warm up Firebase/gRPC while the user types their credentials
+        firebase_app.init_in_background()
+
+        self.root.protocol("WM_DELETE_WINDOW", self.quit)
+        self.show_login()
+
+    # ------------------- Views -------------------
+    def show_login(self):
+        self.view = None
+        self.root.title("Employee Management System - Login")
+        self.root.geometry("700x420")
+        self.root.resizable(False, False)
+
+        frame = ttk.Frame(self.root)
+        frame.pack(fill=BOTH, expand=True)
+        self.login_frame = frame
 
-    # Left sidebar (visual parity with other modules)
-    sidebar = ttk.Frame(root, padding=12)
-    sidebar.pack(side=LEFT, fill=Y)
+        # Left sidebar (visual parity with other modules)
+        sidebar = ttk.Frame(frame, padding=12)
+        sidebar.pack(side=LEFT, fill=Y)
 
-    ttk.Label(sidebar, text="Welcome", font=("Segoe UI", 16, "bold")).pack(pady=(6, 12))
-    ttk.Label(sidebar, text="Sign in to continue", font=("Segoe UI", 10)).pack(pady=(0, 20))
-    ttk.Separator(sidebar, orient=VERTICAL).pack(fill=X, pady=(10, 10))
+        ttk.Label(sidebar, text="Welcome", font=("Segoe UI", 16, "bold")).pack(pady=(6, 12))
+        ttk.Label(sidebar, text="Sign in to continue", font=("Segoe UI", 10)).pack(pady=(0, 20))
+        ttk.Separator(sidebar, orient=VERTICAL).pack(fill=X, pady=(10, 10))
 
-    # Right main area: login form
-    main = ttk.Frame(root, padding=20)
-    main.pack(side=RIGHT, fill=BOTH, expand=True)
+        # Right main area: login form
+        main = ttk.Frame(frame, padding=20)
+        main.pack(side=RIGHT, fill=BOTH, expand=True)
 
-    ttk.Label(main, text="Login Portal", font=("Segoe UI", 20, "bold")).pack(pady=(6, 18))
+        ttk.Label(main, text="Login Portal", font=("Segoe UI", 20, "bold")).pack(pady=(6, 18))
 
-    # Username
-    username_var = tk.StringVar()
-    ttk.Label(main, text="Username", font=("Segoe UI", 10)).pack(anchor=W, padx=6)
-    username_entry = ttk.Entry(main, textvariable=username_var, width=40)
-    username_entry.pack(pady=(4, 8))
+        # Username
+        self.username_var = tk.StringVar()
+        ttk.Label(main, text="Username", font=("Segoe UI", 10)).pack(anchor=W, padx=6)
+        username_entry = ttk.Entry(main, textvariable=self.username_var, width=40)
+        username_entry.pack(pady=(4, 8))
+        username_entry.focus_set()
 
-    # Password
-    password_var = tk.StringVar()
-    ttk.Label(main, text="Password", font=("Segoe UI", 10)).pack(anchor=W, padx=6)
-    password_entry = ttk.Entry(main, textvariable=password_var, show="*", width=40)
-    password_entry.pack(pady=(4, 8))
+        # Password
+        self.password_var = tk.StringVar()
+        ttk.Label(main, text="Password", font=("Segoe UI", 10)).pack(anchor=W, padx=6)
+        password_entry = ttk.Entry(main, textvariable=self.password_var, show="*", width=40)
+        password_entry.pack(pady=(4, 8))
 
-    # Show password
-    show_password_var = tk.BooleanVar(value=False)
+        # Show password
+        show_password_var = tk.BooleanVar(value=False)
 
-    def toggle_show():
-        password_entry.configure(show="" if show_password_var.get() else "*")
+        def toggle_show():
+            password_entry.configure(show="" if show_password_var.get() else "*")
 
-    ttk.Checkbutton(main, text="Show Password", variable=show_password_var, bootstyle="secondary", command=toggle_show).pack(anchor=W, padx=4)
+        ttk.Checkbutton(main, text="Show Password", variable=show_password_var, bootstyle="secondary", command=toggle_show).pack(anchor=W, padx=4)
 
-    # Spacer
-    ttk.Label(main, text="").pack(pady=6)
+        # Spacer
+        ttk.Label(main, text="").pack(pady=6)
 
-    # Login function
-    def login(event=None):
-        username = username_var.get().strip()
-        password = password_var.get().strip()
+        # Buttons
+        btn_frame = ttk.Frame(main)
+        btn_frame.pack(pady=(10, 4))
+
+        login_btn = ttk.Button(btn_frame, text="Login", width=18, bootstyle="success", command=self.login)
+        login_btn.pack(side=LEFT, padx=8)
+
+        quit_btn = ttk.Button(btn_frame, text="Quit", width=10, bootstyle="danger-outline", command=self.quit)
+        quit_btn.pack(side=LEFT, padx=8)
+
+        # Key bindings
+        self.root.bind('<Return>', self.login)
+        self.root.bind('<Escape>', lambda e: self.quit())
+
+    def login(self, event=None):
+        username = self.username_var.get().strip()
+        password = self.password_var.get().strip()
         if username in USERS and USERS[username]["password"] == password:
             messagebox.showinfo("Login Successful", f"Welcome, {username}!")
-            script_path = USERS[username]["script"]
-            # Close login window and open target script
-            try:
-                root.destroy()
-            except Exception:
-                pass
+            # Remove the login view and open the target view in the same window
+            self.root.unbind('<Return>')
+            self.root.unbind('<Escape>')
+            self.login_frame.destroy()
+            self.root.resizable(True, True)
             try:
-                # Launch the target module with the same Python interpreter
-                subprocess.Popen([sys.executable, script_path, "--fullscreen"])
+                if USERS[username]["view"] == "admin":
+                    self.open_admin()
+                else:
+                    self.open_employee()
             except Exception as e:
-                messagebox.showerror("Error", f"Unable to open {script_path}\n{e}")
+                messagebox.showerror("Error", f"Unable to open {USERS[username]['view']} view\n{e}")
+                self.show_login()
         else:
             messagebox.showerror("Login Failed", "Invalid username or password.")
 
-    # Buttons
-    btn_frame = ttk.Frame(main)
-    btn_frame.pack(pady=(10, 4))
+    def open_admin(self):
+        self.start_api()
+        employee_management = timed_import("employee_management")
+        self.view = employee_management.EmployeeApp(self.root, on_logout=self.show_login)
 
-    login_btn = ttk.Button(btn_frame, text="Login", width=18, bootstyle="success", command=login)
-    login_btn.pack(side=LEFT, padx=8)
+    def open_employee(self):
+        employee_portal_integrated = timed_import("employee_portal_integrated")
+        self.view = employee_portal_integrated.EmployeePortalIntegrated(self.root, on_logout=self.show_login)
 
-    quit_btn = ttk.Button(btn_frame, text="Quit", width=10, bootstyle="danger-outline", command=lambda: root.destroy())
-    quit_btn.pack(side=LEFT, padx=8)
-
-    # Key bindings
-    root.bind('<Return>', login)
-    root.bind('<Escape>', lambda e: root.destroy())
+    # ------------------- Lifecycle -------------------
+    def start_api(self):
+        """Start the local employee API once; it keeps running across sessions."""
+        if self.api_server is None:
+            employee_api = timed_import("employee_api")
+            try:
+                self.api_server = employee_api.EmbeddedServer(allow_shutdown=True).start()
+            except OSError as e:
+                # Port already taken, e.g. by a standalone API server on this host
+                print(f"Local API not started: {e}")
 
-    # Start event loop with graceful KeyboardInterrupt handling
-    try:
-        root.mainloop()
-    except KeyboardInterrupt:
+    def quit(self):
+        try:
+            if self.view is not None:
+                self.view.close()
+        except Exception:
+            pass
+        if self.api_server is not None:
+            self.api_server.shutdown()
+        firebase_app.disconnect()
         try:
-            root.destroy()
+            self.root.destroy()
         except Exception:
             pass
-        sys.exit(0)
+
+    def run(self):
+        # Start event loop with graceful KeyboardInterrupt handling
+        try:
+            self.root.mainloop()
+        except KeyboardInterrupt:
+            self.quit()
+            sys.exit(0)
+
+
+def open_login_window():
+    AppShell().run()
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     open_login_window()
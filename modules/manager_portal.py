@@ -1,44 +1,94 @@
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from tkinter import messagebox
-import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_app import db
 from datetime import datetime
-
-# Firebase Initialization
-if not firebase_admin._apps:
-    cred = credentials.Certificate("modules/serviceAccountKey.json")
-    firebase_admin.initialize_app(cred)
-
-db = firestore.client()
-
-def get_employee_name_by_id(emp_id):
+from projections import project
+from background import run_in_background
+from roster_index import get_roster_index
+import firestore_metrics
+from models import Attendance
+
+
+# Fields read by the attendance table
+ATTENDANCE_LIST_FIELDS = ["employee_id", "employee_name", "timestamp", "status"]
+# Records per page, newest first; "Load More" reads the next page
+ATTENDANCE_PAGE_SIZE = 500
+
+def get_employee_names(emp_ids):
+    """``{emp_id: name}`` for ``emp_ids`` in one batched read; unknown IDs map to "Unknown"."""
+    names = dict.fromkeys(emp_ids, "Unknown")
+    refs = [db.collection("employees").document(emp_id) for emp_id in names if emp_id != "Unknown"]
     try:
-        doc = db.collection("employees").document(emp_id).get()
-        if doc.exists:
-            return doc.to_dict().get("Name", "Unknown")
-        return "Unknown"
+        for doc in db.get_all(refs, field_paths=["Name"]) if refs else ():
+            if doc.exists:
+                names[doc.id] = (doc.to_dict() or {}).get("Name", "Unknown")
     except Exception as e:
-        print(f"Error getting employee name: {e}")
-        return "Unknown"
+        print(f"Error getting employee names: {e}")
+    return names
+
+def load_attendance(after=None, known_name=lambda emp_id: None):
+    """Return ``(records, cursor)``: a page of Attendance records with ``employee_name`` filled in.
+
+    ``after`` is the cursor of the previous page (None for the first); the
+    returned cursor is None on the last page. Older records carry no name:
+    they are named by ``known_name(emp_id)`` (e.g. the roster index) and, for
+    employees it does not know, one batched read.
+    """
+    from firebase_admin import firestore
+
+    query = db.collection("attendance").order_by("timestamp", direction=firestore.Query.DESCENDING)
+    if after is not None:
+        query = query.start_after(after)
+    docs = list(project(query.limit(ATTENDANCE_PAGE_SIZE), ATTENDANCE_LIST_FIELDS).stream())
+    records = [Attendance.from_snapshot(doc) for doc in docs]
+    unnamed = [record for record in records if record.employee_name is None]
+    for record in unnamed:
+        record.employee_name = known_name(record.employee_id or "Unknown")
+    missing = {record.employee_id or "Unknown" for record in unnamed if record.employee_name is None}
+    if missing:
+        names = get_employee_names(missing)
+        for record in unnamed:
+            if record.employee_name is None:
+                record.employee_name = names[record.employee_id or "Unknown"]
+    return records, docs[-1] if len(docs) == ATTENDANCE_PAGE_SIZE else None
 
 def show_attendance_ui(container):
     for widget in container.winfo_children():
         widget.destroy()
 
+    roster = get_roster_index()
+    cursor = [None]  # where the next page starts; None once the last page is in
+
+    def known_name(emp_id):
+        return roster.name(emp_id, None)
+
+    def load_page(more=False):
+        def loaded(page):
+            rows, cursor[0] = page
+            if not more:
+                tree.delete(*tree.get_children())
+            for record in rows:
+                timestamp = record.timestamp
+                timestamp_str = timestamp.strftime("%Y-%m-%d %H:%M:%S") if isinstance(timestamp, datetime) else "Invalid"
+                tree.insert("", "end", iid=record.id, values=(record.get("employee_id", "Unknown"), record.employee_name,
+                                                              timestamp_str, record.get("status", "Unknown")))
+            buttons["Load More"][0].configure(state="normal" if cursor[0] is not None else "disabled")
+            search_records()
+
+        run_in_background(container, load_attendance, cursor[0] if more else None, known_name,
+                          on_success=loaded, busy=buttons["Refresh"] + buttons["Load More"],
+                          on_error=lambda e: messagebox.showerror("Error", f"Could not load attendance: {e}"))
+
     def fetch_attendance():
-        for i in tree.get_children():
-            tree.delete(i)
-
-        records = db.collection("attendance").stream()
-        for record in records:
-            data = record.to_dict()
-            emp_id = data.get("employee_id", "Unknown")
-            emp_name = get_employee_name_by_id(emp_id)
-            timestamp = data.get("timestamp")
-            status = data.get("status", "Unknown")
-            timestamp_str = timestamp.strftime("%Y-%m-%d %H:%M:%S") if isinstance(timestamp, datetime) else "Invalid"
-            tree.insert("", "end", iid=record.id, values=(emp_id, emp_name, timestamp_str, status))
+        # Names come from the shared roster index; only employees it lacks are read
+        with firestore_metrics.action("fetch_attendance"):
+            roster.ensure_loaded(container, then=load_page, busy=buttons["Refresh"])
+
+    def load_more():
+        if cursor[0] is not None:
+            with firestore_metrics.action("fetch_attendance"):
+                load_page(more=True)
 
     def update_status():
         selected = tree.selection()
@@ -49,12 +99,14 @@ def show_attendance_ui(container):
         record_id = selected[0]
         new_status = status_var.get()
 
-        try:
-            db.collection("attendance").document(record_id).update({"status": new_status})
+        def updated(_):
+            if tree.exists(record_id):
+                tree.set(record_id, "Status", new_status)
             messagebox.showinfo("Success", "Status updated.")
-            fetch_attendance()
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not update record: {e}")
+
+        run_in_background(container, db.collection("attendance").document(record_id).update, {"status": new_status},
+                          on_success=updated, busy=buttons["Update Status"],
+                          on_error=lambda e: messagebox.showerror("Error", f"Could not update record: {e}"))
 
     def delete_record():
         selected = tree.selection()
@@ -65,12 +117,14 @@ def show_attendance_ui(container):
         record_id = selected[0]
         confirm = messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this record?")
         if confirm:
-            try:
-                db.collection("attendance").document(record_id).delete()
+            def deleted(_):
+                if tree.exists(record_id):
+                    tree.delete(record_id)
                 messagebox.showinfo("Deleted", "Record deleted successfully.")
-                fetch_attendance()
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not delete record: {e}")
+
+            run_in_background(container, db.collection("attendance").document(record_id).delete,
+                              on_success=deleted, busy=buttons["Delete Record"],
+                              on_error=lambda e: messagebox.showerror("Error", f"Could not delete record: {e}"))
 
     def search_records(*_):
         query = search_var.get().lower()
@@ -106,11 +160,16 @@ def show_attendance_ui(container):
     # Action Buttons
     btn_frame = ttk.Frame(container)
     btn_frame.pack(pady=5)
+    buttons = {}
     for text, cmd, style in [
         ("Update Status", update_status, "success-outline"),
         ("Delete Record", delete_record, "danger-outline"),
-        ("Refresh", fetch_attendance, "info-outline")
+        ("Refresh", fetch_attendance, "info-outline"),
+        ("Load More", load_more, "secondary-outline"),
     ]:
-        ttk.Button(btn_frame, text=text, command=cmd, bootstyle=style, width=20).pack(side=LEFT, padx=10)
+        button = ttk.Button(btn_frame, text=text, command=cmd, bootstyle=style, width=20)
+        button.pack(side=LEFT, padx=10)
+        buttons[text] = [button]
 
     fetch_attendance()
+    return fetch_attendance
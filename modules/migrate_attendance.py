@@ -0,0 +1,129 @@
+"""Re-key attendance records as "<employee_id>_<YYYY-MM-DD>".
+
+Older records have random IDs and may hold several check-ins for the same
+employee and day. For each (employee, day) this keeps the earliest check-in,
+writes it under the deterministic ID and deletes the other documents, in
+batches. Safe to re-run: records already keyed correctly are left alone.
+
+    python modules/migrate_attendance.py --dry-run
+    python modules/migrate_attendance.py
+
+Exit codes: 0 = done, 1 = some batches failed, 2 = usage error.
+"""
+import argparse
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+BATCH_LIMIT = 500
+
+
+def init_db(credentials_path):
+    import firebase_app
+    firebase_app.configure(credentials_path)
+    return firebase_app.get_db()
+
+
+def record_day(data):
+    """The record's day as "YYYY-MM-DD", from ``date`` or else ``timestamp``."""
+    if data.get("date"):
+        return str(data["date"])
+    timestamp = data.get("timestamp")
+    if isinstance(timestamp, datetime):
+        return timestamp.date().isoformat()
+    return None
+
+
+def plan(docs):
+    """Group documents by target ID; return ``(moves, skipped)``.
+
+    ``moves`` maps each target ID to ``(keep, data, drop)``: the document
+    whose data is kept, that data (with ``date`` filled in) and the IDs of the
+    other documents to delete. Targets already in final shape are left out.
+    """
+    from attendance import attendance_id
+
+    groups, skipped = defaultdict(list), []
+    for doc in docs:
+        data = doc.to_dict()
+        day = record_day(data)
+        if not data.get("employee_id") or not day:
+            skipped.append(doc.id)
+            continue
+        groups[attendance_id(data["employee_id"], day)].append((doc.id, dict(data, date=day)))
+
+    moves = {}
+    for target, records in groups.items():
+        # The earliest check-in of the day wins
+        records.sort(key=lambda r: (r[1].get("timestamp") is None, str(r[1].get("timestamp", "")), r[0] != target))
+        keep, data = records[0]
+        drop = [doc_id for doc_id, _ in records if doc_id != target]
+        if keep == target and not drop:
+            continue
+        moves[target] = (keep, data, drop)
+    return moves, skipped
+
+
+def migrate(db, moves, dry_run=False):
+    """Apply ``moves`` in batches; returns ``(written, deleted, failed_batches)``."""
+    collection = db.collection("attendance")
+    written = deleted = failed = 0
+    batch, ops, pending = db.batch(), 0, (0, 0)
+
+    def commit():
+        nonlocal batch, ops, pending, written, deleted, failed
+        if ops:
+            try:
+                if not dry_run:
+                    batch.commit()
+                written += pending[0]
+                deleted += pending[1]
+            except Exception as e:
+                failed += 1
+                print(f"Batch failed: {e}", file=sys.stderr)
+        batch, ops, pending = db.batch(), 0, (0, 0)
+
+    for target, (keep, data, drop) in moves.items():
+        # A target's set and deletes share a batch so it is never half-moved
+        if ops + 1 + len(drop) > BATCH_LIMIT:
+            commit()
+        batch.set(collection.document(target), data)
+        for doc_id in drop:
+            batch.delete(collection.document(doc_id))
+        ops += 1 + len(drop)
+        pending = (pending[0] + 1, pending[1] + len(drop))
+    commit()
+    return written, deleted, failed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Re-key and de-duplicate attendance records.")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--credentials", help="service account key (default: $GOOGLE_APPLICATION_CREDENTIALS or modules/serviceAccountKey.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        db = init_db(args.credentials)
+    except Exception as e:
+        print(f"Failed to initialize Firebase: {e}", file=sys.stderr)
+        return 1
+
+    moves, skipped = plan(db.collection("attendance").stream())
+    duplicates = sum(len(drop) - (keep != target) for target, (keep, _, drop) in moves.items())
+    print(f"{len(moves)} record(s) to re-key, {duplicates} duplicate(s) to remove, "
+          f"{len(skipped)} record(s) without employee_id/date left as is")
+    written, deleted, failed = migrate(db, moves, args.dry_run)
+    if args.dry_run:
+        print(f"Would write {written} record(s) and delete {deleted} old document(s)")
+    else:
+        print(f"Wrote {written} record(s) and deleted {deleted} old document(s)")
+    if failed:
+        print(f"{failed} batch(es) failed; re-run to retry", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
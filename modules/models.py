@@ -0,0 +1,197 @@
+import sys
+from enum import Enum
+
+# --- Record models ---
+# Compact, typed stand-ins for the raw Firestore dicts. Each record stores its
+# fields in __slots__ (no per-instance dict), categorical values are shared enum
+# members and repeated strings (IDs, dates, names) are interned, so large
+# lists such as a season of attendance take a fraction of the memory. Records
+# also answer ``get("Date of Birth")`` etc. with the Firestore field names, so
+# code written against dicts (reports, exports) keeps working unchanged.
+
+
+class StrEnum(str, Enum):
+    """A str Enum that prints, formats, hashes and serializes as its value."""
+    __str__ = str.__str__
+    __format__ = str.__format__
+    __hash__ = str.__hash__
+
+    @classmethod
+    def parse(cls, value):
+        """The member for ``value``; unknown values are kept as interned strings."""
+        try:
+            return cls(value)
+        except ValueError:
+            return sys.intern(value) if isinstance(value, str) else value
+
+
+class TaskStatus(StrEnum):
+    PENDING = "Pending"
+    IN_PROGRESS = "In Progress"
+    COMPLETED = "Completed"
+    INCOMPLETE = "Incomplete"
+
+
+class Priority(StrEnum):
+    HIGH = "High"
+    MEDIUM = "Medium"
+    LOW = "Low"
+
+
+class Role(StrEnum):
+    # Roles can be added in the UI; those parse to interned strings
+    MANAGER = "Manager"
+    HOUSEKEEPING = "Housekeeping"
+    SUPERVISOR = "Supervisor"
+    MACHINE_OPERATOR = "Machine Operator"
+
+
+class Gender(StrEnum):
+    MALE = "Male"
+    FEMALE = "Female"
+    OTHER = "Other"
+
+
+class AttendanceStatus(StrEnum):
+    PRESENT = "Present"
+    ABSENT = "Absent"
+    LATE = "Late"
+
+
+def intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Record:
+    """Base for slot records. ``FIELDS`` lists ``(attribute, firestore_field, parse)``."""
+    __slots__ = ("id",)
+    FIELDS = ()
+    _by_key = {"id": "id"}
+    _parsers = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._by_key = {"id": "id"}
+        cls._parsers = {}
+        for attr, key, parse in cls.FIELDS:
+            cls._by_key[key] = attr
+            cls._by_key[attr] = attr
+            cls._parsers[attr] = parse
+
+    def __init__(self, id=None, **values):
+        self.id = id
+        for attr, _, parse in self.FIELDS:
+            value = values.get(attr)
+            setattr(self, attr, parse(value) if parse and value is not None else value)
+
+    @classmethod
+    def from_dict(cls, data, id=None):
+        """Build from a Firestore-style dict; ``id`` defaults to ``data["id"]``."""
+        record = cls.__new__(cls)
+        record.id = id if id is not None else data.get("id")
+        for attr, key, parse in cls.FIELDS:
+            value = data.get(key)
+            setattr(record, attr, parse(value) if parse and value is not None else value)
+        return record
+
+    @classmethod
+    def from_snapshot(cls, doc):
+        return cls.from_dict(doc.to_dict() or {}, doc.id)
+
+    def to_dict(self, with_id=False):
+        """The Firestore-style dict (fields that are set only)."""
+        data = {"id": self.id} if with_id else {}
+        for attr, key, _ in self.FIELDS:
+            value = getattr(self, attr)
+            if value is not None:
+                data[key] = value
+        return data
+
+    def replace(self, **values):
+        """A copy with some fields changed (attribute or Firestore names)."""
+        record = type(self).from_dict(self.to_dict(), self.id)
+        for key, value in values.items():
+            attr = self._by_key[key]
+            parse = self._parsers.get(attr)
+            setattr(record, attr, parse(value) if parse and value is not None else value)
+        return record
+
+    # Dict-style read access by Firestore field name or attribute name
+    def get(self, key, default=None):
+        attr = self._by_key.get(key)
+        value = getattr(self, attr) if attr else None
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        attr = self._by_key.get(key)
+        if attr is None or getattr(self, attr) is None:
+            raise KeyError(key)
+        return getattr(self, attr)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def values(self):
+        """The ID and every set field value, like ``to_dict(with_id=True).values()``."""
+        return [v for v in [self.id] + [getattr(self, attr) for attr, _, _ in self.FIELDS] if v is not None]
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, s) == getattr(other, s) for s in ("id",) + self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{attr}={getattr(self, attr)!r}" for attr, _, _ in self.FIELDS if getattr(self, attr) is not None)
+        return f"{type(self).__name__}(id={self.id!r}, {fields})"
+
+
+class Employee(Record):
+    FIELDS = (
+        ("name", "Name", None),
+        ("role", "Role", Role.parse),
+        ("contact", "Contact", None),
+        ("gender", "Gender", Gender.parse),
+        ("age", "Age", None),
+        ("date_of_birth", "Date of Birth", None),
+        ("bank_name", "Bank Name", intern),
+        ("account_number", "Account Number", None),
+        ("ifsc_code", "IFSC Code", intern),
+        ("badge_id", "badge_id", None),
+        ("last_updated", "last_updated", None),
+    )
+    __slots__ = tuple(attr for attr, _, _ in FIELDS)
+
+
+class Task(Record):
+    FIELDS = (
+        ("task", "task", intern),
+        ("assign_to", "assign_to", intern),
+        ("priority", "priority", Priority.parse),
+        ("deadline", "deadline", intern),
+        ("status", "status", TaskStatus.parse),
+        ("timestamp", "timestamp", None),
+        ("last_updated", "last_updated", None),
+        ("last_remark", "last_remark", None),
+    )
+    __slots__ = tuple(attr for attr, _, _ in FIELDS)
+
+
+class Attendance(Record):
+    FIELDS = (
+        ("employee_id", "employee_id", intern),
+        ("employee_name", "employee_name", intern),
+        ("timestamp", "timestamp", None),
+        ("date", "date", intern),
+        ("status", "status", AttendanceStatus.parse),
+        ("first_in", "first_in", None),
+        ("last_out", "last_out", None),
+        ("punches", "punches", None),
+        ("source", "source", intern),
+    )
+    __slots__ = tuple(attr for attr, _, _ in FIELDS)
+
+
+# Model for each collection that has one
+MODELS = {"employees": Employee, "tasks": Task, "attendance": Attendance}
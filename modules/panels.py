@@ -0,0 +1,98 @@
+import os
+import time
+from collections import OrderedDict
+
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+import firestore_metrics
+
+# --- Panel cache ---
+# Each admin panel is built once into its own frame and kept (widgets and data)
+# while the user switches between panels; switching only packs and unpacks
+# frames. At most PANEL_BUDGET hidden panels are kept, the least recently used
+# is destroyed first and rebuilt on its next visit. A panel builder may return
+# a refresh function, or a ``(refresh, teardown)`` pair. Refresh runs when a
+# kept panel is shown again after STALE_SECONDS, or when ``refresh()`` is
+# called explicitly; teardown (stop subscriptions, timers and in-flight loads)
+# runs before the panel's frame is destroyed. Building and
+# refreshing run as the firestore_metrics actions "open <name> panel" and
+# "refresh <name> panel", so their Firestore cost is tracked per panel.
+PANEL_BUDGET = int(os.environ.get("EMS_PANEL_BUDGET", "4"))
+STALE_SECONDS = 300
+
+
+class Panel:
+    def __init__(self, name, frame, refresh=None, teardown=None):
+        self.name = name
+        self.frame = frame
+        self.refresh = refresh
+        self.teardown = teardown
+        self.refreshed_at = time.monotonic()
+
+
+class PanelManager:
+    def __init__(self, container, budget=PANEL_BUDGET, stale_after=STALE_SECONDS):
+        self.container = container
+        self.budget = budget
+        self.stale_after = stale_after
+        self.panels = OrderedDict()  # name -> Panel, least recently shown first
+        self.current = None
+
+    def show(self, name, build):
+        """Show panel ``name``, building it with ``build(frame)`` if it is not kept."""
+        panel = self.panels.get(name)
+        if panel is not None and not panel.frame.winfo_exists():
+            self.evict(name)
+            panel = None
+
+        if self.current is not None and self.current != name and self.current in self.panels:
+            self.panels[self.current].frame.pack_forget()
+
+        if panel is None:
+            frame = ttk.Frame(self.container)
+            frame.pack(fill=BOTH, expand=True)
+            with firestore_metrics.action(f"open {name} panel"):
+                hooks = build(frame)
+            panel = Panel(name, frame, *(hooks if isinstance(hooks, tuple) else (hooks,)))
+            self.panels[name] = panel
+        else:
+            if self.current != name:
+                panel.frame.pack(fill=BOTH, expand=True)
+            if time.monotonic() - panel.refreshed_at >= self.stale_after:
+                self._refresh(panel)
+
+        panel.frame.tkraise()
+        self.panels.move_to_end(name)
+        self.current = name
+        self._evict()
+        return panel
+
+    def refresh(self, name=None):
+        """Re-run the refresh hook of ``name`` (default: the visible panel)."""
+        panel = self.panels.get(name or self.current)
+        if panel is not None:
+            self._refresh(panel)
+
+    def _refresh(self, panel):
+        panel.refreshed_at = time.monotonic()
+        if panel.refresh is not None:
+            with firestore_metrics.action(f"refresh {panel.name} panel"):
+                panel.refresh()
+
+    def evict(self, name):
+        panel = self.panels.pop(name, None)
+        if panel is not None:
+            if panel.teardown is not None:
+                panel.teardown()
+            panel.frame.destroy()
+        if self.current == name:
+            self.current = None
+
+    def _evict(self):
+        # The visible panel is always the most recent, so never evicted here
+        while len(self.panels) > self.budget + 1:
+            self.evict(next(iter(self.panels)))
+
+    def clear(self):
+        for name in list(self.panels):
+            self.evict(name)
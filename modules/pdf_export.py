@@ -0,0 +1,266 @@
+import os
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# --- PDF Export Engine ---
+# Records are streamed, wrapped and paginated in the calling process; pages are
+# then rendered in batches by worker processes into part files which are merged
+# in order. reportlab is imported lazily so the engine costs nothing until used,
+# and pypdf (for merging) is optional: without it pages render in-process.
+
+FONT = "Helvetica"
+FONT_BOLD = "Helvetica-Bold"
+FONT_SIZE = 8
+LEADING = 10
+CELL_PAD = 3
+MARGIN = 30
+MAX_CELL_LINES = 3
+PAGES_PER_PART = 25
+
+
+def _pagesize(landscape_mode=True):
+    from reportlab.lib.pagesizes import A4, landscape
+    return landscape(A4) if landscape_mode else A4
+
+
+def make_layout(title, columns, weights=None, landscape_mode=True):
+    """Compute column widths that fit the page. ``weights`` sets relative widths."""
+    page_w, page_h = _pagesize(landscape_mode)
+    weights = weights or [max(len(str(c)), 8) for c in columns]
+    usable = page_w - 2 * MARGIN
+    total = float(sum(weights))
+    return {
+        "title": title,
+        "columns": list(columns),
+        "widths": [usable * w / total for w in weights],
+        "pagesize": (page_w, page_h),
+    }
+
+
+def _wrap(text, width):
+    from reportlab.lib.utils import simpleSplit
+    lines = simpleSplit(str(text), FONT, FONT_SIZE, width - 2 * CELL_PAD) or [""]
+    if len(lines) > MAX_CELL_LINES:
+        lines = lines[:MAX_CELL_LINES]
+        lines[-1] = lines[-1][:-1] + "…"
+    return lines
+
+
+def _row_height(cells):
+    return max(len(lines) for lines in cells) * LEADING + 2 * CELL_PAD
+
+
+def _body_height(layout):
+    header_h = LEADING + 2 * CELL_PAD
+    # title block at the top, footer at the bottom
+    return layout["pagesize"][1] - 2 * MARGIN - 30 - header_h - 15
+
+
+def paginate(layout, rows):
+    """Yield pages (lists of wrapped rows) from an iterable of row value lists."""
+    available = _body_height(layout)
+    page, used = [], 0
+    for values in rows:
+        cells = [_wrap(v, w) for v, w in zip(values, layout["widths"])]
+        height = _row_height(cells)
+        if page and used + height > available:
+            yield page
+            page, used = [], 0
+        page.append(cells)
+        used += height
+    if page:
+        yield page
+
+
+def _draw_row(c, layout, y, cells, font, fill=None):
+    height = _row_height(cells)
+    x = MARGIN
+    if fill is not None:
+        c.setFillGray(fill)
+        c.rect(MARGIN, y - height, sum(layout["widths"]), height, stroke=0, fill=1)
+        c.setFillGray(0)
+    c.setFont(font, FONT_SIZE)
+    for lines, width in zip(cells, layout["widths"]):
+        c.rect(x, y - height, width, height, stroke=1, fill=0)
+        for i, line in enumerate(lines):
+            c.drawString(x + CELL_PAD, y - CELL_PAD - FONT_SIZE - i * LEADING, line)
+        x += width
+    return y - height
+
+
+def _draw_pages(c, layout, pages, first_page):
+    page_w, page_h = layout["pagesize"]
+    header = [[str(col)] for col in layout["columns"]]
+    c.setLineWidth(0.3)
+    for number, page in enumerate(pages, start=first_page):
+        c.setFont(FONT_BOLD, 12)
+        c.drawString(MARGIN, page_h - MARGIN - 12, layout["title"])
+        y = _draw_row(c, layout, page_h - MARGIN - 30, header, FONT_BOLD, fill=0.9)
+        for cells in page:
+            y = _draw_row(c, layout, y, cells, FONT)
+        c.setFont(FONT, 7)
+        c.drawRightString(page_w - MARGIN, MARGIN - 10, f"Page {number}")
+        c.showPage()
+
+
+def _render_part(job):
+    """Worker entry point: render a batch of pages into its own PDF file."""
+    from reportlab.pdfgen import canvas
+    path, layout, pages, first_page = job
+    c = canvas.Canvas(path, pagesize=layout["pagesize"])
+    _draw_pages(c, layout, pages, first_page)
+    c.save()
+    return path
+
+
+def _merge(parts, path):
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(part)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def _can_merge():
+    try:
+        import pypdf  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _batches(pages, size):
+    batch = []
+    for page in pages:
+        batch.append(page)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export_table(path, title, columns, records, weights=None, workers=None, pages_per_part=PAGES_PER_PART):
+    """Write ``records`` (an iterable of dicts) as a paginated table PDF at ``path``.
+
+    Records are consumed lazily and at most ``2 * workers`` page batches are held
+    in memory at once. Returns the number of pages written.
+    """
+    from reportlab.pdfgen import canvas
+    layout = make_layout(title, columns, weights)
+    rows = ([record.get(col, "") for col in columns] for record in records)
+    batches = _batches(paginate(layout, rows), pages_per_part)
+    workers = workers or os.cpu_count() or 1
+
+    first = next(batches, [])
+    second = next(batches, None)
+    if second is None or workers <= 1 or not _can_merge():
+        # Small exports (or no merge support): render in-process into a single file
+        c = canvas.Canvas(path, pagesize=layout["pagesize"])
+        page_count = 0
+        for batch in [first] if second is None else _chain(first, second, batches):
+            _draw_pages(c, layout, batch, page_count + 1)
+            page_count += len(batch)
+        if page_count == 0:
+            _draw_pages(c, layout, [[]], 1)
+            page_count = 1
+        c.save()
+        return page_count
+
+    tmp_dir = tempfile.mkdtemp(prefix="pdf_export_")
+    try:
+        parts, pending, page_count = [], deque(), 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for index, batch in enumerate(_chain(first, second, batches)):
+                part = os.path.join(tmp_dir, f"part_{index:05d}.pdf")
+                parts.append(part)
+                pending.append(pool.submit(_render_part, (part, layout, batch, page_count + 1)))
+                page_count += len(batch)
+                # Backpressure: don't paginate far ahead of the workers
+                while len(pending) >= 2 * workers:
+                    pending.popleft().result()
+            while pending:
+                pending.popleft().result()
+        _merge(parts, path)
+        return page_count
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _chain(first, second, rest):
+    yield first
+    yield second
+    yield from rest
+
+
+# --- Payslips ---
+PAYSLIP_ROWS = [
+    ("Employee Name", "employee_name"),
+    ("Employee ID", "employee_id"),
+    ("Gender", "gender"),
+    ("Days Worked", "total_days"),
+    ("Wage / Day", "wage_per_day"),
+    ("Gross Wage", "gross_wage"),
+    ("Wage Deduction (0.75%)", "wage_deduction"),
+    ("Total Wage", "total_wage"),
+    ("Canteen Deduction", "canteen_deduction"),
+    ("Total Salary", "total_salary"),
+]
+
+
+def payslip_filename(record):
+    name = "".join(ch if ch.isalnum() else "_" for ch in str(record.get("employee_name") or "employee"))
+    parts = ["payslip", name] + ([str(record["id"])] if record.get("id") else [])
+    return "_".join(parts) + ".pdf"
+
+
+def render_payslip(job):
+    """Worker entry point: render one salary record to its own payslip PDF."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    path, record, period = job
+    record = dict(record)
+    try:
+        gross = float(record.get("total_days", 0)) * float(record.get("wage_per_day", 0))
+        record.setdefault("gross_wage", f"{gross:.2f}")
+        record.setdefault("wage_deduction", f"{gross * 0.0075:.2f}")
+    except (TypeError, ValueError):
+        pass
+
+    page_w, page_h = A4
+    c = canvas.Canvas(path, pagesize=A4)
+    c.setFont(FONT_BOLD, 16)
+    c.drawString(MARGIN * 2, page_h - MARGIN * 3, "Payslip")
+    c.setFont(FONT, 10)
+    if period:
+        c.drawString(MARGIN * 2, page_h - MARGIN * 3 - 18, f"Period: {period}")
+    y = page_h - MARGIN * 3 - 50
+    for label, key in PAYSLIP_ROWS:
+        value = record.get(key, "")
+        if isinstance(value, float):
+            value = f"{value:.2f}"
+        c.setFont(FONT_BOLD if key == "total_salary" else FONT, 11)
+        c.drawString(MARGIN * 2, y, label)
+        c.drawRightString(page_w - MARGIN * 2, y, str(value))
+        c.line(MARGIN * 2, y - 5, page_w - MARGIN * 2, y - 5)
+        y -= 24
+    c.showPage()
+    c.save()
+    return path
+
+
+def export_payslips(records, out_dir, period="", workers=None):
+    """Render one payslip PDF per salary record into ``out_dir`` in parallel.
+
+    Returns the list of files written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = ((os.path.join(out_dir, payslip_filename(r)), r, period) for r in records)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        return [render_payslip(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(render_payslip, jobs, chunksize=32))
@@ -0,0 +1,27 @@
+# --- Field Projections ---
+# List screens declare the document fields they display and fetch only those,
+# so unused (and sensitive) fields such as bank details never leave Firestore.
+# firebase_admin is imported on first use, not when a panel module is imported.
+
+
+def field_path(name):
+    """Return a Firestore field path for ``name``, quoting names with spaces."""
+    from firebase_admin import firestore
+    return firestore.FieldPath(name).to_api_repr()
+
+
+def project(query, columns):
+    """Limit ``query`` to the given columns. The document ID is always returned."""
+    fields = [field_path(c) for c in columns if c != "id"]
+    return query.select(fields) if fields else query
+
+
+def ids_only(query):
+    """Limit ``query`` to document IDs only."""
+    from firebase_admin import firestore
+    return query.select([firestore.FieldPath.document_id()])
+
+
+def get_fields(doc_ref, columns):
+    """Fetch a single document with only the given columns."""
+    return doc_ref.get(field_paths=[field_path(c) for c in columns if c != "id"])
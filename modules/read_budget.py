@@ -0,0 +1,396 @@
+"""Firestore read/write cost per user action, and a budget gate for CI.
+
+Profiling mode: run any GUI with --read-budget (or EMS_READ_BUDGET=1). Every
+document read, written and deleted is credited to the actions it ran under
+(panel opens and refreshes, "fetch_tasks", "generate_report", the portal's
+"auto_refresh" tick, ...). On exit ledger.json and ledger.txt, with counts
+and estimated cost per run, are written to read_budget/ (EMS_READ_BUDGET_DIR).
+
+Budget gate: seed the Firestore emulator with synthetic data, open each panel
+with its real builder in a hidden window (once to warm the snapshot, then
+measured) and compare the reads with read_budgets.json. A budget is "base"
+documents plus "per_100" documents per 100 employees, tasks or attendance
+records, e.g. ``{"reads": {"base": 2, "per_100": {"employees": 0.1}}}``.
+Needs a display (xvfb-run on CI); tests/test_read_budgets.py runs it.
+
+    gcloud emulators firestore start --host-port=localhost:8080 &
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python modules/read_budget.py --seed --employees 500 --tasks 5000
+
+Exit codes: 0 = within budget, 1 = over budget or a scenario failed, 2 = usage error.
+"""
+import argparse
+import atexit
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import firestore_metrics
+
+ENABLED = "--read-budget" in sys.argv or os.environ.get("EMS_READ_BUDGET") == "1"
+LEDGER_DIR = os.environ.get("EMS_READ_BUDGET_DIR", "read_budget")
+BUDGETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "read_budgets.json")
+SCALE_KINDS = ("employees", "tasks", "attendance")
+BATCH_LIMIT = 500
+
+# Firestore list prices in USD per 100,000 documents (Standard edition,
+# us multi-region); set these to your region's prices. The free tier is ignored.
+PRICES_PER_100K = {
+    "reads": float(os.environ.get("EMS_PRICE_READS", "0.06")),
+    "writes": float(os.environ.get("EMS_PRICE_WRITES", "0.18")),
+    "deletes": float(os.environ.get("EMS_PRICE_DELETES", "0.02")),
+}
+
+
+# --- Cost ledger ---
+class CostLedger:
+    """Documents read, written and deleted per action (a firestore_metrics listener)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.entries = {}
+
+    def __call__(self, op, collection, module, actions, documents, seconds, failed):
+        kind = "reads" if op in firestore_metrics.READ_OPS else "deletes" if op == "delete" else "writes"
+        # A query that matches nothing is still billed one read
+        amount = max(documents, 1) if kind == "reads" else documents
+        with self._lock:
+            for name in dict.fromkeys(actions or ("(untagged)",)):
+                entry = self.entries.setdefault(name, {"calls": 0, "reads": 0, "writes": 0, "deletes": 0})
+                entry["calls"] += 1
+                entry[kind] += amount
+
+    def reset(self):
+        with self._lock:
+            self.entries.clear()
+
+    def report(self, runs=None):
+        """``{action: {calls, reads, writes, deletes, runs, cost, cost_per_run}}``, costliest first."""
+        runs = firestore_metrics.runs() if runs is None else runs
+        with self._lock:
+            entries = {name: dict(entry) for name, entry in self.entries.items()}
+        for name, entry in entries.items():
+            entry["runs"] = runs.get(name, 0)
+            entry["cost"] = estimate_cost(entry)
+            entry["cost_per_run"] = entry["cost"] / entry["runs"] if entry["runs"] else entry["cost"]
+        return dict(sorted(entries.items(), key=lambda item: -item[1]["cost"]))
+
+
+def estimate_cost(counts):
+    return sum(counts.get(kind, 0) * price / 100000 for kind, price in PRICES_PER_100K.items())
+
+
+def format_ledger(report):
+    lines = [f"{'Action':<36} {'Runs':>6} {'Reads':>9} {'Writes':>8} {'Deletes':>8} {'Reads/run':>10} {'USD/1000 runs':>14}"]
+    for name, entry in report.items():
+        per_run = entry["runs"] or 1
+        lines.append(f"{name:<36} {entry['runs']:>6} {entry['reads']:>9} {entry['writes']:>8} {entry['deletes']:>8} "
+                     f"{entry['reads'] / per_run:>10.1f} {entry['cost_per_run'] * 1000:>14.4f}")
+    lines.append("Prices (USD per 100k): " + ", ".join(f"{k} {v}" for k, v in PRICES_PER_100K.items()))
+    return "\n".join(lines)
+
+
+_ledger = None
+
+
+def install():
+    """Start the session ledger when profiling mode is on (called once the Firestore client exists)."""
+    global _ledger
+    if not ENABLED or _ledger is not None:
+        return
+    if not firestore_metrics.ENABLED:
+        print("--read-budget needs Firestore metrics (unset EMS_FIRESTORE_METRICS=0)")
+        return
+    _ledger = CostLedger()
+    firestore_metrics.add_listener(_ledger)
+    atexit.register(write_ledger)
+
+
+def write_ledger(directory=LEDGER_DIR):
+    if _ledger is None:
+        return
+    report = _ledger.report()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "ledger.json"), "w", encoding="utf-8") as f:
+            json.dump({"prices_per_100k": PRICES_PER_100K, "actions": report}, f, indent=2)
+        with open(os.path.join(directory, "ledger.txt"), "w", encoding="utf-8") as f:
+            f.write(format_ledger(report) + "\n")
+    except OSError as e:
+        print(f"Could not write the read budget ledger: {e}")
+
+
+# --- Scenarios (what each screen load reads) ---
+# Panels are opened with their real builders (employee_management.PANELS) in a
+# withdrawn window, and the Tk loop is pumped until every background load they
+# started, and the work their callbacks chained on, is done. Each one is
+# measured as on a fresh app start with a warm snapshot: the shared roster
+# index is dropped first. Reads by the change feed's listeners are credited to
+# "change_feed", not to the panel that subscribed.
+SCENARIO_TIMEOUT = 300
+
+
+class HeadlessApp:
+    """A withdrawn admin window that opens panels the way the app does."""
+
+    def __init__(self):
+        import ttkbootstrap as ttk
+        from panels import PanelManager
+        self.root = ttk.Window(themename="flatly")
+        self.root.withdraw()
+        container = ttk.Frame(self.root)
+        container.pack(fill="both", expand=True)
+        self.panels = PanelManager(container)
+        self.errors = []
+        _capture_dialogs(self.errors)
+
+    def open_panel(self, name):
+        import employee_management
+        from startup_timing import timed_import
+        module_name, function_name = employee_management.PANELS[name]
+        try:
+            self.panels.show(name, getattr(timed_import(module_name), function_name))
+            self.wait()
+        finally:
+            self.panels.clear()
+
+    def wait(self, timeout=SCENARIO_TIMEOUT):
+        """Pump the Tk loop until no background call is running; raise on error dialogs."""
+        from background import in_flight
+        deadline = time.monotonic() + timeout
+        self.root.update()
+        while in_flight():
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"still loading after {timeout}s")
+            time.sleep(0.01)
+            self.root.update()
+        if self.errors:
+            errors, self.errors[:] = "; ".join(self.errors), []
+            raise RuntimeError(errors)
+
+    def close(self):
+        self.panels.clear()
+        self.root.destroy()
+
+
+def _capture_dialogs(errors):
+    # Headless, a dialog would wait for a click forever: errors fail the scenario instead
+    from tkinter import messagebox
+
+    def error(title=None, message=None, **options):
+        errors.append(f"{title}: {message}")
+
+    messagebox.showerror = messagebox.showwarning = error
+    messagebox.showinfo = lambda *args, **kwargs: "ok"
+    messagebox.askyesno = lambda *args, **kwargs: False
+
+
+def open_panel(name):
+    def scenario(db, scale, app):
+        app.open_panel(name)
+    return scenario
+
+
+def generate_attendance_report(db, scale, app):
+    from report_queries import fetch_report
+    with firestore_metrics.action("generate_report"):
+        fetch_report(db, "Attendance")
+
+
+def auto_refresh_tick(db, scale, app):
+    from employee_portal_integrated import load_employee_tasks
+    from snapshot_store import utc_now_iso
+    with firestore_metrics.action("auto_refresh"):
+        load_employee_tasks(scale["sample_employee"], since=utc_now_iso())
+
+
+# Named like the actions the GUI records, so budgets read the same in both
+SCENARIOS = {
+    "open Dashboard panel": open_panel("Dashboard"),
+    "open Task panel": open_panel("Task"),
+    "open Salary panel": open_panel("Salary"),
+    "open Attendance panel": open_panel("Attendance"),
+    "generate_report": generate_attendance_report,
+    "auto_refresh": auto_refresh_tick,
+}
+
+
+def run_scenarios(db, scale, names, ledger):
+    """Run ``names`` once to warm the snapshot, then again measured; returns the names that failed."""
+    from roster_index import reset_roster_index
+    app = HeadlessApp()
+    failed = []
+    try:
+        for measured in (False, True):
+            if measured:
+                ledger.reset()
+                firestore_metrics.reset()
+            for name in names:
+                reset_roster_index()
+                try:
+                    SCENARIOS[name](db, scale, app)
+                except Exception as e:
+                    if measured:
+                        failed.append(name)
+                        print(f"{name}: failed: {e}", file=sys.stderr)
+    finally:
+        reset_roster_index()
+        app.close()
+    return failed
+
+
+# Attendance of former employees (no longer on the roster), named by the batched lookup
+EX_EMPLOYEES = 3
+
+
+def seed(db, employees, tasks, attendance_days):
+    """Write synthetic employees, tasks and attendance (emulator only); returns the scale.
+
+    ``last_updated`` stamps are a day old and ten minutes apart, as after
+    ordinary use, so a warm snapshot's delta re-reads one document, not all.
+    Every fifth employee's attendance has no ``employee_name``, as in records
+    written before names were stored.
+    """
+    from attendance import attendance_id, attendance_record
+
+    batch, pending = db.batch(), 0
+
+    def put(collection, doc_id, data):
+        nonlocal batch, pending
+        batch.set(db.collection(collection).document(doc_id), data)
+        pending += 1
+        if pending == BATCH_LIMIT:
+            batch.commit()
+            batch, pending = db.batch(), 0
+
+    updated, today = datetime.utcnow() - timedelta(days=1), date.today()
+
+    def stamp(i):
+        return (updated - timedelta(minutes=10 * i)).isoformat()
+
+    roles, statuses = ["Manager", "Housekeeping", "Supervisor", "Machine Operator"], ["Pending", "In Progress", "Completed", "Incomplete"]
+    for i in range(1, employees + 1):
+        put("employees", str(i), {"id": str(i), "Name": f"Employee {i}", "Role": roles[i % len(roles)],
+                                  "badge_id": f"B{i:05d}", "last_updated": stamp(i)})
+    for i in range(tasks):
+        put("tasks", f"task-{i}", {"task": "Cleaning", "assign_to": str(i % employees + 1), "priority": "Medium",
+                                   "deadline": (today + timedelta(days=i % 30 - 10)).isoformat(),
+                                   "status": statuses[i % len(statuses)], "timestamp": time.time(), "last_updated": stamp(i)})
+    ex_employees = [str(employees + 1000 + i) for i in range(EX_EMPLOYEES)]
+    for day in range(attendance_days):
+        when = datetime.combine(today - timedelta(days=day), datetime.min.time()).replace(hour=9)
+        for i, emp_id in enumerate([str(i) for i in range(1, employees + 1)] + ex_employees, 1):
+            record = attendance_record(emp_id, f"Employee {emp_id}", when + timedelta(seconds=i))
+            if i % 5 == 0 or emp_id in ex_employees:
+                del record["employee_name"]
+            put("attendance", attendance_id(emp_id, when), record)
+    if pending:
+        batch.commit()
+    return {"employees": employees, "tasks": tasks, "attendance": (employees + EX_EMPLOYEES) * attendance_days,
+            "sample_employee": "1"}
+
+
+def measure_scale(db):
+    from task_summary import count_query
+    scale = {kind: count_query(db.collection(kind)) for kind in SCALE_KINDS}
+    first = list(db.collection("employees").limit(1).stream())
+    scale["sample_employee"] = first[0].id if first else "1"
+    return scale
+
+
+# --- Budget gate ---
+def budget_limit(budget, scale):
+    """Allowed documents for ``{"base": n, "per_100": {kind: n}}`` at this scale."""
+    return budget.get("base", 0) + sum(rate * scale[kind] / 100 for kind, rate in budget.get("per_100", {}).items())
+
+
+def load_budgets(path):
+    with open(path, encoding="utf-8") as f:
+        budgets = json.load(f)
+    for name, kinds in budgets.items():
+        for kind, budget in kinds.items():
+            unknown = set(budget.get("per_100", {})) - set(SCALE_KINDS)
+            if kind not in ("reads", "writes", "deletes") or unknown:
+                raise ValueError(f"{name}: bad budget {kind} {budget} (scale by {', '.join(SCALE_KINDS)})")
+    return budgets
+
+
+def check(report, budgets, scale):
+    """``[(action, kind, used, limit, ok)]`` for every budgeted action that ran."""
+    results = []
+    for name, kinds in budgets.items():
+        entry = report.get(name)
+        if entry is None:
+            continue
+        for kind, budget in kinds.items():
+            limit = budget_limit(budget, scale)
+            results.append((name, kind, entry[kind], limit, entry[kind] <= limit))
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure Firestore reads per screen load and check them against budgets.")
+    parser.add_argument("--budgets", default=BUDGETS_PATH, help="Budget file (JSON)")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="Run only these (repeatable)")
+    parser.add_argument("--seed", action="store_true", help="Seed synthetic data first (emulator only)")
+    parser.add_argument("--employees", type=int, default=200)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--attendance-days", type=int, default=1)
+    parser.add_argument("--ledger", help="Also write the ledger as JSON to this file")
+    parser.add_argument("--snapshot", help="Warm-start snapshot file to use (default: a new temporary one)")
+    parser.add_argument("--credentials", help="service account key (default: $GOOGLE_APPLICATION_CREDENTIALS or modules/serviceAccountKey.json)")
+    args = parser.parse_args(argv)
+    if args.employees < 1 or args.tasks < 0 or args.attendance_days < 0:
+        parser.error("--employees must be at least 1, --tasks and --attendance-days not negative")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    import firebase_app
+    if args.seed and not firebase_app.EMULATOR_HOST:
+        print("--seed writes synthetic data and only runs against the emulator (set FIRESTORE_EMULATOR_HOST)", file=sys.stderr)
+        return 2
+    try:
+        budgets = load_budgets(args.budgets)
+    except (OSError, ValueError) as e:
+        print(f"{args.budgets}: {e}", file=sys.stderr)
+        return 2
+    if not firestore_metrics.ENABLED:
+        print("Firestore metrics are off (EMS_FIRESTORE_METRICS=0); nothing to measure", file=sys.stderr)
+        return 2
+
+    # Before anything opens the snapshot: the gate must not see (or touch) the app's own
+    os.environ["EMS_SNAPSHOT_PATH"] = args.snapshot or os.path.join(tempfile.mkdtemp(prefix="read_budget"), "snapshot.sqlite3")
+    firebase_app.configure(args.credentials)
+    try:
+        db = firebase_app.get_db()
+        scale = seed(db, args.employees, args.tasks, args.attendance_days) if args.seed else measure_scale(db)
+    except Exception as e:
+        print(f"Failed to prepare Firestore: {e}", file=sys.stderr)
+        return 1
+
+    ledger = CostLedger()
+    firestore_metrics.add_listener(ledger)
+    failed = run_scenarios(db, scale, args.scenario or list(SCENARIOS), ledger)
+
+    report = {name: entry for name, entry in ledger.report().items() if name in SCENARIOS}
+    print(f"Scale: {scale['employees']} employees, {scale['tasks']} tasks, {scale['attendance']} attendance records")
+    print(format_ledger(report))
+    if args.ledger:
+        with open(args.ledger, "w", encoding="utf-8") as f:
+            json.dump({"scale": scale, "prices_per_100k": PRICES_PER_100K, "actions": report, "failed": failed}, f, indent=2)
+
+    print()
+    over = False
+    for name, kind, used, limit, ok in check(report, budgets, scale):
+        print(f"{'ok  ' if ok else 'OVER'} {name}: {used} {kind} (budget {limit:g})")
+        over = over or not ok
+    return 1 if failed or over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""Headless report and payroll generation.
+
+Runs the same report definitions as the Reports panel without importing any
+Tk/ttkbootstrap code, so it can be scheduled (cron / Task Scheduler) outside
+peak hours. Example:
+
+    python modules/report_cli.py --report Attendance --report Payroll \\
+        --format csv --format pdf --from 2025-11-01 --to 2025-11-30 --out reports/
+
+Exit codes: 0 = all outputs written, 1 = some outputs failed, 2 = usage error.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from report_queries import REPORTS, fetch_report, supported_filters
+
+FORMATS = ("csv", "pdf", "parquet")
+FILTER_ARGS = ("date_from", "date_to", "employee_id", "role", "status", "limit")
+
+
+def init_db(credentials_path):
+    import firebase_app
+    firebase_app.configure(credentials_path)
+    return firebase_app.get_db()
+
+
+def report_filters(report_type, args):
+    """Return the CLI filters that apply to ``report_type``."""
+    allowed = supported_filters(report_type)
+    return {k: getattr(args, k) for k in FILTER_ARGS if getattr(args, k) and k in allowed}
+
+
+def plan_fetches(report_types, args):
+    """Group reports that read the same collection with the same filters.
+
+    Each group is fetched once with the union of the reports' columns.
+    """
+    groups = {}
+    for report_type in report_types:
+        filters = report_filters(report_type, args)
+        key = (REPORTS[report_type]["collection"], tuple(sorted(filters.items())))
+        group = groups.setdefault(key, {"report": report_type, "filters": filters, "columns": [], "reports": []})
+        group["reports"].append(report_type)
+        for col in REPORTS[report_type]["columns"]:
+            if col not in group["columns"]:
+                group["columns"].append(col)
+    return list(groups.values())
+
+
+def output_path(out_dir, report_type, fmt, stamp):
+    name = report_type.lower().replace(" ", "_")
+    return os.path.join(out_dir, f"{name}_{stamp}.{fmt}")
+
+
+def write_csv(path, columns, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([row.get(col, "") for col in columns])
+
+
+def write_pdf(path, title, columns, rows, workers=None):
+    from pdf_export import export_table
+    export_table(path, title, columns, rows, workers=workers)
+
+
+def write_parquet(path, columns, rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    table = pa.table({col: [None if row.get(col) is None else str(row.get(col)) for row in rows] for col in columns})
+    pq.write_table(table, path)
+
+
+def write_output(report_type, fmt, rows, args, stamp):
+    columns = REPORTS[report_type]["columns"]
+    path = output_path(args.out, report_type, fmt, stamp)
+    if fmt == "csv":
+        write_csv(path, columns, rows)
+    elif fmt == "pdf":
+        write_pdf(path, f"{report_type} - {stamp}", columns, rows, args.workers)
+    else:
+        write_parquet(path, columns, rows)
+    return path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate reports and payslips without the GUI.")
+    parser.add_argument("--report", action="append", choices=list(REPORTS), default=[],
+                        help="Report to generate (repeatable)")
+    parser.add_argument("--all", action="store_true", help="Generate every report")
+    parser.add_argument("--format", action="append", choices=FORMATS, default=[],
+                        help="Output format (repeatable, default csv)")
+    parser.add_argument("--out", default="reports", help="Output directory")
+    parser.add_argument("--from", dest="date_from", help="Start date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", help="End date (YYYY-MM-DD)")
+    parser.add_argument("--employee-id")
+    parser.add_argument("--role")
+    parser.add_argument("--status")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--payslips", action="store_true", help="Also render one payslip PDF per salary record")
+    parser.add_argument("--period", default=date.today().strftime("%B %Y"), help="Payslip period label")
+    parser.add_argument("--workers", type=int, default=None, help="PDF worker processes")
+    parser.add_argument("--credentials", help="service account key (default: $GOOGLE_APPLICATION_CREDENTIALS or modules/serviceAccountKey.json)")
+    args = parser.parse_args(argv)
+    if args.all:
+        args.report = list(REPORTS)
+    if not args.report and not args.payslips:
+        parser.error("nothing to do: pass --report, --all or --payslips")
+    args.format = args.format or ["csv"]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    started = time.perf_counter()
+    timings = []
+    failures = 0
+
+    try:
+        db = init_db(args.credentials)
+    except Exception as e:
+        print(f"Failed to initialize Firebase: {e}", file=sys.stderr)
+        return 1
+    timings.append(("init firebase", time.perf_counter() - started, ""))
+    os.makedirs(args.out, exist_ok=True)
+    stamp = date.today().strftime("%Y-%m-%d")
+
+    # Fetch each distinct (collection, filters) once, concurrently
+    def fetch(group):
+        t0 = time.perf_counter()
+        rows = fetch_report(db, group["report"], group["filters"], group["columns"])
+        return rows, time.perf_counter() - t0
+
+    groups = plan_fetches(args.report, args)
+    outputs = []
+    with ThreadPoolExecutor(max_workers=max(len(groups), 1) + len(args.report) * len(args.format)) as pool:
+        fetches = [(group, pool.submit(fetch, group)) for group in groups]
+        for group, future in fetches:
+            label = "fetch " + ", ".join(group["reports"])
+            try:
+                rows, elapsed = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"{label} failed: {e}", file=sys.stderr)
+                continue
+            timings.append((label, elapsed, f"{len(rows)} rows"))
+            for report_type in group["reports"]:
+                for fmt in args.format:
+                    def write(report_type=report_type, fmt=fmt, rows=rows):
+                        t0 = time.perf_counter()
+                        path = write_output(report_type, fmt, rows, args, stamp)
+                        return path, time.perf_counter() - t0
+                    outputs.append((f"write {report_type} ({fmt})", pool.submit(write)))
+
+        for label, future in outputs:
+            try:
+                path, elapsed = future.result()
+                timings.append((label, elapsed, path))
+            except Exception as e:
+                failures += 1
+                print(f"{label} failed: {e}", file=sys.stderr)
+
+    if args.payslips:
+        from pdf_export import export_payslips
+        t0 = time.perf_counter()
+        try:
+            records = []
+            for doc in db.collection("salaries").stream():
+                record = doc.to_dict()
+                record.setdefault("id", doc.id)
+                records.append(record)
+            files = export_payslips(records, os.path.join(args.out, "payslips"), args.period, args.workers)
+            timings.append(("payslips", time.perf_counter() - t0, f"{len(files)} files"))
+        except Exception as e:
+            failures += 1
+            print(f"payslips failed: {e}", file=sys.stderr)
+
+    print("\nTiming summary")
+    for label, elapsed, detail in timings:
+        print(f"  {label:<45} {elapsed:8.2f}s  {detail}")
+    print(f"  {'total':<45} {time.perf_counter() - started:8.2f}s  {failures} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
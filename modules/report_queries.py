@@ -0,0 +1,133 @@
+from datetime import datetime
+from projections import project
+from models import MODELS
+
+# --- Report Definitions ---
+# Each report declares its collection, the columns it shows (which double as the
+# field projection), the filters it supports mapped to document fields, and the
+# date field used for range queries. Equality filters combined with a date range
+# need a composite index on (<filter field>, <date field>) in Firestore.
+REPORTS = {
+    "Employee List": {
+        "collection": "employees",
+        "columns": ["id", "Name", "Role", "Contact", "Gender", "Age", "Date of Birth", "Bank Name", "Account Number", "IFSC Code"],
+        "filters": {"employee_id": "id", "role": "Role"},
+        "date_field": None,
+    },
+    "Attendance": {
+        "collection": "attendance",
+        "columns": ["id", "employee_id", "employee_name", "date", "status"],
+        "filters": {"employee_id": "employee_id", "status": "status"},
+        "date_field": "date",
+    },
+    "Payroll": {
+        "collection": "salaries",
+        "columns": ["id", "employee_name", "total_days", "wage_per_day", "total_salary"],
+        "filters": {},
+        "date_field": None,
+    },
+    "Salary Deductions": {
+        "collection": "salaries",
+        "columns": ["id", "employee_name", "total_wage", "canteen_deduction", "total_salary"],
+        "filters": {},
+        "date_field": None,
+    },
+    "Shift Reports": {
+        "collection": "shifts",
+        "columns": ["id", "employee_name", "shift_time", "department"],
+        "filters": {"employee_id": "employee_id"},
+        "date_field": "date",
+    },
+}
+
+RANGE_FILTERS = ("date_from", "date_to")
+
+
+def supported_filters(report_type):
+    """Return the filter names a report accepts (including date range and limit)."""
+    spec = REPORTS[report_type]
+    names = list(spec["filters"])
+    if spec["date_field"]:
+        names += list(RANGE_FILTERS)
+    return names + ["limit"]
+
+
+def _parse_date(value, label):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"{label} must be in YYYY-MM-DD format")
+
+
+def build_report_query(db, report_type, filters=None, columns=None):
+    """Translate report filters into an indexed Firestore query.
+
+    ``filters`` may contain ``employee_id``, ``role``, ``status``, ``date_from``,
+    ``date_to`` and ``limit``; empty values are ignored. ``columns`` overrides the
+    report's projection (e.g. to share one fetch between reports). Raises
+    ValueError for unknown reports, unsupported filters or malformed values.
+    """
+    from firebase_admin import firestore
+    from firebase_admin.firestore import FieldFilter
+
+    if report_type not in REPORTS:
+        raise ValueError("Please select a valid report type.")
+    spec = REPORTS[report_type]
+    filters = {k: v.strip() if isinstance(v, str) else v for k, v in (filters or {}).items()}
+    filters = {k: v for k, v in filters.items() if v not in (None, "")}
+
+    query = db.collection(spec["collection"])
+    for key, value in filters.items():
+        if key in RANGE_FILTERS or key == "limit":
+            continue
+        field = spec["filters"].get(key)
+        if field is None:
+            raise ValueError(f"{report_type} cannot be filtered by {key.replace('_', ' ')}")
+        query = query.where(filter=FieldFilter(field, "==", value))
+
+    date_from = filters.get("date_from")
+    date_to = filters.get("date_to")
+    if date_from or date_to:
+        date_field = spec["date_field"]
+        if not date_field:
+            raise ValueError(f"{report_type} cannot be filtered by date")
+        date_from = date_from and _parse_date(date_from, "From date")
+        date_to = date_to and _parse_date(date_to, "To date")
+        if date_from and date_to and date_from > date_to:
+            raise ValueError("From date must be on or before To date")
+        if date_from:
+            query = query.where(filter=FieldFilter(date_field, ">=", date_from))
+        if date_to:
+            query = query.where(filter=FieldFilter(date_field, "<=", date_to))
+        # Range filters require the first ordering to be on the same field
+        query = query.order_by(date_field, direction=firestore.Query.DESCENDING)
+
+    limit = filters.get("limit")
+    if limit:
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise ValueError("Max rows must be a number")
+        if limit <= 0:
+            raise ValueError("Max rows must be greater than zero")
+        query = query.limit(limit)
+
+    return project(query, columns or spec["columns"])
+
+
+def fetch_report(db, report_type, filters=None, columns=None):
+    """Run a report query and return its rows.
+
+    Rows are record models for collections that have one and dicts otherwise;
+    either way ``row.get(column)`` reads a column.
+    """
+    query = build_report_query(db, report_type, filters, columns)
+    model = MODELS.get(REPORTS[report_type]["collection"])
+    if model is not None:
+        return [model.from_snapshot(doc) for doc in query.stream()]
+    rows = []
+    for doc in query.stream():
+        record = doc.to_dict()
+        record.setdefault("id", doc.id)
+        rows.append(record)
+    return rows
@@ -4,15 +4,12 @@ from ttkbootstrap.constants import *
 from tkinter import messagebox, filedialog
 
 import csv
-import firebase_admin
-from firebase_admin import credentials, firestore
+from datetime import date
+from firebase_app import db
+from report_queries import REPORTS, fetch_report, supported_filters
+from background import run_in_background
+import firestore_metrics
 
-# Firebase Initialization
-if not firebase_admin._apps:
-    cred = credentials.Certificate("modules/serviceAccountKey.json")
-    firebase_admin.initialize_app(cred)
-
-db = firestore.client()
 
 def fetch_data_from_firestore(collection_name):
     try:
@@ -26,24 +23,49 @@ def show_reports_ui(container):
     for widget in container.winfo_children():
         widget.destroy()
 
-    def generate_report():
+    pending = {}
+
+    def collect_filters():
+        return {name: var.get() for name, var in filter_vars.items()}
+
+    def on_report_selected(*_):
         report_type = report_var.get()
+        if report_type not in REPORTS:
+            return
+        allowed = supported_filters(report_type)
+        for name, widget in filter_widgets.items():
+            widget.configure(state="normal" if name in allowed else "disabled")
+            if name not in allowed:
+                filter_vars[name].set("")
+        if "date_from" in allowed and not filter_vars["date_from"].get():
+            today = date.today()
+            filter_vars["date_from"].set(today.replace(day=1).strftime("%Y-%m-%d"))
+            filter_vars["date_to"].set(today.strftime("%Y-%m-%d"))
 
-        collections = {
-            "Employee List": ("employees", ["id", "Name", "Role", "Contact", "Gender", "Age", "Date of Birth", "Bank Name", "Account Number", "IFSC Code"]),
-            "Attendance": ("attendance", ["id", "employee_name", "date", "status"]),
-            "Payroll": ("salary", ["id", "employee_name", "total_days", "wage_per_day", "total_salary"]),
-            "Salary Deductions": ("salary", ["id", "employee_name", "total_wage", "canteen_deduction", "total_salary"]),
-            "Shift Reports": ("shifts", ["id", "employee_name", "shift_time", "department"])
-        }
+    def generate_report():
+        report_type = report_var.get()
 
-        if report_type not in collections:
+        if report_type not in REPORTS:
             messagebox.showerror("Error", "Please select a valid report type.")
             return
 
-        collection, headers = collections[report_type]
-        data = fetch_data_from_firestore(collection)
-
+        def failed(e):
+            if isinstance(e, ValueError):
+                messagebox.showerror("Error", str(e))
+            else:
+                messagebox.showerror("Error", f"Failed to fetch data: {str(e)}")
+
+        # A new report replaces one still loading
+        if pending.get("report") is not None:
+            pending["report"].cancel()
+        with firestore_metrics.action("generate_report"):
+            pending["report"] = run_in_background(
+                container, fetch_report, db, report_type, collect_filters(),
+                on_success=lambda data: show_report(report_type, data), on_error=failed,
+                busy=[generate_btn], status=(count_label, "Loading..."))
+
+    def show_report(report_type, data):
+        headers = REPORTS[report_type]["columns"]
         tree.delete(*tree.get_children())
         tree["columns"] = headers
         tree["show"] = "headings"
@@ -55,6 +77,7 @@ def show_reports_ui(container):
         for record in data:
             row = [record.get(col, "") for col in headers]
             tree.insert("", "end", values=row)
+        count_label.config(text=f"{len(data)} record(s)")
 
     def export_to_csv():
         if not tree.get_children():
@@ -79,16 +102,41 @@ def show_reports_ui(container):
     ttk.Label(container, text="Select Report:", font=("Segoe UI", 11)).pack(pady=(0, 5))
     report_var = ttk.StringVar()
     report_dropdown = ttk.Combobox(container, textvariable=report_var, state="readonly",
-                                   values=["Employee List", "Attendance", "Payroll", "Salary Deductions", "Shift Reports"])
+                                   values=list(REPORTS))
     report_dropdown.pack(pady=5)
+    report_dropdown.bind("<<ComboboxSelected>>", on_report_selected)
+
+    # Filters (translated into Firestore where/order_by/limit clauses)
+    filter_frame = ttk.Labelframe(container, text="Filters", padding=10)
+    filter_frame.pack(fill=X, pady=5)
+    filter_vars = {}
+    filter_widgets = {}
+    for idx, (name, label) in enumerate([
+        ("date_from", "From (YYYY-MM-DD)"),
+        ("date_to", "To (YYYY-MM-DD)"),
+        ("employee_id", "Employee ID"),
+        ("role", "Role"),
+        ("status", "Status"),
+        ("limit", "Max Rows")
+    ]):
+        r, c = divmod(idx, 3)
+        ttk.Label(filter_frame, text=label).grid(row=r, column=c*2, sticky=E, padx=(5, 2), pady=4)
+        filter_vars[name] = ttk.StringVar()
+        if name == "status":
+            widget = ttk.Combobox(filter_frame, textvariable=filter_vars[name], values=["", "Present", "Absent", "Late"], width=16)
+        else:
+            widget = ttk.Entry(filter_frame, textvariable=filter_vars[name], width=18)
+        widget.grid(row=r, column=c*2 + 1, sticky=W, padx=(2, 10), pady=4)
+        filter_widgets[name] = widget
 
     btn_frame = ttk.Frame(container)
     btn_frame.pack(pady=10)
-    for text, cmd, style in [
-        ("Generate Report", generate_report, "success-outline"),
-        ("Export to CSV", export_to_csv, "info-outline")
-    ]:
-        ttk.Button(btn_frame, text=text, command=cmd, bootstyle=style, width=20).pack(side=LEFT, padx=10)
+    generate_btn = ttk.Button(btn_frame, text="Generate Report", command=generate_report, bootstyle="success-outline", width=20)
+    generate_btn.pack(side=LEFT, padx=10)
+    ttk.Button(btn_frame, text="Export to CSV", command=export_to_csv, bootstyle="info-outline", width=20).pack(side=LEFT, padx=10)
+
+    count_label = ttk.Label(container, text="", font=("Segoe UI", 9))
+    count_label.pack()
 
     global tree
     tree = ttk.Treeview(container, show="headings", height=18)
@@ -0,0 +1,232 @@
+import re
+from collections import defaultdict
+from tkinter import messagebox
+
+from firebase_app import db
+from models import Employee
+from background import run_in_background
+from snapshot_store import sync_scope
+
+# --- Roster Index ---
+# One in-memory index of the employee roster shared by the panels that pick
+# employees (task assignment, salary). It maps ID -> record, normalized
+# name -> IDs and role -> IDs, so resolving a picked name is a dict lookup and
+# duplicate names are detected instead of silently picking the first. It is
+# loaded once and then kept current from the API change feed; loads go
+# through the warm-start snapshot, so only employees changed since the last
+# run are read. Comboboxes bound with ``bind_type_ahead`` filter its labels as
+# the user types.
+ROSTER_INDEX_FIELDS = ["Name", "Role"]
+NAVIGATION_KEYS = {"Up", "Down", "Return", "KP_Enter", "Escape", "Tab", "ISO_Left_Tab"}
+
+_LABEL_ID = re.compile(r"^(.*) \(([^()]+)\)$")
+
+
+def normalize(name):
+    """Case- and whitespace-insensitive form of a name."""
+    return " ".join(str(name or "").split()).casefold()
+
+
+def load_roster():
+    docs = sync_scope("roster_index", db.collection("employees"), ROSTER_INDEX_FIELDS)
+    return [Employee.from_dict(data, doc_id) for doc_id, data in docs.items()]
+
+
+class RosterIndex:
+    def __init__(self):
+        self.by_id = {}
+        self.by_name = defaultdict(set)
+        self.by_role = defaultdict(set)
+        self.loaded = False
+        self._labels = None  # sorted [(normalized label, label, id)], rebuilt after changes
+        self._listeners = []
+        self._loading = None
+        self._waiting = []  # (widget, then) to call once the running load is in
+        self._root = None
+        self._changes = None
+
+    # --- Updates (Tk thread) ---
+    def replace(self, records):
+        self.by_id.clear()
+        self.by_name.clear()
+        self.by_role.clear()
+        for record in records:
+            self._add(record)
+        self.loaded = True
+        self._changed()
+
+    def upsert(self, record):
+        self._discard(record.id)
+        self._add(record)
+        self._changed()
+
+    def remove(self, emp_id):
+        if self._discard(emp_id):
+            self._changed()
+
+    def _add(self, record):
+        self.by_id[record.id] = record
+        self.by_name[normalize(record.name)].add(record.id)
+        if record.role:
+            self.by_role[record.role].add(record.id)
+
+    def _discard(self, emp_id):
+        record = self.by_id.pop(emp_id, None)
+        if record is None:
+            return False
+        for index, key in ((self.by_name, normalize(record.name)), (self.by_role, record.role)):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(emp_id)
+                if not ids:
+                    del index[key]
+        return True
+
+    def apply_event(self, event):
+        """Apply an ``employees`` change-feed event."""
+        if event["type"] == "reset":
+            self.reload(self._root)
+        elif event["type"] == "removed":
+            self.remove(event["doc_id"])
+        else:
+            self.upsert(Employee.from_dict(event["data"] or {}, event["doc_id"]))
+
+    def _changed(self):
+        self._labels = None
+        self._listeners = [(widget, callback) for widget, callback in self._listeners if _alive(widget)]
+        for widget, callback in self._listeners:
+            callback()
+
+    # --- Lookups ---
+    def get(self, emp_id):
+        return self.by_id.get(emp_id)
+
+    def name(self, emp_id, default="Unknown"):
+        record = self.by_id.get(emp_id)
+        return record.name if record is not None and record.name else default
+
+    def ids_for_name(self, name):
+        return set(self.by_name.get(normalize(name), ()))
+
+    def ids_for_role(self, role):
+        return set(self.by_role.get(role, ()))
+
+    def label(self, emp_id):
+        """The employee's name, with the ID appended when the name is not unique."""
+        name = self.name(emp_id, default=str(emp_id))
+        return name if len(self.by_name.get(normalize(name), ())) <= 1 else f"{name} ({emp_id})"
+
+    def resolve(self, label):
+        """The ID a picked label stands for; None if unknown or ambiguous."""
+        match = _LABEL_ID.match(label.strip())
+        if match and match.group(2) in self.by_id:
+            return match.group(2)
+        ids = self.by_name.get(normalize(label), ())
+        return next(iter(ids)) if len(ids) == 1 else None
+
+    def labels(self, text="", role=None):
+        """Sorted picker labels containing ``text`` (normalized), optionally one role only."""
+        if self._labels is None:
+            self._labels = sorted((normalize(self.label(i)), self.label(i), i) for i in self.by_id)
+        needle = normalize(text)
+        allowed = self.by_role.get(role, ()) if role else None
+        return [label for key, label, emp_id in self._labels
+                if needle in key and (allowed is None or emp_id in allowed)]
+
+    # --- Loading and following changes ---
+    def add_listener(self, widget, callback):
+        """Call ``callback()`` after every change while ``widget`` exists."""
+        self._listeners.append((widget, callback))
+
+    def ensure_loaded(self, widget, then=None, busy=()):
+        """Load the roster once (in the background), then keep it current from the change feed."""
+        if self.loaded:
+            if then:
+                then()
+            return
+        self.reload(widget, then, busy)
+
+    def reload(self, widget=None, then=None, busy=()):
+        """Reload the whole roster; ``then`` runs once it is in (unless ``widget`` is gone by then).
+
+        A reload asked for while one is running joins it instead of starting another.
+        """
+        if widget is None:
+            return
+        if then:
+            self._waiting.append((widget, then))
+        if self._loading is not None:
+            return
+        # Report back on the toplevel: the asking panel may be evicted before the load is in
+        root = widget.winfo_toplevel()
+
+        def finished():
+            self._loading = None
+            waiting, self._waiting = self._waiting, []
+            return [then for owner, then in waiting if _alive(owner)]
+
+        def loaded(records):
+            callbacks = finished()
+            self.replace(records)
+            for callback in callbacks:
+                callback()
+
+        def failed(e):
+            finished()
+            messagebox.showerror("Error", f"Failed to load employees: {e}")
+
+        self._loading = run_in_background(root, load_roster, on_success=loaded, on_error=failed, busy=busy)
+        self.follow(root)
+
+    def follow(self, root):
+        self._root = root
+        if self._changes is None:
+            import employee_api_client
+            self._changes = employee_api_client.get_client().subscribe_changes(["employees"], self.apply_event, widget=root)
+
+    def stop(self):
+        """Stop following the change feed."""
+        if self._changes is not None:
+            self._changes.stop()
+            self._changes = None
+
+
+def _alive(widget):
+    try:
+        return bool(widget.winfo_exists())
+    except Exception:
+        return False
+
+
+_index = None
+
+
+def get_roster_index():
+    """The shared roster index (empty until ``ensure_loaded``)."""
+    global _index
+    if _index is None:
+        _index = RosterIndex()
+    return _index
+
+
+def reset_roster_index():
+    """Drop the shared index, as on a new app start (the read budget gate measures each panel this way)."""
+    global _index
+    if _index is not None:
+        _index.stop()
+    _index = None
+
+
+def bind_type_ahead(combobox, index, role=None):
+    """Fill ``combobox`` from ``index`` and narrow its list to entries matching the typed text."""
+    def refresh(*_):
+        combobox["values"] = index.labels(combobox.get(), role)
+
+    def on_key(event):
+        if event.keysym not in NAVIGATION_KEYS:
+            refresh()
+
+    combobox.bind("<KeyRelease>", on_key, add="+")
+    index.add_listener(combobox, refresh)
+    refresh()
+
@@ -4,29 +4,28 @@ from ttkbootstrap.constants import *
 from tkinter import messagebox
 import csv
 import os
-import firebase_admin
-from firebase_admin import credentials, firestore
-
-# Firebase Initialization
-if not firebase_admin._apps:
-    cred = credentials.Certificate("modules/serviceAccountKey.json")
-    firebase_admin.initialize_app(cred)
-
-db = firestore.client()
-
-def get_employee_names():
-    try:
-        docs = db.collection("employees").stream()
-        names = [doc.to_dict().get("Name") for doc in docs]
-        return names if names else ["No Employees Found"]
-    except Exception as e:
-        print(f"Error fetching employee names: {e}")
-        return ["Error fetching names"]
+from datetime import date
+from firebase_app import db
+from pdf_export import export_payslips
+from background import run_in_background
+from roster_index import get_roster_index, bind_type_ahead
+
+
+def load_salary_records(with_ids=False):
+    records = []
+    for doc in db.collection("salaries").stream():
+        record = doc.to_dict()
+        if with_ids:
+            record.setdefault("id", doc.id)
+        records.append(record)
+    return records
 
 def show_salary_ui(container):
     for widget in container.winfo_children():
         widget.destroy()
 
+    roster = get_roster_index()
+
     def calculate_salary():
         try:
             days_worked = int(days_worked_entry.get())
@@ -54,14 +53,23 @@ def show_salary_ui(container):
             messagebox.showerror("Error", "Enter valid numbers for Days Worked and Deduction.")
 
     def save_salary():
-        if not emp_combo.get():
+        label = emp_combo.get().strip()
+        if not label:
             messagebox.showerror("Error", "Please select an employee.")
             return
+        employee_id = roster.resolve(label)
+        if not employee_id:
+            if len(roster.ids_for_name(label)) > 1:
+                messagebox.showerror("Error", f"Several employees are named {label}; pick one with its ID.")
+            else:
+                messagebox.showerror("Error", "Employee not found.")
+            return
 
         calculate_salary()
 
         data = {
-            "employee_name": emp_combo.get(),
+            "employee_id": employee_id,
+            "employee_name": roster.name(employee_id),
             "total_days": int(days_worked_entry.get()),
             "gender": gender_combo.get(),
             "wage_per_day": 350 if gender_combo.get() == "Male" else 250,
@@ -70,27 +78,27 @@ def show_salary_ui(container):
             "total_salary": container.computed_salary
         }
 
-        try:
-            db.collection("salaries").add(data)
-            messagebox.showinfo("Success", "Salary saved to Firebase successfully.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save salary: {e}")
+        run_in_background(container, db.collection("salaries").add, data, busy=buttons.get("Save Salary", ()),
+                          on_success=lambda _: messagebox.showinfo("Success", "Salary saved to Firebase successfully."),
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to save salary: {e}"))
 
     def export_to_csv():
-        try:
-            docs = db.collection("salaries").stream()
-            data = [doc.to_dict() for doc in docs]
+        run_in_background(container, load_salary_records, on_success=write_csv, busy=buttons.get("Export CSV", ()),
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to export data: {e}"))
 
+    def write_csv(data):
+        try:
             if not data:
                 messagebox.showwarning("Warning", "No salary records found.")
                 return
 
             with open("salary_records.csv", "w", newline="") as file:
                 writer = csv.writer(file)
-                writer.writerow(["Employee Name", "Total Days", "Gender", "Wage/Day", "Total Wage", "Canteen Deduction", "Total Salary"])
+                writer.writerow(["Employee Name", "Employee ID", "Total Days", "Gender", "Wage/Day", "Total Wage", "Canteen Deduction", "Total Salary"])
                 for d in data:
                     writer.writerow([
                         d.get("employee_name"),
+                        d.get("employee_id", ""),
                         d.get("total_days"),
                         d.get("gender"),
                         d.get("wage_per_day"),
@@ -102,8 +110,18 @@ def show_salary_ui(container):
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export data: {e}")
 
+    def export_payslips_pdf():
+        """Render one payslip PDF per saved salary record into ./payslips."""
+        def worker():
+            records = load_salary_records(with_ids=True)
+            return export_payslips(records, "payslips", period=date.today().strftime("%B %Y"))
+
+        run_in_background(container, worker, busy=buttons.get("Export Payslips", ()),
+                          on_success=lambda files: messagebox.showinfo("Exported", f"{len(files)} payslip(s) written to 'payslips'."),
+                          on_error=lambda e: messagebox.showerror("Error", f"Failed to export payslips: {e}"))
+
     def refresh_names():
-        emp_combo["values"] = get_employee_names()
+        roster.reload(container, busy=buttons.get("Refresh", ()))
 
     frame = ttk.Frame(container, padding=20)
     frame.pack(fill=BOTH, expand=True)
@@ -111,7 +129,6 @@ def show_salary_ui(container):
     ttk.Label(frame, text="Employee Name:").grid(row=0, column=0, sticky=W, padx=10, pady=5)
     emp_combo = ttk.Combobox(frame, font=("Segoe UI", 11))
     emp_combo.grid(row=0, column=1, sticky=EW, padx=10, pady=5)
-    refresh_names()
 
     ttk.Label(frame, text="Total Days Worked:").grid(row=1, column=0, sticky=W, padx=10, pady=5)
     days_worked_entry = ttk.Entry(frame)
@@ -139,10 +156,19 @@ def show_salary_ui(container):
     btn_frame = ttk.Frame(frame)
     btn_frame.grid(row=7, column=0, columnspan=2, pady=20)
 
+    # Buttons by label, disabled while their own request is in flight
+    buttons = {}
     for text, cmd, style in [
         ("Calculate", calculate_salary, "primary"),
         ("Save Salary", save_salary, "success"),
         ("Export CSV", export_to_csv, "info"),
+        ("Export Payslips", export_payslips_pdf, "secondary"),
         ("Refresh", refresh_names, "warning")
     ]:
-        ttk.Button(btn_frame, text=text, command=cmd, bootstyle=style).pack(side=LEFT, padx=10)
+        button = ttk.Button(btn_frame, text=text, command=cmd, bootstyle=style)
+        button.pack(side=LEFT, padx=10)
+        buttons[text] = [button]
+
+    bind_type_ahead(emp_combo, roster)
+    roster.ensure_loaded(container, busy=buttons.get("Refresh", ()))
+    return refresh_names
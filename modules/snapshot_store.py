@@ -0,0 +1,154 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from models import Record
+
+# --- Warm-start Snapshot ---
+# Last-known rosters and task lists are kept in a local SQLite file so screens
+# can render immediately on launch and then reconcile in the background. Each
+# scope (e.g. "employees", "tasks:<employee id>") remembers the newest
+# ``last_updated`` value it has seen, which drives delta queries. The same file
+# holds an outbox of writes that Firestore has not confirmed yet (kiosk
+# check-ins), so they survive a restart and are sent on the next start.
+SNAPSHOT_PATH = os.environ.get("EMS_SNAPSHOT_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "warm_start.sqlite3"))
+
+# Writers stamp ``last_updated`` with their own clock; re-read a small window
+# before the high-water mark so a writer running slightly behind is not missed.
+CLOCK_SKEW_WINDOW = timedelta(minutes=5)
+
+
+def utc_now_iso():
+    """Timestamp format used for ``last_updated`` on every written document."""
+    return datetime.utcnow().isoformat()
+
+
+class SnapshotStore:
+    def __init__(self, path=SNAPSHOT_PATH):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS docs (scope TEXT, doc_id TEXT, data TEXT, PRIMARY KEY (scope, doc_id))")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS scopes (scope TEXT PRIMARY KEY, high_water TEXT, synced_at REAL)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT, data TEXT)")
+
+    def load(self, scope):
+        """Return ``{doc_id: data}`` for a scope (empty if never synced)."""
+        with self._lock:
+            rows = self.conn.execute("SELECT doc_id, data FROM docs WHERE scope = ?", (scope,)).fetchall()
+        return {doc_id: json.loads(data) for doc_id, data in rows}
+
+    def high_water(self, scope):
+        with self._lock:
+            row = self.conn.execute("SELECT high_water FROM scopes WHERE scope = ?", (scope,)).fetchone()
+        return row[0] if row else None
+
+    def delta_since(self, scope):
+        """Return the ``last_updated`` lower bound for a delta query, or None for a full load."""
+        high_water = self.high_water(scope)
+        if not high_water:
+            return None
+        try:
+            return (datetime.fromisoformat(high_water) - CLOCK_SKEW_WINDOW).isoformat()
+        except ValueError:
+            return None
+
+    def replace(self, scope, docs):
+        """Replace a scope's contents with ``docs`` (``{doc_id: data}``) after a full load."""
+        self._write(scope, docs, replace=True)
+
+    def upsert(self, scope, docs):
+        """Merge changed documents (``{doc_id: data}``) from a delta load.
+
+        ``data`` may be a dict or a record model; it is stored as a dict.
+        """
+        self._write(scope, docs, replace=False)
+
+    def delete(self, scope, doc_ids):
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM docs WHERE scope = ? AND doc_id = ?", [(scope, d) for d in doc_ids])
+
+    def _write(self, scope, docs, replace):
+        high_water = max((str(d.get("last_updated")) for d in docs.values() if d.get("last_updated")), default=None)
+        with self._lock, self.conn:
+            if replace:
+                self.conn.execute("DELETE FROM docs WHERE scope = ?", (scope,))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO docs (scope, doc_id, data) VALUES (?, ?, ?)",
+                [(scope, doc_id, json.dumps(data.to_dict() if isinstance(data, Record) else data, default=str))
+                 for doc_id, data in docs.items()],
+            )
+            row = self.conn.execute("SELECT high_water FROM scopes WHERE scope = ?", (scope,)).fetchone()
+            previous = row[0] if row else None
+            if previous and not replace:
+                high_water = max(previous, high_water or previous)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO scopes (scope, high_water, synced_at) VALUES (?, ?, ?)",
+                (scope, high_water, time.time()),
+            )
+
+    # --- Outbox ---
+    def outbox_add(self, kind, data):
+        """Keep ``data`` (JSON-serializable) until ``outbox_remove``; returns its outbox ID."""
+        with self._lock, self.conn:
+            return self.conn.execute("INSERT INTO outbox (kind, data) VALUES (?, ?)", (kind, json.dumps(data))).lastrowid
+
+    def outbox_load(self, kind):
+        """``[(outbox_id, data)]`` still waiting, oldest first."""
+        with self._lock:
+            rows = self.conn.execute("SELECT id, data FROM outbox WHERE kind = ? ORDER BY id", (kind,)).fetchall()
+        return [(outbox_id, json.loads(data)) for outbox_id, data in rows]
+
+    def outbox_remove(self, outbox_ids):
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM outbox WHERE id = ?", [(i,) for i in outbox_ids])
+
+
+def sync_scope(scope, query, fields):
+    """``{doc_id: data}`` for ``query`` (the ``fields`` only), from the snapshot plus a delta read.
+
+    With a snapshot only documents whose ``last_updated`` is past its high-water
+    mark are read, plus one count() to catch deletions (and writes without a
+    ``last_updated``); a count that does not match falls back to a full read,
+    as does a missing snapshot. The snapshot is updated either way. Call it off
+    the Tk thread.
+    """
+    from firebase_admin.firestore import FieldFilter
+    from projections import project
+    from task_summary import count_query
+
+    fields = list(fields) + ["last_updated"]
+    store = get_store()
+    cached = store.load(scope) if store else {}
+    since = store.delta_since(scope) if cached else None
+    if since:
+        delta = {doc.id: doc.to_dict() for doc in
+                 project(query.where(filter=FieldFilter("last_updated", ">=", since)), fields).stream()}
+        merged = dict(cached, **delta)
+        if count_query(query) == len(merged):
+            store.upsert(scope, delta)
+            return merged
+    docs = {doc.id: doc.to_dict() for doc in project(query, fields).stream()}
+    if store:
+        store.replace(scope, docs)
+    return docs
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Shared snapshot store; None if the snapshot file cannot be opened."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = SnapshotStore()
+            except sqlite3.Error as e:
+                print(f"Warm-start snapshot unavailable: {e}")
+                return None
+        return _store
@@ -0,0 +1,63 @@
+import importlib
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# --- Startup Timing ---
+# Enabled with the --startup-timing flag or EMS_STARTUP_TIMING=1. Records how
+# long each import and init stage takes, relative to process start, and prints
+# the report once the window has painted and Firebase is ready.
+ENABLED = "--startup-timing" in sys.argv or os.environ.get("EMS_STARTUP_TIMING") == "1"
+MILESTONES = {"first paint", "firebase ready"}
+
+_t0 = time.perf_counter()
+_lock = threading.Lock()
+_records = []
+_reached = set()
+_reported = False
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as a named startup stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if ENABLED:
+            with _lock:
+                _records.append((name, start - _t0, time.perf_counter() - start, threading.current_thread().name))
+
+
+def timed_import(module_name):
+    """Import ``module_name`` (once), recording the time taken on first import."""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    with stage(f"import {module_name}"):
+        return importlib.import_module(module_name)
+
+
+def mark(name):
+    """Record a point-in-time milestone and print the report once all are reached."""
+    global _reported
+    if not ENABLED:
+        return
+    with _lock:
+        _records.append((name, time.perf_counter() - _t0, 0.0, threading.current_thread().name))
+        _reached.add(name)
+        if _reported or not MILESTONES <= _reached:
+            return
+        _reported = True
+    report()
+
+
+def report(file=None):
+    file = file or sys.stderr
+    with _lock:
+        records = sorted(_records, key=lambda r: r[1])
+    print("\nStartup timing (ms)", file=file)
+    print(f"  {'stage':<40} {'start':>8} {'duration':>9}  thread", file=file)
+    for name, start, duration, thread in records:
+        print(f"  {name:<40} {start * 1000:8.1f} {duration * 1000:9.1f}  {thread}", file=file)
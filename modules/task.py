@@ -4,13 +4,21 @@ from ttkbootstrap.constants import *
 from ttkbootstrap.widgets import DateEntry
 from tkinter import messagebox
 import requests
-import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_app import db
 import threading
 import time
 from datetime import datetime
 import os
 import logging
+from projections import project
+from snapshot_store import sync_scope, utc_now_iso
+from background import executor, run_in_background
+from models import Task
+from roster_index import get_roster_index, bind_type_ahead
+from task_store import TaskStore, TASK_FILTERS
+from task_summary import format_summary
+import employee_api_client
+import firestore_metrics
 
 # Constants
 TASKS_COLLECTION = "tasks"
@@ -19,18 +27,19 @@ STATUS_PENDING = "Pending"
 STATUS_INCOMPLETE = "Incomplete"
 FCM_SERVER_KEY = os.getenv("FCM_SERVER_KEY")
 
-# Firebase Init
-if not firebase_admin._apps:
-    cred = credentials.Certificate("modules/serviceAccountKey.json")
-    firebase_admin.initialize_app(cred)
+# Fields each screen/job reads from Firestore
+TASK_LIST_FIELDS = ["task", "assign_to", "priority", "deadline", "status"]
+EXPIRY_FIELDS = ["task", "assign_to", "timestamp"]
+
+# Rows drawn in the task table; filters and summaries always cover every task
+MAX_TASK_ROWS = 2000
 
-db = firestore.client()
 logging.basicConfig(level=logging.INFO)
 
 def send_notification(employee_id, task_name):
     try:
         doc_ref = db.collection(EMPLOYEES_COLLECTION).document(employee_id)
-        doc = doc_ref.get()
+        doc = doc_ref.get(field_paths=["fcm_token"])
         if doc.exists:
             fcm_token = doc.to_dict().get("fcm_token")
             if fcm_token:
@@ -50,37 +59,64 @@ def send_notification(employee_id, task_name):
     except Exception as e:
         logging.error(f"Error sending notification: {e}")
 
+_expiry_thread = None
+_expiry_stop = threading.Event()
+
+
+def start_auto_expiry():
+    """Start the expiry job once per process, however often the task panel is built."""
+    global _expiry_thread
+    if _expiry_thread is None or not _expiry_thread.is_alive():
+        _expiry_stop.clear()
+        _expiry_thread = threading.Thread(target=auto_expiry, args=(_expiry_stop,), name="task-expiry", daemon=True)
+        _expiry_thread.start()
+
+
 def auto_expiry(stop_event):
     while not stop_event.is_set():
         try:
-            tasks_ref = db.collection(TASKS_COLLECTION).where(filter=firestore.FieldFilter("status", "==", STATUS_PENDING)).stream()
+            from firebase_admin.firestore import FieldFilter
+            query = db.collection(TASKS_COLLECTION).where(filter=FieldFilter("status", "==", STATUS_PENDING))
+            tasks_ref = project(query, EXPIRY_FIELDS).stream()
             batch = db.batch()
             for task in tasks_ref:
                 task_data = task.to_dict()
                 if time.time() - task_data.get("timestamp", 0) >= 86400:
                     task_ref = db.collection(TASKS_COLLECTION).document(task.id)
-                    batch.update(task_ref, {"status": STATUS_INCOMPLETE})
+                    batch.update(task_ref, {"status": STATUS_INCOMPLETE, "last_updated": utc_now_iso()})
                     send_notification(task_data.get("assign_to", ""), f"Task {task_data.get('task', '')} marked as Incomplete")
             batch.commit()
         except Exception as e:
             logging.error(f"Error in auto-expiry thread: {e}")
-        time.sleep(3600)
+        stop_event.wait(3600)
+
+def load_tasks():
+    # From the warm-start snapshot plus the tasks changed since it was taken
+    docs = sync_scope("tasks", db.collection(TASKS_COLLECTION), TASK_LIST_FIELDS)
+    return [Task.from_dict(data, task_id) for task_id, data in docs.items()]
+
+
+def load_task_store():
+    return TaskStore(load_tasks())
+
 
 def show_task_ui(container):
-    stop_event = threading.Event()
-    employee_dict = {}
+    roster = get_roster_index()
+    store = TaskStore()
+    pending = {}
+    render_pending = []
 
-    def refresh_employee_list():
-        try:
-            employees_ref = db.collection(EMPLOYEES_COLLECTION).stream()
-            employee_dict.clear()
-            for emp in employees_ref:
-                employee_dict[emp.id] = emp.to_dict().get("Name", "")
-            assign_to["values"] = list(employee_dict.values())
-            assign_to.set("")
-        except Exception as e:
-            logging.error(f"Error fetching employees: {e}")
-            messagebox.showerror("Error", f"Failed to fetch employees: {e}")
+    def replace_pending(key, task):
+        # A newer request supersedes one still in flight
+        previous = pending.get(key)
+        if previous is not None:
+            previous.cancel()
+        pending[key] = task
+
+    def refresh_employee_list(then=None):
+        # The shared roster index stays current from the change feed; this re-syncs it (snapshot plus changed employees)
+        assign_to.set("")
+        roster.reload(container, then=then, busy=[refresh_employees_btn])
 
     def assign_task():
         task = task_name.get().strip()
@@ -117,9 +153,12 @@ def show_task_ui(container):
             messagebox.showwarning("Warning", "Deadline cannot be in the past.")
             return
 
-        assign_to_id = next((eid for eid, name in employee_dict.items() if name == assign_to_name), None)
+        assign_to_id = roster.resolve(assign_to_name)
         if not assign_to_id:
-            messagebox.showerror("Error", "Employee not found.")
+            if len(roster.ids_for_name(assign_to_name)) > 1:
+                messagebox.showerror("Error", f"Several employees are named {assign_to_name}; pick one with its ID.")
+            else:
+                messagebox.showerror("Error", "Employee not found.")
             return
 
         task_data = {
@@ -128,54 +167,79 @@ def show_task_ui(container):
             "priority": prio,
             "deadline": deadline_val.strftime("%Y-%m-%d"),
             "status": STATUS_PENDING,
-            "timestamp": time.time()
+            "timestamp": time.time(),
+            "last_updated": utc_now_iso()
         }
 
-        logging.info(f"Assigning task: {task_data}")
-        try:
-            db.collection(TASKS_COLLECTION).add(task_data)
+        def assigned(_):
             messagebox.showinfo("Success", "Task assigned successfully!")
             # Send notification in background so UI doesn't block
-            try:
-                threading.Thread(target=send_notification, args=(assign_to_id, task), daemon=True).start()
-            except Exception as e:
-                logging.error(f"Failed to start notification thread: {e}")
+            executor().submit(send_notification, assign_to_id, task)
             fetch_tasks()
-        except Exception as e:
+
+        def failed(e):
             logging.error(f"Error assigning task: {e}")
             messagebox.showerror("Error", f"Failed to assign task: {str(e)}")
 
-    def fetch_tasks():
-        try:
-            query = search_var.get().lower()
-            tasks_ref = db.collection(TASKS_COLLECTION).stream()
-            tree.delete(*tree.get_children())
+        logging.info(f"Assigning task: {task_data}")
+        run_in_background(container, db.collection(TASKS_COLLECTION).add, task_data,
+                          on_success=assigned, on_error=failed, busy=[assign_btn])
 
-            columns = ["Task", "Assigned To", "Priority", "Deadline", "Status"]
-            tree["columns"] = columns
-            for col in columns:
-                tree.heading(col, text=col)
-                tree.column(col, anchor="center", width=150)
+    def fetch_tasks():
+        def loaded(loaded_store):
+            nonlocal store
+            store = loaded_store
+            render_tasks()
 
-            for task in tasks_ref:
-                data = task.to_dict()
-                assigned_name = employee_dict.get(data.get("assign_to", ""), "Unknown")
-                task_name_val = data.get("task", "").lower()
-
-                if query and query not in task_name_val and query not in assigned_name.lower():
-                    continue
-
-                tree.insert("", "end", values=(
-                    data.get("task", ""),
-                    assigned_name,
-                    data.get("priority", ""),
-                    data.get("deadline", ""),
-                    data.get("status", "")
-                ))
-        except Exception as e:
+        def failed(e):
             logging.error(f"Error fetching tasks: {e}")
             messagebox.showerror("Error", f"Failed to fetch tasks: {e}")
 
+        with firestore_metrics.action("fetch_tasks"):
+            replace_pending("tasks", run_in_background(
+                container, load_task_store, on_success=loaded, on_error=failed, busy=[refresh_tasks_btn]))
+
+    def on_task_change(event):
+        if not tree.winfo_exists():
+            changes.stop()
+            return
+        if not store.apply_event(event, TASK_LIST_FIELDS):
+            fetch_tasks()
+        elif not render_pending:
+            # Coalesce bursts of changes into one redraw
+            render_pending.append(container.after(300, render_tasks))
+
+    def render_tasks():
+        """Show the loaded tasks matching the filter and search text, with site-wide counts."""
+        render_pending.clear()
+        mask = store.filter_mask(show_var.get(), text=search_var.get().strip(), assignee_label=roster.name)
+        rows = store.rows(mask, limit=MAX_TASK_ROWS)
+        tree.delete(*tree.get_children())
+
+        columns = ["Task", "Assigned To", "Priority", "Deadline", "Status"]
+        tree["columns"] = columns
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, anchor="center", width=150)
+
+        for _, data in rows:
+            tree.insert("", "end", values=(
+                data.get("task", ""),
+                roster.name(data.get("assign_to", "")),
+                data.get("priority", ""),
+                data.get("deadline", ""),
+                data.get("status", "")
+            ))
+
+        matched = int(mask.sum())
+        summary = f"{format_summary(store.status_counts())} | Overdue: {int(store.mask(overdue=True).sum())}"
+        busiest = [f"{roster.name(emp_id)} ({load['open']})" for emp_id, load in list(store.workload().items())[:3]]
+        if busiest:
+            summary += f" | Most open: {', '.join(busiest)}"
+        if matched > len(rows):
+            summary += f" | Showing first {len(rows)} of {matched}"
+        summary_label.config(text=summary)
+
     # Clear existing widgets
     for widget in container.winfo_children():
         widget.destroy()
@@ -185,7 +249,7 @@ def show_task_ui(container):
     form_frame.pack(fill=X, pady=10)
 
     task_name = ttk.Combobox(form_frame, values=["Cleaning", "Maintenance", "Security", "Logistics"], state="readonly")
-    assign_to = ttk.Combobox(form_frame, state="readonly")
+    assign_to = ttk.Combobox(form_frame)
     priority = ttk.Combobox(form_frame, values=["High", "Medium", "Low"], state="readonly")
     deadline = DateEntry(form_frame)
 
@@ -198,19 +262,46 @@ def show_task_ui(container):
     ttk.Label(form_frame, text="Deadline").grid(row=1, column=2, padx=5, pady=5, sticky="w")
     deadline.grid(row=1, column=3, padx=5, pady=5)
 
-    ttk.Button(form_frame, text="Refresh Employees", command=refresh_employee_list, bootstyle="warning-outline").grid(row=0, column=4, padx=10)
-    ttk.Button(form_frame, text="Assign Task", command=assign_task, bootstyle="success", width=20).grid(row=2, columnspan=5, pady=10)
+    refresh_employees_btn = ttk.Button(form_frame, text="Refresh Employees", command=refresh_employee_list, bootstyle="warning-outline")
+    refresh_employees_btn.grid(row=0, column=4, padx=10)
+    assign_btn = ttk.Button(form_frame, text="Assign Task", command=assign_task, bootstyle="success", width=20)
+    assign_btn.grid(row=2, columnspan=5, pady=10)
 
     search_frame = ttk.Frame(container)
     search_frame.pack(fill=X, pady=(0, 10))
+    show_var = ttk.StringVar(value="All")
+    show = ttk.Combobox(search_frame, textvariable=show_var, values=TASK_FILTERS, state="readonly", width=15)
+    show.pack(side=LEFT, padx=5)
+    show.bind("<<ComboboxSelected>>", lambda e: render_tasks())
     search_var = ttk.StringVar()
     ttk.Entry(search_frame, textvariable=search_var, width=40).pack(side=LEFT, padx=5)
-    ttk.Button(search_frame, text="Search", command=fetch_tasks, bootstyle="info-outline").pack(side=LEFT, padx=5)
-    ttk.Button(search_frame, text="Refresh", command=fetch_tasks, bootstyle="primary-outline").pack(side=LEFT, padx=5)
+    ttk.Button(search_frame, text="Search", command=render_tasks, bootstyle="info-outline").pack(side=LEFT, padx=5)
+    refresh_tasks_btn = ttk.Button(search_frame, text="Refresh", command=fetch_tasks, bootstyle="primary-outline")
+    refresh_tasks_btn.pack(side=LEFT, padx=5)
+
+    summary_label = ttk.Label(container, text="", font=("Segoe UI", 10, "bold"))
+    summary_label.pack(fill=X, pady=(0, 5))
 
     tree = ttk.Treeview(container, show="headings", height=18)
     tree.pack(fill=BOTH, expand=True)
 
-    refresh_employee_list()
-    fetch_tasks()
-    threading.Thread(target=auto_expiry, args=(stop_event,), daemon=True).start()
+    # Type to narrow the employee list; task rows follow roster renames
+    bind_type_ahead(assign_to, roster)
+    roster.add_listener(tree, render_tasks)
+
+    # Task rows show employee names, so load the roster first
+    roster.ensure_loaded(container, then=fetch_tasks, busy=[refresh_employees_btn])
+    # Other sessions' task changes are applied to the store as they arrive
+    changes = employee_api_client.get_client().subscribe_changes(
+        ["tasks"], on_task_change, widget=container.winfo_toplevel())
+    start_auto_expiry()
+
+    def teardown():
+        changes.stop()
+        for task in pending.values():
+            task.cancel()
+        for after_id in render_pending:
+            container.after_cancel(after_id)
+        render_pending.clear()
+
+    return lambda: refresh_employee_list(then=fetch_tasks), teardown
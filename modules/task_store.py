@@ -0,0 +1,272 @@
+from datetime import date
+
+import numpy as np
+
+from models import Priority, Task, TaskStatus
+from task_summary import TASK_STATUSES
+
+# --- Columnar task store ---
+# The loaded task set kept as NumPy columns: status, priority, assignee and task
+# name as integer codes into small value tables, deadline as a day number and
+# timestamp as int64 seconds. Filters (status, overdue, due soon, assignee,
+# search text) and group-by counts are vectorized over the columns instead of
+# looping over dicts, so site-wide summaries over hundreds of thousands of
+# tasks take milliseconds. Change events update rows in place; removed rows
+# are tombstoned and compacted once they make up half the store.
+NO_DEADLINE = np.iinfo(np.int64).max
+OPEN_STATUSES = (TaskStatus.PENDING, TaskStatus.IN_PROGRESS)
+TASK_FILTERS = ["All"] + TASK_STATUSES + ["Overdue", "Due This Week"]
+MIN_CAPACITY = 64
+
+_day_numbers = {}
+
+
+def day_number(value):
+    """Proleptic ordinal of a "YYYY-MM-DD" (or date) deadline; NO_DEADLINE if unset or invalid."""
+    if not value:
+        return NO_DEADLINE
+    number = _day_numbers.get(value)
+    if number is None:
+        try:
+            day = value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+            number = day.toordinal()
+        except ValueError:
+            number = NO_DEADLINE
+        if len(_day_numbers) < 100000:
+            _day_numbers[value] = number
+    return number
+
+
+class Codes:
+    """Value <-> integer code table for one categorical column; code 0 is "not set"."""
+
+    def __init__(self, values=()):
+        self.values = [""]
+        self.codes = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value):
+        if value is None or value == "":
+            return 0
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, values):
+        """Codes of the known ``values`` (a value or a collection of them)."""
+        if isinstance(values, str):
+            values = [values]
+        return [self.codes[v] for v in values if v in self.codes]
+
+    def matching(self, text, label=str):
+        """Codes whose ``label(value)`` contains ``text`` (case-insensitive)."""
+        text = text.lower()
+        return [code for code, value in enumerate(self.values) if code and text in str(label(value)).lower()]
+
+
+class TaskStore:
+    """Task records by ID plus their columns; reads like a ``{task_id: Task}`` dict."""
+
+    COLUMNS = {"status": np.int16, "priority": np.int16, "assignee": np.int32, "task": np.int32,
+               "deadline": np.int64, "timestamp": np.int64, "alive": np.bool_}
+
+    def __init__(self, tasks=()):
+        self.tables = {"status": Codes(TaskStatus), "priority": Codes(Priority), "assignee": Codes(), "task": Codes()}
+        self.clear()
+        self.update(tasks)
+
+    def clear(self):
+        self.columns = {name: np.zeros(MIN_CAPACITY, dtype) for name, dtype in self.COLUMNS.items()}
+        self._ids = []
+        self._tasks = []
+        self._rows = {}
+        self._dead = 0
+
+    # --- Updates ---
+    def replace(self, tasks):
+        self.clear()
+        self.update(tasks)
+
+    def update(self, tasks):
+        """Insert or overwrite ``tasks`` (Task records, or a ``{task_id: Task}`` dict)."""
+        if hasattr(tasks, "items"):
+            tasks = [task if task.id == task_id else task.replace(id=task_id) for task_id, task in tasks.items()]
+        tasks = list(tasks)
+        new = []
+        for task in tasks:
+            row = self._rows.get(task.id)
+            if row is None:
+                new.append(task)
+            else:
+                self._write(row, task)
+        if new:
+            self._append(new)
+
+    def upsert(self, task):
+        self.update([task])
+
+    def remove(self, task_id):
+        """Drop a task; returns the removed record or None."""
+        row = self._rows.pop(task_id, None)
+        if row is None:
+            return None
+        task = self._tasks[row]
+        self.columns["alive"][row] = False
+        self._ids[row] = self._tasks[row] = None
+        self._dead += 1
+        if self._dead > MIN_CAPACITY and self._dead * 2 > len(self._ids):
+            self._compact()
+        return task
+
+    def pop(self, task_id, default=None):
+        task = self.remove(task_id)
+        return default if task is None else task
+
+    def apply_event(self, event, fields=None):
+        """Apply a ``tasks`` change-feed event (``fields`` limits what is kept); False on "reset"."""
+        if event["type"] == "reset":
+            return False
+        if event["type"] == "removed":
+            self.remove(event["doc_id"])
+        else:
+            data = event["data"] or {}
+            if fields is not None:
+                data = {field: data[field] for field in fields if field in data}
+            self.upsert(Task.from_dict(data, event["doc_id"]))
+        return True
+
+    def _encode(self, task):
+        tables = self.tables
+        timestamp = task.timestamp
+        return (tables["status"].code(task.status), tables["priority"].code(task.priority),
+                tables["assignee"].code(task.assign_to), tables["task"].code(task.task),
+                day_number(task.deadline), int(timestamp) if isinstance(timestamp, (int, float)) else 0, True)
+
+    def _write(self, row, task):
+        for column, value in zip(self.columns.values(), self._encode(task)):
+            column[row] = value
+        self._tasks[row] = task
+
+    def _append(self, tasks):
+        start, count = len(self._ids), len(tasks)
+        self._reserve(start + count)
+        encoded = np.array([self._encode(task) for task in tasks], dtype=np.int64).reshape(count, len(self.COLUMNS))
+        for i, column in enumerate(self.columns.values()):
+            column[start:start + count] = encoded[:, i]
+        for row, task in enumerate(tasks, start):
+            self._rows[task.id] = row
+        self._ids.extend(task.id for task in tasks)
+        self._tasks.extend(tasks)
+
+    def _reserve(self, size):
+        capacity = len(self.columns["alive"])
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, column.dtype)
+            grown[:len(column)] = column
+            self.columns[name] = grown
+
+    def _compact(self):
+        keep = np.flatnonzero(self.columns["alive"][:len(self._ids)])
+        for name, column in self.columns.items():
+            column[:len(keep)] = column[keep]
+            column[len(keep):] = 0
+        self._ids = [self._ids[row] for row in keep]
+        self._tasks = [self._tasks[row] for row in keep]
+        self._rows = {task_id: row for row, task_id in enumerate(self._ids)}
+        self._dead = 0
+
+    # --- Dict-style access ---
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, task_id):
+        return task_id in self._rows
+
+    def __iter__(self):
+        return iter(list(self._rows))
+
+    def get(self, task_id, default=None):
+        row = self._rows.get(task_id)
+        return default if row is None else self._tasks[row]
+
+    def items(self):
+        return [(task_id, self._tasks[row]) for task_id, row in self._rows.items()]
+
+    def values(self):
+        return [self._tasks[row] for row in self._rows.values()]
+
+    # --- Vectorized queries ---
+    def column(self, name):
+        """The live-length view of a column (including tombstoned rows)."""
+        return self.columns[name][:len(self._ids)]
+
+    def _isin(self, name, values):
+        return np.isin(self.column(name), self.tables[name].lookup(values))
+
+    def mask(self, status=None, assignee=None, overdue=False, due_within=None, text=None,
+             assignee_label=str, today=None):
+        """Boolean row mask of the live tasks matching every given filter.
+
+        ``status``/``assignee`` take a value or a collection. ``overdue`` and
+        ``due_within`` (days from ``today``) only match open tasks. ``text``
+        matches the task name or ``assignee_label(assign_to)``.
+        """
+        mask = self.column("alive").copy()
+        if status is not None:
+            mask &= self._isin("status", status)
+        if assignee is not None:
+            mask &= self._isin("assignee", assignee)
+        if overdue or due_within is not None:
+            today = day_number(today or date.today())
+            deadline = self.column("deadline")
+            mask &= self._isin("status", OPEN_STATUSES)
+            if overdue:
+                mask &= deadline < today
+            if due_within is not None:
+                mask &= (deadline >= today) & (deadline < today + due_within)
+        if text:
+            mask &= (np.isin(self.column("task"), self.tables["task"].matching(text))
+                     | np.isin(self.column("assignee"), self.tables["assignee"].matching(text, assignee_label)))
+        return mask
+
+    def filter_mask(self, name, **filters):
+        """Mask for one of TASK_FILTERS ("All", a status, "Overdue" or "Due This Week")."""
+        if name == "Overdue":
+            return self.mask(overdue=True, **filters)
+        if name == "Due This Week":
+            return self.mask(due_within=7, **filters)
+        return self.mask(status=None if name in (None, "All") else name, **filters)
+
+    def rows(self, mask=None, limit=None):
+        """``[(task_id, Task)]`` for the rows in ``mask`` (default: all live tasks)."""
+        rows = np.flatnonzero(self.mask() if mask is None else mask)
+        if limit is not None:
+            rows = rows[:limit]
+        return [(self._ids[row], self._tasks[row]) for row in rows]
+
+    def count_by(self, name, mask=None):
+        """``{value: count}`` of a categorical column over ``mask``, largest first."""
+        table = self.tables[name]
+        selected = self.column(name)[self.mask() if mask is None else mask]
+        counts = np.bincount(selected, minlength=len(table.values))
+        order = np.argsort(-counts, kind="stable")
+        return {table.values[code]: int(counts[code]) for code in order if counts[code]}
+
+    def status_counts(self, mask=None):
+        """``{"Total": n, <status>: n, ...}`` over ``mask``, as ``task_summary.format_summary`` expects."""
+        mask = self.mask() if mask is None else mask
+        counts = self.count_by("status", mask)
+        return {"Total": int(mask.sum()), **{status: counts.get(status, 0) for status in TASK_STATUSES}}
+
+    def workload(self, today=None):
+        """Per-assignee ``{"open": n, "overdue": n}``, busiest first."""
+        open_counts = self.count_by("assignee", self.mask(status=OPEN_STATUSES))
+        overdue = self.count_by("assignee", self.mask(overdue=True, today=today))
+        return {assignee: {"open": n, "overdue": overdue.get(assignee, 0)} for assignee, n in open_counts.items()}
@@ -0,0 +1,205 @@
+import atexit
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+import tkinter as tk
+from collections import defaultdict, deque
+from logging.handlers import RotatingFileHandler
+
+# --- UI Profiler ---
+# Enabled with the --ui-profile flag or EMS_UI_PROFILE=1. Times every Tk
+# callback (button commands, key/mouse bindings, ``after`` callbacks and
+# variable traces) and logs handlers slower than SLOW_MS. A watchdog thread
+# notices when the event loop has not ticked for STALL_MS and logs the main
+# thread's stack while it is stuck. On exit a per-handler latency summary
+# (count, p50/p95/p99, max and a bucketed histogram) is written next to the log.
+ENABLED = "--ui-profile" in sys.argv or os.environ.get("EMS_UI_PROFILE") == "1"
+PROFILE_DIR = os.environ.get("EMS_UI_PROFILE_DIR", "ui_profile")
+SLOW_MS = float(os.environ.get("EMS_UI_SLOW_MS", "100"))
+STALL_MS = float(os.environ.get("EMS_UI_STALL_MS", "250"))
+HEARTBEAT_MS = 50
+SAMPLES_PER_HANDLER = 5000
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+log = logging.getLogger("ems.ui_profile")
+
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=SAMPLES_PER_HANDLER))
+_running = []  # handler names currently on the main thread's stack
+_installed = False
+_last_beat = time.perf_counter()
+_watched = set()
+
+
+def handler_name(func):
+    func = getattr(func, "__func__", func)
+    name = getattr(func, "__qualname__", None) or getattr(func, "__name__", None) or type(func).__name__
+    module = getattr(func, "__module__", None)
+    return f"{module}.{name}" if module else name
+
+
+def _timed(func, name=None):
+    """Wrap ``func`` so each call is timed under ``name``."""
+    if getattr(func, "_ui_profiled", False):
+        return func
+    name = name or handler_name(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        _running.append(name)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            _running.pop()
+            record(name, elapsed)
+
+    wrapper._ui_profiled = True
+    return wrapper
+
+
+def record(name, elapsed_ms):
+    with _lock:
+        _samples[name].append(elapsed_ms)
+    if elapsed_ms >= SLOW_MS:
+        log.warning("slow handler %s took %.1f ms", name, elapsed_ms)
+
+
+_tk_register = tk.Misc._register
+_tk_after = tk.Misc.after
+_tk_variable_register = tk.Variable._register
+
+
+def _patch_tkinter():
+    def _register(self, func, subst=None, needcleanup=1):
+        # ``after`` registers its own ``callit`` shim; the real callback is timed in ``after``
+        if not getattr(func, "__qualname__", "").startswith("Misc.after"):
+            func = _timed(func)
+        return _tk_register(self, func, subst, needcleanup)
+
+    def _after(self, ms, func=None, *args):
+        # after_idle goes through here too
+        return _tk_after(self, ms, _timed(func) if func is not None else None, *args)
+
+    def _variable_register(self, callback):
+        return _tk_variable_register(self, _timed(callback))
+
+    tk.Misc._register = _register
+    tk.Misc.after = _after
+    tk.Variable._register = _variable_register
+
+
+# --- Stall watchdog ---
+def _beat(root):
+    global _last_beat
+    _last_beat = time.perf_counter()
+    try:
+        _tk_after(root, HEARTBEAT_MS, _beat, root)  # unpatched: heartbeats are not handlers
+    except tk.TclError:
+        _watched.discard(str(root))  # window destroyed
+
+
+def _watchdog(main_ident):
+    stalled_since = None
+    while True:
+        time.sleep(STALL_MS / 4000)
+        blocked = (time.perf_counter() - _last_beat) * 1000
+        if blocked < STALL_MS or not _watched:
+            if stalled_since is not None:
+                log.warning("event loop resumed after %.0f ms", (time.perf_counter() - stalled_since) * 1000)
+                stalled_since = None
+            continue
+        if stalled_since is not None:
+            continue  # one stack per stall
+        stalled_since = _last_beat
+        frame = sys._current_frames().get(main_ident)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "  <no frame>\n"
+        handler = _running[-1] if _running else "<unknown>"
+        log.warning("event loop blocked for %.0f ms in %s; main thread stack:\n%s", blocked, handler, stack)
+
+
+# --- Reporting ---
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summary():
+    """Per-handler latency stats in ms, slowest p95 first."""
+    with _lock:
+        samples = {name: list(values) for name, values in _samples.items() if values}
+    rows = []
+    for name, values in samples.items():
+        buckets = {str(limit): 0 for limit in BUCKETS_MS}
+        buckets["inf"] = 0
+        for value in values:
+            key = next((str(limit) for limit in BUCKETS_MS if value <= limit), "inf")
+            buckets[key] += 1
+        rows.append({
+            "handler": name,
+            "count": len(values),
+            "p50": round(percentile(values, 50), 2),
+            "p95": round(percentile(values, 95), 2),
+            "p99": round(percentile(values, 99), 2),
+            "max": round(max(values), 2),
+            "histogram_ms": buckets,
+        })
+    return sorted(rows, key=lambda r: r["p95"], reverse=True)
+
+
+def report(file=None):
+    file = file or sys.stderr
+    rows = summary()
+    print("\nUI handler latency (ms)", file=file)
+    print(f"  {'handler':<60} {'count':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}", file=file)
+    for r in rows:
+        print(f"  {r['handler']:<60} {r['count']:6d} {r['p50']:8.1f} {r['p95']:8.1f} {r['p99']:8.1f} {r['max']:8.1f}", file=file)
+
+
+def write_summary():
+    path = os.path.join(PROFILE_DIR, "latency.json")
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"slow_ms": SLOW_MS, "stall_ms": STALL_MS, "handlers": summary()}, f, indent=2)
+        with open(os.path.join(PROFILE_DIR, "latency.txt"), "w", encoding="utf-8") as f:
+            report(f)
+    except OSError as e:
+        print(f"Could not write UI profile: {e}")
+
+
+def install(root):
+    """Profile Tk callbacks in this process and watch ``root``'s event loop (no-op unless enabled).
+
+    Call right after creating the window, before building widgets, so their
+    commands and bindings are registered through the timing wrapper.
+    """
+    global _installed
+    if not ENABLED:
+        return
+    with _lock:
+        first = not _installed
+        _installed = True
+    if first:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        handler = RotatingFileHandler(os.path.join(PROFILE_DIR, "ui_profile.log"), maxBytes=1_000_000, backupCount=5)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
+        log.propagate = False
+        _patch_tkinter()
+        threading.Thread(target=_watchdog, args=(threading.main_thread().ident,),
+                         name="ui-watchdog", daemon=True).start()
+        atexit.register(write_summary)
+        log.info("UI profiling on (slow >= %.0f ms, stall >= %.0f ms)", SLOW_MS, STALL_MS)
+    if str(root) not in _watched:
+        _watched.add(str(root))
+        _beat(root)
@@ -0,0 +1,11 @@
+"""WSGI entry point for running the employee API under any WSGI server, e.g.
+
+    gunicorn --chdir modules -k gthread -w 4 --threads 8 --keep-alive 5 wsgi:app
+    waitress-serve --threads 16 --port 5000 wsgi:app   (from the modules folder)
+
+Set EMS_MAX_CHANGE_STREAMS (e.g. half of --threads) to cap the /changes
+streams per process; unset, streams can take every thread.
+"""
+from employee_api import create_app
+
+app = create_app()
@@ -0,0 +1,190 @@
+"""PunchImporter against an in-memory stand-in for the Firestore client.
+
+Covers the parts of modules/import_punches.py that decide what gets written:
+closing days once the reader is past the window, resuming from a checkpoint
+after a failed write, and merging punch files per source so a day spread over
+two files adds up and re-importing a file does not count it twice.
+"""
+import os
+import sys
+from datetime import datetime, time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modules"))
+
+from import_punches import PunchImporter  # noqa: E402
+
+ROSTER = {"B1": ("E1", "Alice"), "E1": ("E1", "Alice"), "B2": ("E2", "Bob"), "E2": ("E2", "Bob")}
+LATE_AFTER = time(9, 15)
+
+
+class FakeRef:
+    def __init__(self, doc_id):
+        self.id = doc_id
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeCollection:
+    def document(self, doc_id):
+        return FakeRef(doc_id)
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def set(self, ref, data, merge=False):
+        self.writes.append((ref.id, data, merge))
+
+    def commit(self):
+        self.db.commit(self.writes)
+
+
+class FakeDb:
+    """The attendance collection as a dict; ``fail_on`` makes that commit (1-based) raise."""
+
+    def __init__(self, fail_on=None):
+        self.docs = {}
+        self.commits = []
+        self.fail_on = fail_on
+
+    def collection(self, name):
+        assert name == "attendance"
+        return FakeCollection()
+
+    def get_all(self, refs, field_paths=None):
+        for ref in refs:
+            data = self.docs.get(ref.id)
+            if data is not None and field_paths:
+                data = {key: data[key] for key in field_paths if key in data}
+            yield FakeSnapshot(ref.id, data)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def commit(self, writes):
+        if self.fail_on is not None and len(self.commits) + 1 == self.fail_on:
+            self.fail_on = None
+            raise RuntimeError("commit failed")
+        for doc_id, data, merge in writes:
+            if merge:
+                self.docs.setdefault(doc_id, {}).update(data)
+            else:
+                self.docs[doc_id] = dict(data)
+        self.commits.append(sorted(doc_id for doc_id, _, _ in writes))
+
+
+def write_csv(path, rows):
+    path.write_text("badge_id,timestamp\n" + "".join(f"{badge},{when}\n" for badge, when in rows),
+                    encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def make_importer():
+    importers = []
+
+    def make(db, window=1):
+        importer = PunchImporter(db, ROSTER, LATE_AFTER, window=window)
+        importers.append(importer)
+        return importer
+
+    yield make
+    for importer in importers:
+        importer.close()
+
+
+def test_days_close_once_the_reader_is_past_the_window(tmp_path, make_importer):
+    db = FakeDb()
+    importer = make_importer(db)
+    path = write_csv(tmp_path / "punches.csv", [
+        ("B1", "2025-11-03 08:50:00"),
+        ("B1", "2025-11-04 09:00:00"),
+        ("B1", "2025-11-03 17:30:00"),  # within the window: still merged into the 3rd
+        ("B1", "2025-11-05 09:05:00"),  # closes the 3rd
+        ("B1", "2025-11-03 18:00:00"),  # straggler: the 3rd is already written
+    ])
+    importer.import_file(path)
+
+    assert db.commits[0] == ["E1_2025-11-03"]
+    record = db.docs["E1_2025-11-03"]
+    assert record["punches"] == 2
+    assert record["first_in"] == datetime(2025, 11, 3, 8, 50)
+    assert record["last_out"] == datetime(2025, 11, 3, 17, 30)
+    assert importer.stats["stragglers"] == 1
+    assert set(db.docs) == {"E1_2025-11-03", "E1_2025-11-04", "E1_2025-11-05"}
+    assert not os.path.exists(path + ".import-checkpoint")
+
+
+def test_resume_from_checkpoint_after_a_failed_write(tmp_path, make_importer):
+    rows = [
+        ("B1", "2025-11-03 09:00:00"),
+        ("B2", "2025-11-03 09:20:00"),
+        ("B1", "2025-11-04 09:01:00"),
+        ("B1", "2025-11-05 09:02:00"),  # writes the 3rd
+        ("B2", "2025-11-04 18:00:00"),
+        ("B1", "2025-11-06 09:03:00"),  # writing the 4th fails
+        ("B1", "2025-11-06 17:00:00"),
+    ]
+    path = write_csv(tmp_path / "punches.csv", rows)
+    db = FakeDb(fail_on=2)
+    with pytest.raises(RuntimeError):
+        make_importer(db).import_file(path)
+    assert set(db.docs) == {"E1_2025-11-03", "E2_2025-11-03"}
+    assert os.path.exists(path + ".import-checkpoint")
+
+    importer = make_importer(db)
+    importer.import_file(path)
+
+    # Rows of the already-written 3rd are skipped, not re-read
+    assert importer.stats["skipped_rows"] == 2
+    assert importer.stats["stragglers"] == 0
+    assert db.docs["E1_2025-11-04"]["punches"] == 1
+    assert db.docs["E2_2025-11-04"]["punches"] == 1
+    assert db.docs["E1_2025-11-06"]["punches"] == 2
+    assert db.docs["E2_2025-11-03"]["status"] == "Late"
+    assert not os.path.exists(path + ".import-checkpoint")
+
+
+def test_two_files_for_the_same_day_merge(tmp_path, make_importer):
+    db = FakeDb()
+    importer = make_importer(db)
+    importer.import_file(write_csv(tmp_path / "gate-a.csv", [
+        ("B1", "2025-11-03 09:40:00"), ("B1", "2025-11-03 12:00:00")]))
+    importer.import_file(write_csv(tmp_path / "gate-b.csv", [
+        ("B1", "2025-11-03 08:55:00"), ("B1", "2025-11-03 18:05:00")]))
+
+    record = db.docs["E1_2025-11-03"]
+    assert record["first_in"] == datetime(2025, 11, 3, 8, 55)
+    assert record["last_out"] == datetime(2025, 11, 3, 18, 5)
+    assert record["punches"] == 4
+    assert record["status"] == "Present"
+    assert set(record["punch_sources"]) == {"gate-a_csv", "gate-b_csv"}
+
+
+def test_reimporting_a_file_replaces_its_share(tmp_path, make_importer):
+    db = FakeDb()
+    importer = make_importer(db)
+    gate_a = write_csv(tmp_path / "gate-a.csv", [
+        ("B1", "2025-11-03 09:40:00"), ("B1", "2025-11-03 12:00:00")])
+    gate_b = write_csv(tmp_path / "gate-b.csv", [("B1", "2025-11-03 18:05:00")])
+    importer.import_file(gate_a)
+    importer.import_file(gate_b)
+    importer.import_file(gate_a)
+
+    record = db.docs["E1_2025-11-03"]
+    assert record["punches"] == 3
+    assert record["punch_sources"]["gate-a_csv"]["punches"] == 2
+    assert record["first_in"] == datetime(2025, 11, 3, 9, 40)
+    assert record["status"] == "Late"
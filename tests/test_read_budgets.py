@@ -0,0 +1,50 @@
+"""Screen loads stay within modules/read_budgets.json against the Firestore emulator.
+
+Runs the read budget gate (modules/read_budget.py) on seeded data. Needs the
+emulator (FIRESTORE_EMULATOR_HOST) and a display (xvfb-run on CI); skipped
+otherwise.
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+MODULES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modules")
+sys.path.insert(0, MODULES)
+
+import read_budget  # noqa: E402
+
+SCALE = {"employees": 500, "tasks": 5000, "attendance_days": 3}
+BUDGETS = read_budget.load_budgets(read_budget.BUDGETS_PATH)
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("FIRESTORE_EMULATOR_HOST") or not (os.environ.get("DISPLAY") or sys.platform == "win32"),
+    reason="needs the Firestore emulator (FIRESTORE_EMULATOR_HOST) and a display")
+
+
+@pytest.fixture(scope="module")
+def ledger(tmp_path_factory):
+    path = tmp_path_factory.mktemp("read_budget") / "ledger.json"
+    args = [sys.executable, os.path.join(MODULES, "read_budget.py"), "--seed", "--ledger", str(path)]
+    for name, value in SCALE.items():
+        args += [f"--{name.replace('_', '-')}", str(value)]
+    result = subprocess.run(args, cwd=MODULES, capture_output=True, text=True, timeout=1800)
+    print(result.stdout)
+    assert path.exists(), result.stderr
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_scenarios_ran(ledger):
+    assert ledger["failed"] == []
+
+
+@pytest.mark.parametrize("name", list(BUDGETS))
+def test_within_budget(ledger, name):
+    entry = ledger["actions"].get(name)
+    assert entry is not None, f"{name} made no Firestore calls"
+    for kind, budget in BUDGETS[name].items():
+        limit = read_budget.budget_limit(budget, ledger["scale"])
+        assert entry[kind] <= limit, f"{name}: {entry[kind]} {kind}, budget {limit:g}"
@@ -0,0 +1,72 @@
+"""TaskStore column bookkeeping and the vectorized filters the task screens use."""
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modules"))
+
+from models import Task  # noqa: E402
+from task_store import MIN_CAPACITY, TaskStore  # noqa: E402
+from task_summary import TASK_STATUSES  # noqa: E402
+
+TODAY = date(2025, 11, 12)
+
+
+def task(task_id, status="Pending", assign_to="E1", deadline="", name=None):
+    return Task.from_dict({"task": name or f"Task {task_id}", "assign_to": assign_to, "priority": "Medium",
+                           "deadline": deadline, "status": status}, task_id)
+
+
+def ids(store, mask):
+    return sorted(task_id for task_id, _ in store.rows(mask))
+
+
+def test_upsert_overwrites_an_existing_row():
+    store = TaskStore([task("t1"), task("t2")])
+    store.upsert(task("t1", status="Completed", assign_to="E2", name="Renamed"))
+
+    assert len(store) == 2
+    assert len(store.column("alive")) == 2
+    assert store.get("t1").task == "Renamed"
+    assert ids(store, store.mask(status="Completed")) == ["t1"]
+    assert ids(store, store.mask(assignee="E1")) == ["t2"]
+
+
+def test_remove_compacts_once_half_the_rows_are_dead():
+    count = 2 * MIN_CAPACITY + 10
+    store = TaskStore(task(f"t{i}", assign_to=f"E{i % 3}") for i in range(count))
+    removed = [f"t{i}" for i in range(0, count, 2)] + ["t1"]
+    for task_id in removed:
+        assert store.remove(task_id).id == task_id
+    assert store.remove("t0") is None
+
+    kept = sorted(f"t{i}" for i in range(3, count, 2))
+    assert len(store) == len(kept)
+    # Compacted: the columns hold only live rows again, still aligned with their tasks
+    assert len(store.column("alive")) < count
+    assert ids(store, None) == kept
+    assert all(store.get(task_id).id == task_id for task_id in kept)
+    assert ids(store, store.mask(assignee="E0")) == sorted(f"t{i}" for i in range(3, count, 2) if i % 3 == 0)
+
+
+def test_overdue_and_due_this_week_filters():
+    store = TaskStore([
+        task("late", deadline="2025-11-11"),
+        task("late-done", status="Completed", deadline="2025-11-01"),
+        task("today", status="In Progress", deadline="2025-11-12"),
+        task("in-6-days", deadline="2025-11-18"),
+        task("in-7-days", deadline="2025-11-19"),
+        task("no-deadline"),
+    ])
+
+    assert ids(store, store.filter_mask("Overdue", today=TODAY)) == ["late"]
+    assert ids(store, store.filter_mask("Due This Week", today=TODAY)) == ["in-6-days", "today"]
+    assert ids(store, store.filter_mask("Completed")) == ["late-done"]
+
+
+def test_empty_store_counts():
+    store = TaskStore()
+
+    assert store.status_counts() == {"Total": 0, **{status: 0 for status in TASK_STATUSES}}
+    assert store.workload(TODAY) == {}
+    assert store.rows(store.filter_mask("Overdue", today=TODAY)) == []